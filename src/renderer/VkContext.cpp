@@ -40,44 +40,23 @@ namespace Vulkan {
     // Helper Vulkan functions
     namespace {
         bool GetInstanceInfo(const FunctionPointers& vk, InstanceInfo* info) {
-            uint32_t layerCount = 0;
-            VK_TRY(vk.EnumerateInstanceLayerProperties(&layerCount, nullptr));
-            info->layers.resize(layerCount);
-            VK_TRY(vk.EnumerateInstanceLayerProperties(&layerCount, info->layers.data()));
-
-            uint32_t extensionCount = 0;
-            VK_TRY(vk.EnumerateInstanceExtensionProperties(nullptr, &extensionCount, nullptr));
-            info->extensions.resize(extensionCount);
-            VK_TRY(vk.EnumerateInstanceExtensionProperties(nullptr, &extensionCount, info->extensions.data()));
+            VK_TRY(vk.EnumerateInstanceLayerProperties(&info->layers));
+            VK_TRY(vk.EnumerateInstanceExtensionProperties(nullptr, &info->extensions));
 
             return true;
         }
 
 
         bool GetPhysicalDevices(const FunctionPointers& vk, vk::Instance instance, std::vector<vk::PhysicalDevice>* devices) {
-            uint32_t numPhysicalDevices = 0;
-            VK_TRY(vk.EnumeratePhysicalDevices(instance, &numPhysicalDevices, nullptr));
-            devices->resize(numPhysicalDevices);
-            VK_TRY(vk.EnumeratePhysicalDevices(instance, &numPhysicalDevices, devices->data()));
+            VK_TRY(vk.EnumeratePhysicalDevices(instance, devices));
 
             return true;
         }
 
         bool GetDeviceInfo(const FunctionPointers& vk, vk::PhysicalDevice device, DeviceInfo* info) {
-            uint32_t layerCount = 0;
-            VK_TRY(vk.EnumerateDeviceLayerProperties(device, &layerCount, nullptr));
-            info->layers.resize(layerCount);
-            VK_TRY(vk.EnumerateDeviceLayerProperties(device, &layerCount, info->layers.data()));
-
-            uint32_t extensionCount = 0;
-            VK_TRY(vk.EnumerateDeviceExtensionProperties(device, nullptr, &extensionCount, nullptr));
-            info->extensions.resize(extensionCount);
-            VK_TRY(vk.EnumerateDeviceExtensionProperties(device, nullptr, &extensionCount, info->extensions.data()));
-
-            uint32_t familyCount = 0;
-            vk.GetPhysicalDeviceQueueFamilyProperties(device, &familyCount, nullptr);
-            info->queueFamilies.resize(familyCount);
-            vk.GetPhysicalDeviceQueueFamilyProperties(device, &familyCount, info->queueFamilies.data());
+            VK_TRY(vk.EnumerateDeviceLayerProperties(device, &info->layers));
+            VK_TRY(vk.EnumerateDeviceExtensionProperties(device, nullptr, &info->extensions));
+            vk.GetPhysicalDeviceQueueFamilyProperties(device, &info->queueFamilies);
 
             vk.GetPhysicalDeviceMemoryProperties(device, &info->memory);
             vk.GetPhysicalDeviceProperties(device, &info->properties);
@@ -95,6 +74,11 @@ namespace Vulkan {
     {
     }
 
+    void DeviceFunctionPointers::LoadDeviceFunctions(const vk::LoaderManager& manager, vk::Device device) {
+        vk::VulkanDeviceDispatch::LoadDeviceFunctions(manager, device);
+        vk::KHRSwapchainDeviceDispatch::LoadDeviceFunctions(manager, device);
+    }
+
     Context::Context() {
         swapchain = new Swapchain(this);
     }
@@ -301,14 +285,15 @@ namespace Vulkan {
             };
 
             VK_TRY(vk.CreateDevice(info.physicalDevice, &deviceInfo, nullptr, &info.device));
+            deviceVk.LoadDeviceFunctions(vk, info.device);
         }
 
         // Gather the queues
         {
-            vk.GetDeviceQueue(info.device, info.graphicsQueueFamily, 0, &info.graphicsQueue);
+            deviceVk.GetDeviceQueue(info.device, info.graphicsQueueFamily, 0, &info.graphicsQueue);
 
             uint32_t presentOffset = (info.graphicsQueueFamily == info.presentQueueFamily) ? 1 : 0;
-            vk.GetDeviceQueue(info.device, info.presentQueueFamily, presentOffset, &info.presentQueue);
+            deviceVk.GetDeviceQueue(info.device, info.presentQueueFamily, presentOffset, &info.presentQueue);
         }
 
         return true;
@@ -321,5 +306,9 @@ namespace Vulkan {
     const FunctionPointers& Context::GetFunctionPointers() const {
         return vk;
     }
+
+    const DeviceFunctionPointers& Context::GetDeviceFunctionPointers() const {
+        return deviceVk;
+    }
 }
 }
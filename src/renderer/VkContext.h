@@ -87,6 +87,14 @@ namespace Vulkan {
             FunctionPointers();
     };
 
+    // The device functions, loaded for GlobalInfo::device so that they skip the loader's trampolines.
+    class DeviceFunctionPointers :
+        public vk::VulkanDeviceDispatch,
+        public vk::KHRSwapchainDeviceDispatch {
+        public:
+            void LoadDeviceFunctions(const vk::LoaderManager& manager, vk::Device device);
+    };
+
     class Swapchain;
 
     class Context {
@@ -98,12 +106,14 @@ namespace Vulkan {
 
             const GlobalInfo& GetGlobalInfo() const;
             const FunctionPointers& GetFunctionPointers() const;
+            const DeviceFunctionPointers& GetDeviceFunctionPointers() const;
 
         private:
             bool InitializeGlobalInfo(std::string applicationName, uint32_t applicationVersion);
 
             GlobalInfo info;
             FunctionPointers vk;
+            DeviceFunctionPointers deviceVk;
 
             Swapchain* swapchain = nullptr;
     };
@@ -28,23 +28,15 @@
 // OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 #include "VkSwapchain.h"
+#include "VkContext.h"
 
 #include <GLFW/glfw3.h>
 #include <vkcpp/GLFW.h>
+#include <vkcpp/SmallVector.h>
 
 namespace Renderer {
 namespace Vulkan {
 
-    namespace {
-        bool GetPhysicalSurfaceFormats(const FunctionPointers& vk, vk::PhysicalDevice device, vk::SurfaceKHR surface, std::vector<vk::SurfaceFormatKHR> *formats) {
-            uint32_t formatCount = 0;
-            VK_TRY(vk.GetPhysicalDeviceSurfaceFormatsKHR(device, surface, &formatCount, nullptr));
-            formats->resize(formatCount);
-            VK_TRY(vk.GetPhysicalDeviceSurfaceFormatsKHR(device, surface, &formatCount, formats->data()));
-            return true;
-        }
-    };
-
     Swapchain::Swapchain(Context* context) : vk(context->GetFunctionPointers()), info(context->GetGlobalInfo()) {
     }
 
@@ -59,10 +51,9 @@ namespace Vulkan {
         VK_TRY(vk.GetPhysicalDeviceSurfaceSupportKHR(info.physicalDevice, info.presentQueueFamily, surface, &supported));
         ASSERT(supported); //TODO(kangz) try it beforehand, when filtering the physical devices.
 
-        std::vector<vk::SurfaceFormatKHR> formats;
-        if (!GetPhysicalSurfaceFormats(vk, info.physicalDevice, surface, &formats)) {
-            return false;
-        }
+        // Surfaces only have a few formats, they are queried without allocating.
+        vk::SmallVector<vk::SurfaceFormatKHR, 16> formats;
+        VK_TRY(vk.GetPhysicalDeviceSurfaceFormatsKHR(info.physicalDevice, surface, &formats));
 
         ASSERT(formats.size() > 0);
         if (formats[0].format == vk::Format::Undefined) {
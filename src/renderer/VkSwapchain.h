@@ -30,13 +30,20 @@
 #ifndef RENDERER_VKSWAPCHAIN_H_
 #define RENDERER_VKSWAPCHAIN_H_
 
-#include "VkContext.h"
+#include <vkcpp/KHRSurfaceFwd.h>
+#include <vkcpp/VulkanFwd.h>
+
+#include <string>
+#include <vector>
 
 struct GLFWwindow;
 
 namespace Renderer {
 namespace Vulkan {
 
+    class Context;
+    class FunctionPointers;
+    struct GlobalInfo;
 
     class Swapchain {
         public:
@@ -0,0 +1,121 @@
+// PrototypeRenderer Source Code
+// Copyright (c) 2014-2016, Daemon Developers
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// * Redistributions of source code must retain the above copyright notice, this
+//   list of conditions and the following disclaimer.
+//
+// * Redistributions in binary form must reproduce the above copyright notice,
+//   this list of conditions and the following disclaimer in the documentation
+//   and/or other materials provided with the distribution.
+//
+// * Neither the name of Daemon CBSE nor the names of its
+//   contributors may be used to endorse or promote products derived from
+//   this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+// Compares looking Vulkan functions up by name through the driver with vkGetInstanceProcAddr and
+// through LoaderManager::GetLoadedFunction, with the loaders of all the extensions of
+// ExtensionList.txt registered. Needs a Vulkan driver to run.
+
+#include <GLFW/glfw3.h>
+
+#include "vkcpp/GLFW.h"
+#include "vkcpp/LoaderManager.h"
+#include "vkcpp/Vulkan.h"
+#include "vkcpp/EXTDebugReport.h"
+#include "vkcpp/KHRDisplay.h"
+#include "vkcpp/KHRDisplaySwapchain.h"
+#include "vkcpp/KHRSurface.h"
+#include "vkcpp/KHRSwapchain.h"
+
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+
+namespace {
+
+    const char* functionNames[] = {
+        "vkCreateBuffer",
+        "vkDestroyBuffer",
+        "vkQueueSubmit",
+        "vkCmdDraw",
+        "vkCmdPushConstants",
+        "vkGetPhysicalDeviceProperties",
+        "vkGetPhysicalDeviceSurfaceSupportKHR",
+        "vkAcquireNextImageKHR",
+        "vkCreateDebugReportCallbackEXT",
+        "vkNotAFunction",
+    };
+    const size_t numFunctionNames = sizeof(functionNames) / sizeof(functionNames[0]);
+
+    const int numIterations = 100000;
+
+    template<typename Lookup>
+    void Measure(const char* name, Lookup lookup) {
+        // Use the result so that the lookups can't be optimized away.
+        uintptr_t accumulator = 0;
+
+        auto start = std::chrono::steady_clock::now();
+        for (int i = 0; i < numIterations; i++) {
+            for (size_t j = 0; j < numFunctionNames; j++) {
+                accumulator += reinterpret_cast<uintptr_t>(lookup(functionNames[j]));
+            }
+        }
+        auto end = std::chrono::steady_clock::now();
+
+        double nanoseconds = std::chrono::duration<double, std::nano>(end - start).count();
+        printf("%-40s %8.1f ns per lookup (%zx)\n", name, nanoseconds / (numIterations * numFunctionNames), static_cast<size_t>(accumulator));
+    }
+
+}
+
+int main() {
+    if (!glfwInit()) {
+        fprintf(stderr, "Could not initialize GLFW\n");
+        return EXIT_FAILURE;
+    }
+
+    vk::LoaderManager manager(reinterpret_cast<vk::UntypedFnptr>(vk::GLFW::GetInstanceProcAddress));
+    vk::VulkanLoader vulkan(&manager);
+    vk::KHRDisplayLoader display(&manager);
+    vk::KHRDisplaySwapchainLoader displaySwapchain(&manager);
+    vk::KHRSurfaceLoader surface(&manager);
+    vk::KHRSwapchainLoader swapchain(&manager);
+    vk::EXTDebugReportLoader debugReport(&manager);
+
+    manager.LoadGlobals();
+
+    const vk::InstanceCreateInfo instanceInfo = {};
+    vk::Instance instance = nullptr;
+    if (vulkan.CreateInstance(&instanceInfo, nullptr, &instance) != vk::Result::Success) {
+        fprintf(stderr, "Could not create the Vulkan instance\n");
+        glfwTerminate();
+        return EXIT_FAILURE;
+    }
+    manager.SetInstance(instance);
+
+    Measure("LoaderManager::GetInstanceFunction", [&manager](const char* name) {
+        return manager.GetInstanceFunction(name);
+    });
+    Measure("LoaderManager::GetLoadedFunction", [&manager](const char* name) {
+        return manager.GetLoadedFunction(name);
+    });
+
+    vulkan.DestroyInstance(instance, nullptr);
+    glfwTerminate();
+    return EXIT_SUCCESS;
+}
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Micro-benchmark for the parsing of the declarators of struct members and command params, the
+# innermost loop of the registry parse. Run it with
+# "python benchmarks/declarator_benchmark.py [VULKAN_XML]".
+
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree
+
+VKCPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, VKCPP_DIR)
+
+import generate
+
+def declarator_elements(xml_filename):
+    root = xml.etree.ElementTree.parse(xml_filename).getroot()
+    return root.findall('types/type/member') + root.findall('commands/command/param')
+
+def parse_all(elements):
+    for element in elements:
+        generate.AnnotatedTypeAndName().parse_regular_parameter(element)
+
+def best_time(function, iterations):
+    best = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        duration = time.perf_counter() - start
+        if best == None or duration < best:
+            best = duration
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the parsing of member and param declarators.')
+    parser.add_argument('xml', metavar='VULKAN_XML', nargs='?', default=os.path.join(VKCPP_DIR, 'vk.xml'), help='The Vulkan XML definition to use.')
+    parser.add_argument('-n', '--iterations', default=20, type=int, help='Number of runs of each measurement, the best one is kept.')
+    args = parser.parse_args()
+
+    elements = declarator_elements(args.xml)
+    # The first run fills the Name memoization tables, like the many repeated types of a registry do.
+    parse_all(elements)
+    parse_time = best_time(lambda: parse_all(elements), args.iterations)
+
+    print('Declarators:           %8d' % len(elements))
+    print('Parse time:            %8.2f ms' % (1000 * parse_time))
+    print('Per declarator:        %8.2f us' % (1000000 * parse_time / len(elements)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
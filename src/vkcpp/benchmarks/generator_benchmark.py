@@ -0,0 +1,198 @@
+#!/usr/bin/python
+
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Benchmark of the phases of the generator: the registry parse, the linking of the types and
+# functions, the linking of the extensions, the computation of the template arguments, the
+# rendering of the templates and the writing of the files. It runs on vk.xml and on synthetic
+# registries at several scales (see synthetic_registry.py) to show how each phase scales, and
+# prints the results as JSON so that the results for two revisions can be compared.
+# Run it with "python benchmarks/generator_benchmark.py -o results.json", then with
+# "--compare results.json" on the other revision.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+VKCPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, VKCPP_DIR)
+
+import generate
+import synthetic_registry
+
+PHASES = ['parse', 'link_types', 'link_extensions', 'template_args', 'render', 'write', 'write_unchanged']
+
+# Each run should start with empty memoization tables, like a generator run does.
+def reset_name_caches():
+    generate.Name.interned.clear()
+    generate.split_cache.clear()
+
+# Runs all the phases of the generator once, returns the time taken by each phase and the number
+# of definitions in the registry.
+def run_phases(xml, template_dir, output_dir):
+    times = {}
+    def timed(phase, function):
+        start = time.perf_counter()
+        result = function()
+        times[phase] = time.perf_counter() - start
+        return result
+
+    reset_name_caches()
+    (types, constants, functions, main_api, extensions) = timed('parse', lambda: generate.read_registry(xml))
+
+    def link_types():
+        (type_dict, function_dict, interesting_extensions) = generate.index_registry(types, functions, main_api, extensions)
+        to_link = generate.extensions_to_link(interesting_extensions, interesting_extensions)
+        linked_types = generate.link_required(to_link, type_dict, function_dict)
+        return (type_dict, function_dict, interesting_extensions, linked_types)
+    (type_dict, function_dict, interesting_extensions, linked_types) = timed('link_types', link_types)
+
+    timed('link_extensions', lambda: generate.link_extensions(interesting_extensions, interesting_extensions, linked_types, type_dict, function_dict))
+
+    to_render = timed('template_args', lambda: generate.compute_files_to_render(linked_types, constants, interesting_extensions, output_dir))
+
+    def render():
+        env = generate.create_environment(template_dir)
+        return [(render.output, generate.render_file(env, render)) for render in to_render]
+    rendered = timed('render', render)
+
+    def write():
+        for (path, content) in rendered:
+            generate.write_if_changed(path, content)
+    timed('write', write)
+    timed('write_unchanged', write)
+
+    counts = {
+        'types': len(types),
+        'functions': len(functions),
+        'extensions': len(interesting_extensions),
+        'outputs': len(rendered),
+    }
+    return (times, counts)
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+def benchmark_registry(name, xml, template_dir, iterations):
+    runs = []
+    for _ in range(iterations):
+        output_dir = tempfile.mkdtemp()
+        try:
+            (times, counts) = run_phases(xml, template_dir, output_dir)
+        finally:
+            shutil.rmtree(output_dir)
+        runs.append(times)
+
+    phases = {}
+    for phase in PHASES:
+        durations = [times[phase] for times in runs]
+        phases[phase] = {'best': min(durations), 'median': median(durations)}
+
+    return {
+        'name': name,
+        'counts': counts,
+        'phases': phases,
+        'total': sum(phases[phase]['best'] for phase in PHASES),
+    }
+
+def print_comparison(baseline, results):
+    baseline_registries = {}
+    for registry in baseline['registries']:
+        baseline_registries[registry['name']] = registry
+
+    for registry in results['registries']:
+        if not registry['name'] in baseline_registries:
+            continue
+        old_registry = baseline_registries[registry['name']]
+
+        print('%s:' % registry['name'], file=sys.stderr)
+        for phase in PHASES + ['total']:
+            if phase == 'total':
+                (old, new) = (old_registry['total'], registry['total'])
+            else:
+                (old, new) = (old_registry['phases'][phase]['best'], registry['phases'][phase]['best'])
+            ratio = new / old if old > 0 else float('inf')
+            print('    %-16s %9.2f ms -> %9.2f ms (x%.2f)' % (phase, 1000 * old, 1000 * new, ratio), file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the phases of the generator on vk.xml and synthetic registries.')
+    parser.add_argument('xml', metavar='VULKAN_XML', nargs='?', default=os.path.join(VKCPP_DIR, 'vk.xml'), help='The Vulkan XML definition to use.')
+    parser.add_argument('-t', '--template-dir', default=os.path.join(VKCPP_DIR, 'templates'), type=str, help='Directory with the templates to render.')
+    parser.add_argument('-s', '--scales', default='1,10,50', type=str, help='Comma separated scales of the synthetic registries, empty for none.')
+    parser.add_argument('-n', '--iterations', default=3, type=int, help='Number of runs on each registry.')
+    parser.add_argument('-o', '--output', default=None, type=str, help='Writes the JSON results to this file instead of the standard output.')
+    parser.add_argument('--compare', default=None, type=str, help='JSON results of another revision to compare with, the comparison is printed to the standard error.')
+    args = parser.parse_args()
+
+    scales = [float(scale) for scale in args.scales.split(',') if scale != '']
+
+    results = {
+        'python': platform.python_version(),
+        'iterations': args.iterations,
+        'registries': [],
+    }
+
+    results['registries'].append(benchmark_registry(os.path.basename(args.xml), args.xml, args.template_dir, args.iterations))
+
+    synthetic_dir = tempfile.mkdtemp()
+    try:
+        for scale in scales:
+            name = 'synthetic-%gx' % scale
+            xml = os.path.join(synthetic_dir, name + '.xml')
+            synthetic_registry.write_synthetic_registry(xml, synthetic_registry.counts_for_scale(scale))
+            results['registries'].append(benchmark_registry(name, xml, args.template_dir, args.iterations))
+    finally:
+        shutil.rmtree(synthetic_dir)
+
+    output = json.dumps(results, indent=4, sort_keys=True) + '\n'
+    if args.output == None:
+        sys.stdout.write(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    if args.compare != None:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
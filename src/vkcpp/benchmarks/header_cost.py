@@ -0,0 +1,150 @@
+#!/usr/bin/python
+
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+
+# Measures the compile time cost of including the generated headers and the renderer headers:
+# the size of the preprocessed output and the time to parse it. Each header is included alone in
+# a translation unit after the standard headers they all need, which are measured as a baseline.
+# Comparing the JSON results of two revisions shows the effect of a change, for example with
+#     python benchmarks/header_cost.py -o before.json
+#     (apply the change)
+#     python benchmarks/header_cost.py --compare before.json
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+VKCPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.dirname(VKCPP_DIR)
+
+# The renderer headers are included by path, the generated ones through vkcpp/ like the renderer does.
+RENDERER_HEADERS = [
+    os.path.join(SRC_DIR, 'renderer', 'VkContext.h'),
+    os.path.join(SRC_DIR, 'renderer', 'VkSwapchain.h'),
+]
+
+PRELUDE = '#include <string>\n#include <vector>\n'
+
+def generate_headers(xml, extension_list, output_dir):
+    subprocess.check_call([
+        sys.executable, os.path.join(VKCPP_DIR, 'generate.py'), xml,
+        '-e', extension_list,
+        '-t', os.path.join(VKCPP_DIR, 'templates'),
+        '-o', os.path.join(output_dir, 'vkcpp'),
+        '--no-cache',
+    ], stdout=subprocess.DEVNULL)
+
+def compiler_command(compiler, include_dirs, flags):
+    command = [compiler, '-std=c++14', '-x', 'c++'] + flags
+    for include_dir in include_dirs:
+        command += ['-I', include_dir]
+    return command + ['-']
+
+def measure(compiler, include_dirs, source, iterations):
+    preprocessed = subprocess.run(compiler_command(compiler, include_dirs, ['-E', '-P']),
+                                  input=source.encode(), stdout=subprocess.PIPE, check=True).stdout
+
+    best = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(compiler_command(compiler, include_dirs, ['-fsyntax-only']), input=source.encode(), check=True)
+        duration = time.perf_counter() - start
+        if best == None or duration < best:
+            best = duration
+
+    return {
+        'bytes': len(preprocessed),
+        'lines': preprocessed.count(b'\n'),
+        'parse': best,
+    }
+
+def print_results(results, file):
+    for (header, cost) in sorted(results['headers'].items()):
+        print('%-40s %9d bytes %7d lines %8.1f ms' % (header, cost['bytes'], cost['lines'], 1000 * cost['parse']), file=file)
+
+def print_comparison(baseline, results):
+    for (header, cost) in sorted(results['headers'].items()):
+        if not header in baseline['headers']:
+            continue
+        old = baseline['headers'][header]
+        print('%-40s %9d -> %9d bytes %8.1f -> %8.1f ms' % (header, old['bytes'], cost['bytes'], 1000 * old['parse'], 1000 * cost['parse']), file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the preprocessed size and parse time of the VkCPP and renderer headers.')
+    parser.add_argument('xml', metavar='VULKAN_XML', nargs='?', default=os.path.join(VKCPP_DIR, 'vk.xml'), help='The Vulkan XML definition to use.')
+    parser.add_argument('-e', '--extensions', default=os.path.join(VKCPP_DIR, 'ExtensionList.txt'), type=str, help='File listing the extensions to generate.')
+    parser.add_argument('--compiler', default=os.environ.get('CXX', 'c++'), type=str, help='The C++ compiler to use.')
+    parser.add_argument('-n', '--iterations', default=5, type=int, help='Number of parses of each header, the best time is kept.')
+    parser.add_argument('-o', '--output', default=None, type=str, help='Writes the JSON results to this file.')
+    parser.add_argument('--compare', default=None, type=str, help='JSON results of another revision to compare with, the comparison is printed to the standard error.')
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        generate_headers(args.xml, args.extensions, output_dir)
+        include_dirs = [output_dir, os.path.join(VKCPP_DIR, 'include')]
+
+        headers = {}
+        for filename in sorted(os.listdir(os.path.join(output_dir, 'vkcpp'))):
+            if filename.endswith('.h'):
+                headers['vkcpp/' + filename] = '#include <vkcpp/%s>\n' % filename
+        for path in RENDERER_HEADERS:
+            headers['renderer/' + os.path.basename(path)] = '#include "%s"\n' % path
+
+        results = {
+            'compiler': args.compiler,
+            'baseline': measure(args.compiler, include_dirs, PRELUDE, args.iterations),
+            'headers': {},
+        }
+        for (header, include) in headers.items():
+            results['headers'][header] = measure(args.compiler, include_dirs, PRELUDE + include, args.iterations)
+    finally:
+        shutil.rmtree(output_dir)
+
+    print('%-40s %9d bytes %7d lines %8.1f ms' % ('(standard headers)', results['baseline']['bytes'], results['baseline']['lines'], 1000 * results['baseline']['parse']))
+    print_results(results, sys.stdout)
+
+    if args.output != None:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=4, sort_keys=True) + '\n')
+
+    if args.compare != None:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Micro-benchmark for the generator's Name objects: measures the time and allocations of a
+# registry parse, and the cost of the case conversions the linking and the templates do.
+# Run it with "python benchmarks/name_benchmark.py [VULKAN_XML]".
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+VKCPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, VKCPP_DIR)
+
+import generate
+
+# Each parse should start with empty memoization tables, like a generator run does.
+def reset_name_caches():
+    generate.Name.interned.clear()
+    generate.split_cache.clear()
+
+def parse(xml):
+    reset_name_caches()
+    return generate.parse_vulkan_xml(xml)
+
+def best_time(function, iterations):
+    best = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        duration = time.perf_counter() - start
+        if best == None or duration < best:
+            best = duration
+    return best
+
+def all_names():
+    return [obj for obj in gc.get_objects() if isinstance(obj, generate.Name)]
+
+def convert_all(names):
+    for name in names:
+        name.canonical_case()
+        name.camelCase()
+        name.CamelCase()
+        name.SNAKE_CASE()
+        name.snake_case()
+        name.Typename()
+        name.EnumCase()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the creation and use of Name objects.')
+    parser.add_argument('xml', metavar='VULKAN_XML', nargs='?', default=os.path.join(VKCPP_DIR, 'vk.xml'), help='The Vulkan XML definition to use.')
+    parser.add_argument('-n', '--iterations', default=10, type=int, help='Number of runs of each measurement, the best one is kept.')
+    args = parser.parse_args()
+
+    parse_time = best_time(lambda: parse(args.xml), args.iterations)
+
+    gc.collect()
+    reset_name_caches()
+    tracemalloc.start()
+    registry = generate.parse_vulkan_xml(args.xml)
+    (_, peak_memory) = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    retained_memory = sum(stat.size for stat in snapshot.statistics('filename'))
+
+    names = all_names()
+    distinct_names = set(name.canonical_case() for name in names)
+
+    convert_all(names)
+    conversion_time = best_time(lambda: convert_all(names), args.iterations)
+
+    print('Registry parse:        %8.2f ms' % (1000 * parse_time))
+    print('Parse peak memory:     %8.1f KiB' % (peak_memory / 1024.0))
+    print('Retained after parse:  %8.1f KiB in %d blocks' % (retained_memory / 1024.0, retained_blocks))
+    print('Name objects:          %8d (%d distinct)' % (len(names), len(distinct_names)))
+    print('Case conversions:      %8.2f ms for all names' % (1000 * conversion_time))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
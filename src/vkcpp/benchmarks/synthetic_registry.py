@@ -0,0 +1,288 @@
+#!/usr/bin/python
+
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Writes synthetic Vulkan registries to benchmark the generator on registries larger than vk.xml.
+# The registry has the same structure as vk.xml: handles, enums, bitmasks, structs and commands
+# that reference each other, a core feature and extensions that add types, commands and enum
+# values. It is generated from a fixed seed so that the same parameters give the same XML.
+# Run it with "python benchmarks/synthetic_registry.py -s 10 OUTPUT.xml".
+
+import argparse
+import random
+import re
+import sys
+
+# The number of definitions of each kind at scale 1, roughly the size of vk.xml.
+BASE_COUNTS = {
+    'handles': 30,
+    'enums': 40,
+    'bitmasks': 35,
+    'structs': 125,
+    'commands': 170,
+    'extensions': 18,
+}
+
+# Which part of the definitions is owned by the extensions instead of the core feature.
+EXTENSION_SHARE = 0.2
+
+SYSTEM_TYPES = ['void', 'char', 'float', 'uint8_t', 'uint32_t', 'uint64_t', 'int32_t', 'size_t']
+MEMBER_TYPES = ['float', 'uint32_t', 'uint64_t', 'int32_t', 'size_t', 'VkBool32', 'VkFlags']
+
+# Letters used to spell indices as words, so that the names split like the real ones. E, I, K and X
+# are left out so that no word is mistaken for a vendor suffix.
+LETTERS = 'abcdfghjlmnopqrstuvwyz'
+
+def word(index):
+    letters = ''
+    while True:
+        letters = LETTERS[index % len(LETTERS)] + letters
+        index //= len(LETTERS)
+        if index == 0 and len(letters) >= 2:
+            return letters.capitalize()
+
+def counts_for_scale(scale):
+    counts = {}
+    for (kind, count) in BASE_COUNTS.items():
+        counts[kind] = max(1, int(round(count * scale)))
+    return counts
+
+# A definition of the registry, owner 0 is the core feature and owner n the nth extension.
+class Definition:
+    def __init__(self, name, owner):
+        self.name = name
+        self.owner = owner
+
+    # The prefix of the values of enums and bitmasks, VkSynthEnumAb gives VK_SYNTH_ENUM_AB.
+    def value_prefix(self):
+        return 'VK' + re.sub('([A-Z])', lambda match: '_' + match.group(1), self.name[2:]).upper()
+
+def assign_owners(count, extension_count):
+    core_count = count - int(count * EXTENSION_SHARE)
+    owners = []
+    for i in range(count):
+        if i < core_count:
+            owners.append(0)
+        else:
+            owners.append(1 + (i - core_count) * extension_count // (count - core_count))
+    return owners
+
+class SyntheticRegistry:
+    def __init__(self, counts, seed):
+        self.random = random.Random(seed)
+        self.extension_count = counts['extensions']
+
+        def make(kind, pattern):
+            owners = assign_owners(counts[kind], self.extension_count)
+            return [Definition(pattern % word(i), owner) for (i, owner) in enumerate(owners)]
+
+        self.handles = make('handles', 'VkSynthHandle%s')
+        self.enums = make('enums', 'VkSynthEnum%s')
+        self.bitmasks = make('bitmasks', 'VkSynthBits%s')
+        self.structs = make('structs', 'VkSynthStruct%s')
+        self.commands = make('commands', 'vkSynthCommand%s')
+
+        self.visible_types_cache = {}
+
+    # Definitions that the definitions of the owner can use.
+    def visible(self, definitions, owner):
+        return [definition for definition in definitions if definition.owner in (0, owner)]
+
+    # The names of the types, except structs, that the definitions of the owner can use.
+    def visible_types(self, owner):
+        if not owner in self.visible_types_cache:
+            types = list(MEMBER_TYPES)
+            types += [handle.name for handle in self.visible(self.handles, owner)]
+            types += [enum.name for enum in self.visible(self.enums, owner)]
+            types += [bitmask.name + 'Flags' for bitmask in self.visible(self.bitmasks, owner)]
+            self.visible_types_cache[owner] = types
+        return self.visible_types_cache[owner]
+
+    # Picks a type for a definition of the owner, structs_by_owner contains the structs it can use.
+    def member_type(self, owner, structs_by_owner):
+        choices = [self.visible_types(owner), structs_by_owner.get(0, [])]
+        if owner != 0:
+            choices.append(structs_by_owner.get(owner, []))
+
+        index = self.random.randrange(sum(len(names) for names in choices))
+        for names in choices:
+            if index < len(names):
+                return names[index]
+            index -= len(names)
+
+    def write_types(self, out):
+        out.append('    <types>')
+        for typ in SYSTEM_TYPES:
+            out.append('        <type requires="vk_platform.h" name="%s"/>' % typ)
+        out.append('        <type category="basetype">typedef <type>uint32_t</type> <name>VkFlags</name>;</type>')
+        out.append('        <type category="basetype">typedef <type>uint32_t</type> <name>VkBool32</name>;</type>')
+
+        for handle in self.handles:
+            out.append('        <type category="handle"><type>VK_DEFINE_HANDLE</type>(<name>%s</name>)</type>' % handle.name)
+        for bitmask in self.bitmasks:
+            out.append('        <type requires="%sFlagBits" category="bitmask">typedef <type>VkFlags</type> <name>%sFlags</name>;</type>' % (bitmask.name, bitmask.name))
+        for enum in self.enums:
+            out.append('        <type name="%s" category="enum"/>' % enum.name)
+
+        # Structs only use the structs defined before them so that there are no cycles.
+        earlier_structs = {}
+        for struct in self.structs:
+            out.append('        <type category="struct" name="%s">' % struct.name)
+            for j in range(self.random.randint(2, 8)):
+                typ = self.member_type(struct.owner, earlier_structs)
+                member = word(j).lower()
+                kind = self.random.randint(0, 9)
+                if kind == 0:
+                    out.append('            <member>const <type>%s</type>* <name>p%s</name></member>' % (typ, member.capitalize()))
+                elif kind == 1:
+                    out.append('            <member><type>%s</type> <name>%s</name>[4]</member>' % (typ, member))
+                elif kind == 2:
+                    out.append('            <member><type>char</type> <name>%s</name>[<enum>VK_SYNTH_MAX_NAME_SIZE</enum>]</member>' % member)
+                else:
+                    out.append('            <member><type>%s</type> <name>%s</name></member>' % (typ, member))
+            out.append('        </type>')
+            earlier_structs.setdefault(struct.owner, []).append(struct.name)
+        out.append('    </types>')
+
+    def write_enums(self, out):
+        out.append('    <enums name="API Constants">')
+        out.append('        <enum value="256" name="VK_SYNTH_MAX_NAME_SIZE"/>')
+        out.append('    </enums>')
+
+        for enum in self.enums:
+            prefix = enum.value_prefix()
+            out.append('    <enums name="%s" type="enum">' % enum.name)
+            for j in range(self.random.randint(2, 12)):
+                out.append('        <enum value="%d" name="%s_%s"/>' % (j, prefix, word(j).upper()))
+            out.append('    </enums>')
+
+        for bitmask in self.bitmasks:
+            prefix = bitmask.value_prefix()
+            out.append('    <enums name="%sFlagBits" type="bitmask">' % bitmask.name)
+            for j in range(self.random.randint(1, 8)):
+                out.append('        <enum bitpos="%d" name="%s_%s_BIT"/>' % (j, prefix, word(j).upper()))
+            out.append('    </enums>')
+
+    def write_commands(self, out):
+        structs_by_owner = {}
+        for struct in self.structs:
+            structs_by_owner.setdefault(struct.owner, []).append(struct.name)
+
+        out.append('    <commands>')
+        for command in self.commands:
+            out.append('        <command>')
+            out.append('            <proto><type>void</type> <name>%s</name></proto>' % command.name)
+            handle = self.random.choice(self.visible(self.handles, command.owner))
+            out.append('            <param><type>%s</type> <name>handle</name></param>' % handle.name)
+            for j in range(self.random.randint(0, 4)):
+                typ = self.member_type(command.owner, structs_by_owner)
+                out.append('            <param>const <type>%s</type>* <name>p%s</name></param>' % (typ, word(j)))
+            out.append('        </command>')
+        out.append('    </commands>')
+
+    def write_requires(self, out, owner):
+        for definitions in [self.handles, self.enums, self.structs]:
+            for definition in definitions:
+                if definition.owner == owner:
+                    out.append('                <type name="%s"/>' % definition.name)
+        for bitmask in self.bitmasks:
+            if bitmask.owner == owner:
+                out.append('                <type name="%sFlags"/>' % bitmask.name)
+        for command in self.commands:
+            if command.owner == owner:
+                out.append('                <command name="%s"/>' % command.name)
+
+    def write_features(self, out):
+        out.append('    <feature api="vulkan" name="VK_VERSION_1_0" number="1.0">')
+        out.append('        <require>')
+        self.write_requires(out, 0)
+        out.append('        </require>')
+        out.append('    </feature>')
+
+        core_enums = self.visible(self.enums, 0)
+        core_bitmasks = self.visible(self.bitmasks, 0)
+
+        out.append('    <extensions>')
+        for i in range(self.extension_count):
+            number = i + 1
+            name = 'synthetic_' + word(i).lower()
+            out.append('        <extension name="VK_EXT_%s" number="%d" supported="vulkan">' % (name, number))
+            out.append('            <require>')
+            out.append('                <enum value="1" name="VK_EXT_%s_SPEC_VERSION"/>' % name.upper())
+
+            # Extensions extend core enums with offsets and core bitmasks with bits that aren't used
+            # by the core definition, nor by the other extensions.
+            for j in range(2):
+                enum = core_enums[(2 * i + j) % len(core_enums)]
+                prefix = enum.value_prefix()
+                out.append('                <enum offset="%d" extends="%s" name="%s_%s_EXT"/>' % (j, enum.name, prefix, name.upper()))
+            bitmask = core_bitmasks[i % len(core_bitmasks)]
+            prefix = bitmask.value_prefix()
+            bit = 8 + i // len(core_bitmasks)
+            out.append('                <enum bitpos="%d" extends="%sFlagBits" name="%s_%s_BIT_EXT"/>' % (bit, bitmask.name, prefix, name.upper()))
+
+            self.write_requires(out, number)
+            out.append('            </require>')
+            out.append('        </extension>')
+        out.append('    </extensions>')
+
+    def write(self):
+        out = ['<?xml version="1.0" encoding="UTF-8"?>', '<registry>']
+        self.write_types(out)
+        self.write_enums(out)
+        self.write_commands(out)
+        self.write_features(out)
+        out.append('</registry>')
+        return '\n'.join(out) + '\n'
+
+def write_synthetic_registry(filename, counts, seed=0):
+    with open(filename, 'w') as f:
+        f.write(SyntheticRegistry(counts, seed).write())
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes a synthetic Vulkan registry.')
+    parser.add_argument('output', metavar='OUTPUT_XML', help='The file to write the registry to.')
+    parser.add_argument('-s', '--scale', default=1.0, type=float, help='The size of the registry compared to vk.xml.')
+    parser.add_argument('--seed', default=0, type=int, help='The seed of the random choices.')
+    for kind in sorted(BASE_COUNTS.keys()):
+        parser.add_argument('--' + kind, default=None, type=int, help='The number of %s, overrides the scale.' % kind)
+    args = parser.parse_args()
+
+    counts = counts_for_scale(args.scale)
+    for kind in BASE_COUNTS.keys():
+        if getattr(args, kind) != None:
+            counts[kind] = getattr(args, kind)
+
+    write_synthetic_registry(args.output, counts, args.seed)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
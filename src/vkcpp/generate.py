@@ -1,4 +1,4 @@
-#!/usr/bin/python
+#!/usr/bin/env python3
 
 # PrototypeRenderer Source Code
 # Copyright (c) 2014-2016, Daemon Developers
@@ -29,14 +29,29 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import sys
+
+# Modules like importlib.util and tracemalloc need Python 3.4, fail clearly with older versions.
+if sys.version_info < (3, 4):
+    sys.stderr.write('VkCPP generation needs Python 3.4 or later, not %d.%d.\n' % sys.version_info[:2])
+    sys.exit(1)
+
 import xml.etree.ElementTree
-import jinja2
 import re
 import argparse
+import gc
+import hashlib
+import importlib.util
+import json
+import multiprocessing
 import os
-import sys
+import pickle
 import shutil
-from collections import namedtuple, OrderedDict
+import tempfile
+import time
+import traceback
+import tracemalloc
+from collections import Counter, defaultdict, namedtuple, OrderedDict
 
 #TODO(kangz) do not lower the extensions vendor name and somehow keep ASTC_4x4 instead of ASTC_4X4
 
@@ -44,15 +59,19 @@ from collections import namedtuple, OrderedDict
 # other name formatting is possible. For example in vulkan.h enum values are in SNAKE_CASE
 # but in the generated code we want them to be in CamelCase.
 
+# The same names are split many times (every type is referenced by many members and params) so
+# the results are memoized. Splits are tuples so the memoized results can be shared.
+split_cache = {}
+
+# A new word starts with each uppercase letter that doesn't follow another uppercase letter.
+camelCase_word = re.compile('[A-Z]*[^A-Z]*')
+
 def split_camelCase(name, is_Camel=False):
     assert(len(name) > 0 and (is_Camel or name[0].islower()))
-    split = []
-    start = 0
-    for (i, char) in enumerate(name):
-        if i !=0 and char.isupper() and (i == 0 or not name[i - 1].isupper()):
-            split.append(name[start:i])
-            start = i
-    split.append(name[start:])
+    split = split_cache.get(name)
+    if split == None:
+        split = tuple(word for word in camelCase_word.findall(name) if word != '')
+        split_cache[name] = split
     return split
 
 def split_CamelCase(name):
@@ -62,13 +81,13 @@ def split_CamelCase(name):
 def split_SNAKE_CASE(name):
     # Can't assert on this because of ASTC_4x4
     # assert(name.isupper())
-    return name.split('_')[:]
+    return tuple(name.split('_'))
 
 def split_Typename(name):
     """Splits Vulkan typenames but not system typenames"""
     if name.startswith('Vk') or name.startswith('PFN_vk'):
         return split_CamelCase(name)
-    return [name]
+    return (name,)
 
 # In vulkan enums us regular C enums so the values are prefixed with a SNAKE_CASE version
 # of the enum type name. With scoped enums we don't want this so we factor out the type name
@@ -84,22 +103,46 @@ def factor_name(name, factorand):
     for i in range(len(factorand.chunks)):
         assert(name[i].lower() == factorand.chunks[i].lower())
 
-    rest = name[len(factorand.chunks):]
+    rest = tuple(name[len(factorand.chunks):])
 
     if factorand.vendor == '':
         return Name(rest)
     else:
-        return Name(rest + [factorand.vendor])
-
-class Name:
-    def __init__(self, chunks):
-        # TODO(kangz) gather the extension suffixes from the XML file instead
-        if chunks[-1].upper() in ('KHR', 'EXT', 'IMG'):
-            self.chunks = chunks[:-1]
-            self.vendor = chunks[-1].upper()
-        else:
-            self.chunks = chunks
-            self.vendor = ''
+        return Name(rest + (factorand.vendor,))
+
+# Names are immutable and interned: creating a Name that already exists returns the existing
+# object, so that the case conversions, computed on first use and cached in the object, are done
+# once per distinct name.
+class Name(object):
+    __slots__ = ('chunks', 'vendor', '_canonical_case', '_concatcase', '_camelCase', '_CamelCase',
+                 '_SNAKE_CASE', '_snake_case', '_Typename', '_nativeTypename', '_EnumCase')
+
+    interned = {}
+
+    def __new__(cls, chunks, vendor=None):
+        chunks = tuple(chunks)
+        if vendor == None:
+            # TODO(kangz) gather the extension suffixes from the XML file instead
+            if chunks[-1].upper() in ('KHR', 'EXT', 'IMG'):
+                vendor = chunks[-1].upper()
+                chunks = chunks[:-1]
+            else:
+                vendor = ''
+
+        key = (chunks, vendor)
+        name = Name.interned.get(key)
+        if name == None:
+            name = object.__new__(cls)
+            name.chunks = chunks
+            name.vendor = vendor
+            name._canonical_case = name._concatcase = name._camelCase = name._CamelCase = None
+            name._SNAKE_CASE = name._snake_case = name._Typename = name._nativeTypename = name._EnumCase = None
+            Name.interned[key] = name
+        return name
+
+    # Unpickled names go through __new__ so that they are interned too.
+    def __reduce__(self):
+        return (Name, (self.chunks, self.vendor))
 
     def fnptr_suffix(self):
         assert(self.is_vk())
@@ -113,57 +156,196 @@ class Name:
 
     def strip_vk(self, chunks):
         if chunks[0] in ('PFN_vk', 'VK', 'Vk', 'vk'):
-            return list(chunks[1:])
+            return chunks[1:]
         return chunks
 
     def CamelChunk(self, chunk, force_lower=False):
-        if chunk in ['1d', '2d', '3d']:
+        if chunk in ('1d', '2d', '3d'):
             return chunk.upper()
         if force_lower:
             return chunk[0].upper() + chunk[1:].lower()
         return chunk[0].upper() + chunk[1:]
 
     def canonical_case(self):
-        return ('_'.join(self.chunks) + self.vendor).lower()
+        if self._canonical_case == None:
+            self._canonical_case = ('_'.join(self.chunks) + self.vendor).lower()
+        return self._canonical_case
 
     def concatcase(self):
-        return ''.join(self.chunks) + self.vendor
+        if self._concatcase == None:
+            self._concatcase = ''.join(self.chunks) + self.vendor
+        return self._concatcase
 
     def camelCase(self):
-        chunks = self.strip_vk(self.chunks)
-        return chunks[0].lower() + ''.join(map(lambda chunk: self.CamelChunk(chunk), chunks[1:])) + self.vendor
+        if self._camelCase == None:
+            chunks = self.strip_vk(self.chunks)
+            self._camelCase = chunks[0].lower() + ''.join([self.CamelChunk(chunk) for chunk in chunks[1:]]) + self.vendor
+        return self._camelCase
 
     def CamelCase(self):
-        chunks = self.strip_vk(self.chunks)
-        return ''.join(map(lambda chunk: self.CamelChunk(chunk), chunks)) + self.vendor
+        if self._CamelCase == None:
+            chunks = self.strip_vk(self.chunks)
+            self._CamelCase = ''.join([self.CamelChunk(chunk) for chunk in chunks]) + self.vendor
+        return self._CamelCase
 
     def SNAKE_CASE(self):
-        chunks = self.strip_vk(self.chunks)
-        return '_'.join(map(lambda chunk: chunk.upper(), chunks)) + self.vendor
+        if self._SNAKE_CASE == None:
+            chunks = self.strip_vk(self.chunks)
+            self._SNAKE_CASE = '_'.join([chunk.upper() for chunk in chunks]) + self.vendor
+        return self._SNAKE_CASE
 
     def snake_case(self):
-        chunks = self.strip_vk(self.chunks)
-        return '_'.join(map(lambda chunk: chunk.lower(), chunks)) + self.vendor
+        if self._snake_case == None:
+            chunks = self.strip_vk(self.chunks)
+            self._snake_case = '_'.join([chunk.lower() for chunk in chunks]) + self.vendor
+        return self._snake_case
 
     def Typename(self):
-        if self.is_vk():
-            return self.CamelCase() + self.fnptr_suffix()
-        else:
-            return self.concatcase()
+        if self._Typename == None:
+            if self.is_vk():
+                self._Typename = self.CamelCase() + self.fnptr_suffix()
+            else:
+                self._Typename = self.concatcase()
+        return self._Typename
 
     def nativeTypename(self):
-        if self.is_vk():
-            return self.chunks[0] + self.CamelCase()
-        else:
-            return self.concatcase()
+        if self._nativeTypename == None:
+            if self.is_vk():
+                self._nativeTypename = self.chunks[0] + self.CamelCase()
+            else:
+                self._nativeTypename = self.concatcase()
+        return self._nativeTypename
 
     def EnumCase(self):
-        chunks = self.strip_vk(self.chunks)
-        result = ''.join(map(lambda chunk: self.CamelChunk(chunk, force_lower=True), chunks)) + self.vendor
-
-        if result[0].isdigit():
-            return 'e' + result
-        return result
+        if self._EnumCase == None:
+            chunks = self.strip_vk(self.chunks)
+            result = ''.join([self.CamelChunk(chunk, force_lower=True) for chunk in chunks]) + self.vendor
+
+            if result[0].isdigit():
+                result = 'e' + result
+            self._EnumCase = result
+        return self._EnumCase
+
+class RegistryParseError(Exception):
+    pass
+
+# Declarators, the C text around the type and the name of members and params, are split in tokens
+# in a single pass over their characters. This table gives the kind of token each character can
+# start, characters that are not in it are parse errors.
+DECLARATOR_CHARACTERS = {}
+for char in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_':
+    DECLARATOR_CHARACTERS[char] = 'word'
+for char in '0123456789':
+    DECLARATOR_CHARACTERS[char] = 'number'
+for char in '*[]:':
+    DECLARATOR_CHARACTERS[char] = char
+for char in ' \t\r\n':
+    DECLARATOR_CHARACTERS[char] = None
+
+# Keywords are tokens of their own, other words can only be the name of funcpointer params.
+DECLARATOR_KEYWORDS = {'const': 'const', 'struct': 'struct'}
+
+# Tokens are (kind, text) pairs and the shape of a declarator is its tokens with the names, types
+# and sizes replaced by their kind, which is what the grammar looks at. The same chunks of text
+# (mostly runs of spaces, "*" and "const") are between the elements of most declarators so their
+# tokens and shapes are memoized.
+declarator_token_cache = {}
+
+def tokenize_declarator_text(text, tokens, shape):
+    cached = declarator_token_cache.get(text)
+    if cached == None:
+        chunk_tokens = []
+        i = 0
+        length = len(text)
+        while i < length:
+            char = text[i]
+            if not char in DECLARATOR_CHARACTERS:
+                raise RegistryParseError('Unexpected character %r' % char)
+            kind = DECLARATOR_CHARACTERS[char]
+            if kind == None:
+                i += 1
+            elif kind == 'word' or kind == 'number':
+                start = i
+                i += 1
+                while i < length and DECLARATOR_CHARACTERS.get(text[i]) in ('word', 'number'):
+                    i += 1
+                word = text[start:i]
+                if kind == 'word':
+                    kind = DECLARATOR_KEYWORDS.get(word, 'word')
+                chunk_tokens.append((kind, word))
+            else:
+                chunk_tokens.append((kind, char))
+                i += 1
+        chunk_shape = tuple(value if kind == value else kind for (kind, value) in chunk_tokens)
+        cached = (tuple(chunk_tokens), chunk_shape)
+        declarator_token_cache[text] = cached
+    tokens.extend(cached[0])
+    shape.extend(cached[1])
+
+# The declarator grammar is a state machine: (state, token kind) -> (next state, where the token
+# goes). It accepts "[const] [struct] TYPE (* [const])* NAME ([SIZE])* [: WIDTH]" where SIZE is a
+# number or an <enum>, which covers pointers, fixed and multi-dimensional arrays and bitfields.
+DECLARATOR_TRANSITIONS = {
+    ('start', 'const'): ('start', 'prefix'),
+    ('start', 'struct'): ('start', 'prefix'),
+    ('start', 'type'): ('type', 'type'),
+    ('type', '*'): ('type', 'pointer'),
+    ('type', 'const'): ('type', 'pointer'),
+    ('type', 'name'): ('name', 'name'),
+    ('type', 'word'): ('name', 'name'),
+    ('name', '['): ('array', None),
+    ('array', 'number'): ('size', 'size'),
+    ('array', 'enum'): ('size', 'size'),
+    ('size', ']'): ('name', None),
+    ('name', ':'): ('bitfield', None),
+    ('bitfield', 'number'): ('end', 'bitfield'),
+}
+DECLARATOR_FINAL_STATES = ('name', 'end')
+
+# The annotations the templates know, for each (prefix, pointers, is an array) of a declarator.
+DECLARATOR_ANNOTATIONS = {
+    ((), (), False): '',
+    ((), ('*',), False): '*',
+    ((), ('*', '*'), False): '**',
+    (('const',), ('*',), False): 'const*',
+    (('const',), ('*', 'const', '*'), False): 'const*const*',
+    (('struct',), ('*',), False): 'struct*',
+    ((), (), True): '[]',
+    (('const',), (), True): 'const[]',
+}
+
+# Runs the state machine on the shape of a declarator and returns its annotation and the positions
+# of the type, the name, the array sizes and the bitfield width in the tokens. Registries only have
+# a handful of shapes so the results are memoized.
+declarator_shape_cache = {}
+
+def parse_declarator_shape(shape):
+    parsed = declarator_shape_cache.get(shape)
+    if parsed != None:
+        return parsed
+
+    state = 'start'
+    parts = {'prefix': [], 'type': [], 'pointer': [], 'name': [], 'size': [], 'bitfield': []}
+    for (position, token) in enumerate(shape):
+        transition = DECLARATOR_TRANSITIONS.get((state, token))
+        if transition == None:
+            raise RegistryParseError('Unexpected %r' % token)
+        (state, part) = transition
+        if part != None:
+            parts[part].append(position)
+    if not state in DECLARATOR_FINAL_STATES:
+        raise RegistryParseError('Incomplete declaration')
+
+    key = (tuple(shape[i] for i in parts['prefix']), tuple(shape[i] for i in parts['pointer']), len(parts['size']) != 0)
+    if not key in DECLARATOR_ANNOTATIONS:
+        raise RegistryParseError('Unsupported type modifiers')
+
+    bitfield = None
+    if len(parts['bitfield']) != 0:
+        bitfield = parts['bitfield'][0]
+    parsed = (DECLARATOR_ANNOTATIONS[key], parts['type'][0], parts['name'][0], tuple(parts['size']), bitfield)
+    declarator_shape_cache[shape] = parsed
+    return parsed
 
 # For structure definitions or function parameters we need to store both a type and a name
 # but we also need to get any modifiers to the type such as *, const*, being an array, etc.
@@ -175,86 +357,79 @@ class AnnotatedTypeAndName:
         self.annotation = ""
         self.integral_count = 0
         self.constant_count = []
+        # The sizes of the dimensions after the first one of multi-dimensional arrays, as
+        # integers or constant Names.
+        self.extra_dimensions = []
+        # The width of bitfield members, None for other members.
+        self.bitfield_width = None
+
+    def parse_declarator(self, tokens, shape):
+        (self.annotation, type_position, name_position, size_positions, bitfield_position) = parse_declarator_shape(tuple(shape))
+
+        self.typ = Name(split_Typename(tokens[type_position][1]))
+        self.name = Name(split_camelCase(tokens[name_position][1]))
+
+        if len(size_positions) != 0:
+            dimensions = []
+            for position in size_positions:
+                (kind, size) = tokens[position]
+                if kind == 'number':
+                    dimensions.append(int(size))
+                else:
+                    dimensions.append(Name(split_SNAKE_CASE(size)))
+            if isinstance(dimensions[0], int):
+                self.integral_count = dimensions[0]
+            else:
+                self.constant_count = dimensions[0]
+            self.extra_dimensions = dimensions[1:]
+
+        if bitfield_position != None:
+            self.bitfield_width = int(tokens[bitfield_position][1])
 
     def parse_regular_parameter(self, element):
         # Parameters or structure members are like the following:
         #     <param>STUFF<type>bar</type>STUFF<name>baz</name>STUFF</param>
         # With stuff containing C style type modifiers, and <param> being <memeber> for structures.
-        name_node = element.find('name')
-        type_node = element.find('type')
-
-        self.name = Name(split_camelCase(name_node.text))
-        self.typ = Name(split_Typename(type_node.text))
-
-        # To parse annotations we gather the text that is between child elements and match
-        # it against a list of known patterns. Note that arrays sized with Vulkan constant
-        # look like the following:
+        # Arrays sized with Vulkan constants look like the following:
         #     <param><type>bar</type><name>foo</name>[<enum>CONSTANT_NAME</enum>]</param>
-        def sanitize_annotation_chunk(chunk):
-            if chunk == None:
-                return ''
-            return chunk.replace(' ', '')
-
-        annotation = [sanitize_annotation_chunk(element.text)]
-        for child in element:
-            annotation.append(sanitize_annotation_chunk(child.tail))
-
-        def make_constant_array():
-            self.annotation = '[]'
-            self.constant_count = Name(split_SNAKE_CASE(element.find('enum').text))
-
-        def make_integral_array(count, const):
-            self.annotation = 'const[]' if const else '[]'
-            self.integral_count = count
-
-        possible_annotations = [
-            (['', '', ''], ''),
-            (['', '', '[', ']'], make_constant_array),
-            (['', '*', ''], '*'),
-            (['', '**', ''], '**'),
-            (['', '', '[2]'], lambda: make_integral_array(2, False)),
-            (['', '', '[3]'], lambda: make_integral_array(3, False)),
-            (['', '', '[4]'], lambda: make_integral_array(4, False)),
-            (['const', '*', ''], 'const*'),
-            (['const', '', '[4]'], lambda: make_integral_array(4, True)),
-            (['const', '*const*', ''], 'const*const*'),
-            (['struct', '*', ''], 'struct*'),
-        ]
-
-        found = False
-        for (annotation_type, annotate) in possible_annotations:
-            if annotation == annotation_type:
-                found = True
-                if isinstance(annotate, str):
-                    self.annotation = annotate
-                else:
-                    annotate()
-        assert(found)
+        # The text of the child elements are tokens of their own, except comments that are skipped.
+        tokens = []
+        shape = []
+        try:
+            if element.text != None:
+                tokenize_declarator_text(element.text, tokens, shape)
+            for child in element:
+                if child.tag != 'comment':
+                    tokens.append((child.tag, child.text))
+                    shape.append(child.tag)
+                if child.tail != None:
+                    tokenize_declarator_text(child.tail, tokens, shape)
+            self.parse_declarator(tokens, shape)
+        except RegistryParseError as e:
+            raise RegistryParseError('%s in the declaration %r' % (e, ''.join(element.itertext()).strip()))
 
     def parse_funcpointer(self, element, index):
         # Function pointer parameter definitions are very loosely structured, all we get
-        # is the name of the type in a <type> element, all the rest we have to guess.
+        # is the name of the type in a <type> element, the modifiers and the name are in the text
+        # around it, between the "(" or "," before and the "," or ")" after.
         assert(index >= 2 and element[index].tag == 'type')
         node = element[index]
-        self.typ = Name(split_Typename(node.text))
-
-        # Currently there are only 3 types of annotations for function pointer parameters:
-        # "", "*", "const*" so we can manually check which one it is. 
-        split_tail = list(filter(lambda chunk: len(chunk) > 0, node.tail.split(' ')))
-
-        if split_tail[0] == '*':
-            name_part = split_tail[1]
-
-            previous_node = element[index - 1]
-            previous_split = list(filter(lambda chunk: len(chunk) > 0, previous_node.tail.split(' ')))
-            if previous_split[-1] == 'const':
-                self.annotation = 'const*'
-            else:
-                self.annotation = '*'
-        else:
-            name_part = split_tail[0]
-
-        self.name = Name(split_camelCase(''.join(filter(lambda char: char.isalnum(), name_part))))
+        before = element[index - 1].tail
+        before = before[max(before.rfind('('), before.rfind(',')) + 1:]
+        after = node.tail
+        end = min(position for position in (after.find(','), after.find(')'), len(after)) if position >= 0)
+        declaration = before + node.text + after[:end]
+
+        tokens = []
+        shape = []
+        try:
+            tokenize_declarator_text(before, tokens, shape)
+            tokens.append(('type', node.text))
+            shape.append('type')
+            tokenize_declarator_text(after[:end], tokens, shape)
+            self.parse_declarator(tokens, shape)
+        except RegistryParseError as e:
+            raise RegistryParseError('%s in the declaration %r' % (e, declaration.strip()))
 
     def link(self, types):
         self.typ = types[self.typ.canonical_case()]
@@ -309,9 +484,7 @@ class EnumType(Type):
 
     def add_value(self, name, value):
         if self.factor:
-            vendor = name.vendor
-            name = factor_name(name.chunks, self.name)
-            name.vendor = vendor
+            name = Name(factor_name(name.chunks, self.name).chunks, name.vendor)
         self.values.append(EnumValue(name, value))
 
     def finalize(self):
@@ -344,18 +517,17 @@ class BitmaskType(Type):
         # Bitmask names always finish with FlagBits with an optional vendor suffix
         has_extension = False
         self.original_name = Name(self.name)
-        if len(self.name) >= 3 and self.name[-2:] == ['Flag', 'Bits']:
+        if len(self.name) >= 3 and self.name[-2:] == ('Flag', 'Bits'):
             self.name = self.name[:-2]
-        elif len(self.name) >= 4 and self.name[-3:-1] == ['Flag', 'Bits']:
+        elif len(self.name) >= 4 and self.name[-3:-1] == ('Flag', 'Bits'):
             has_extension = True
             self.name = self.name[:-3] + self.name[-1:]
-        self.factor_name = Name(self.name[:])
-        self.name = Name(self.name[:])
+        self.factor_name = Name(self.name)
         # In vk.xml bitmaks are defined in two parts:
         #     <type requires="VkFooFlagBits" category="bitmask">typdef<type>VkFlags</type><name>VkFooFlags</name></type>
         #     The Bitmask definition as VkFooFlagBits
         # Others parts of the definition refer to this type as VkFooFlags so we need to add "Flags" to the name
-        self.name.chunks.append('flags')
+        self.name = Name(self.factor_name.chunks + ('flags',), self.factor_name.vendor)
 
         for child in element:
             name = split_SNAKE_CASE(child.attrib['name'])
@@ -378,11 +550,8 @@ class BitmaskType(Type):
         self.values.sort(key=lambda value: value.value)
 
     def add_bit(self, name, bit):
-        vendor = name.vendor
-        name = name.chunks
-        assert(name[-1] == 'BIT')
-        name = factor_name(name[:-1], self.factor_name)
-        name.vendor = vendor
+        assert(name.chunks[-1] == 'BIT')
+        name = Name(factor_name(name.chunks[:-1], self.factor_name).chunks, name.vendor)
         self.bits.append(BitmaskBit(name, bit))
 
     def finalize(self):
@@ -395,7 +564,7 @@ class SystemType(Type):
         # System types are defined as follows:
         #     <type requires="header.h" name="foo"/>
         assert('name' in element.attrib and 'requires' in element.attrib)
-        self.name = Name([element.attrib['name']])
+        self.name = Name((element.attrib['name'],))
         self.header = element.attrib['requires']
 
 class BaseType(Type):
@@ -418,6 +587,18 @@ class HandleType(Type):
         self.name = Name(split_CamelCase(element.find('name').text))
         self.dispatchable = element.find('type').text == 'VK_DEFINE_HANDLE'
 
+        # The objects that handles are created from, there can be several: parent="foo,bar"
+        self.parents = []
+        if 'parent' in element.attrib:
+            self.parents = [Name(split_CamelCase(parent)) for parent in element.attrib['parent'].split(',')]
+
+    # Whether this is VkDevice or a handle created from it, such as VkQueue or VkCommandBuffer.
+    # The parents aren't linked as they aren't required by the handle, so they are looked up.
+    def is_device_child(self, types):
+        if self.name.CamelCase() == 'Device':
+            return True
+        return any(types[parent.canonical_case()].is_device_child(types) for parent in self.parents)
+
 class StructMember(AnnotatedTypeAndName):
     def __init__(self, element):
         AnnotatedTypeAndName.__init__(self)
@@ -455,8 +636,10 @@ class FunctionParam(AnnotatedTypeAndName):
 
         if element != None:
             self.optional = 'optional' in element.attrib and element.attrib['optional'] == 'true'
+            self.length = element.attrib.get('len')
         else:
             self.optional = False
+            self.length = None
 
 class FnptrType(Type):
     def __init__(self, element):
@@ -517,9 +700,96 @@ class Function:
         for param in self.params:
             param.link(types)
 
+        # Like the Vulkan loader, the level of a command depends on its first parameter: commands
+        # that don't take a dispatchable handle are global and can be loaded without an instance,
+        # those taking a VkDevice or one of its children are device commands that can be loaded with
+        # vkGetDeviceProcAddr, the others are instance commands.
+        self.dispatch = 'global'
+        if len(self.params) > 0:
+            first_type = self.params[0].typ
+            if isinstance(first_type, HandleType) and first_type.dispatchable:
+                if first_type.is_device_child(types):
+                    self.dispatch = 'device'
+                else:
+                    self.dispatch = 'instance'
+
+        self.find_enumerated_array()
+
+    # Commands like vkEnumeratePhysicalDevices return an array through their last parameter with
+    # its size in a uint32_t* parameter, they are called once to get the size and then to fill the
+    # array. For them the loaders get helpers that do both calls and fill a container.
+    def find_enumerated_array(self):
+        self.enumerated_count = None
+        self.enumerated_array = None
+        self.enumerate_inputs = []
+
+        if len(self.params) < 2:
+            return
+        array = self.params[-1]
+        if array.annotation != '*' or array.length == None or array.typ.name.canonical_case() == 'void':
+            return
+
+        for count in self.params[:-1]:
+            if count.name.camelCase() == array.length and count.annotation == '*' and count.typ.name.canonical_case() == 'uint32_t':
+                self.enumerated_count = count
+                self.enumerated_array = array
+                self.enumerate_inputs = [param for param in self.params if not param in (count, array)]
+
     def required_types(self):
         return [param.typ for param in self.params] + [self.return_type]
 
+MAIN_EXTENSION_FILENAME = 'Vulkan'
+
+class DependencyCycleError(Exception):
+    pass
+
+# Some Vulkan structures depend on the definition of other structures so we need to make sure
+# the definitions being depended on come first. Also we want the types to be in alphabetical
+# order as much as possible. This is Kahn's algorithm done in rounds: each round outputs, in
+# alphabetical order, the types whose dependencies were all output by the previous rounds. So types
+# are grouped by dependency depth and sorted alphabetically in each group, in
+# O(nTypes * log(nTypes) + nDependencies). Only dependencies between the types being sorted are
+# taken into account, and self-references (through pointers) are ignored. Types with the same name
+# are kept in the order they are given.
+def sort_types_topologically(to_sort):
+    to_sort = list(to_sort)
+
+    index_by_type = {}
+    for (i, typ) in enumerate(to_sort):
+        index_by_type[id(typ)] = i
+
+    dependents = [[] for _ in to_sort]
+    dependency_counts = [0] * len(to_sort)
+    for (i, typ) in enumerate(to_sort):
+        dependencies = set()
+        for required in typ.required_types():
+            j = index_by_type.get(id(required))
+            if j != None and j != i:
+                dependencies.add(j)
+        dependency_counts[i] = len(dependencies)
+        for j in dependencies:
+            dependents[j].append(i)
+
+    ready = [i for i in range(len(to_sort)) if dependency_counts[i] == 0]
+
+    sorted_types = []
+    while len(ready) != 0:
+        ready.sort(key=lambda i: (to_sort[i].name.canonical_case(), i))
+        next_ready = []
+        for i in ready:
+            sorted_types.append(to_sort[i])
+            for j in dependents[i]:
+                dependency_counts[j] -= 1
+                if dependency_counts[j] == 0:
+                    next_ready.append(j)
+        ready = next_ready
+
+    if len(sorted_types) != len(to_sort):
+        in_cycle = sorted(typ.name.Typename() for (i, typ) in enumerate(to_sort) if dependency_counts[i] != 0)
+        raise DependencyCycleError('Cyclic dependencies between the types ' + ', '.join(in_cycle))
+
+    return sorted_types
+
 ExtensionEnumValue = namedtuple('ExtensionEnumValue', ['name', 'extends', 'value'])
 class Extension:
     def __init__(self, element, main = False):
@@ -538,8 +808,8 @@ class Extension:
 
         self.name = Name(split_SNAKE_CASE(element.attrib['name']))
         if self.is_main:
-            self.filename = 'Vulkan'
-            self.name = Name(['Vulkan'])
+            self.filename = MAIN_EXTENSION_FILENAME
+            self.name = Name(('Vulkan',))
         else:
             self.filename = self.name.CamelCase()
 
@@ -551,6 +821,10 @@ class Extension:
         self.required_functions = []
         self.enum_values = []
         self.bitmask_bits = []
+        # Set by shake_extensions so that the consumers still find the device dispatch table and the
+        # headers included by the extension's header when all it had was shaken off.
+        self.keeps_device_dispatch = False
+        self.kept_required_extensions = []
 
         for require in element:
             assert(require.tag == 'require')
@@ -593,42 +867,49 @@ class Extension:
 
 
     def link(self, types, functions):
-        own_types = set()
-        own_functions = set()
-        required_extensions = set()
+        # Everything is collected in the order it is found in the registry, never in the order of
+        # a set of objects which depends on their addresses, so that the output is reproducible.
+        own_types = []
+        own_functions = []
+        required_extensions = OrderedDict()
 
         def add_types(types):
             for typ in types:
                 if typ.parent_extension != None:
-                    required_extensions.update((typ.parent_extension,))
+                    required_extensions[id(typ.parent_extension)] = typ.parent_extension
                 else:
                     typ.parent_extension = self
-                    own_types.update((typ,))
+                    own_types.append(typ)
                     add_types(typ.required_types())
 
         add_types([types[typename.canonical_case()] for typename in self.required_types])
 
         for function in [functions[name.canonical_case()] for name in self.required_functions]:
             if function.parent_extension != None:
-                required_extensions.update((function.parent_extension,))
+                required_extensions[id(function.parent_extension)] = function.parent_extension
             else:
                 function.parent_extension = self
-                own_functions.update((function,))
+                own_functions.append(function)
                 add_types(function.required_types())
 
-        if self in required_extensions:
-            required_extensions.remove(self)
+        for extension in self.kept_required_extensions:
+            required_extensions[id(extension)] = extension
 
-        #TODO(kangz) topo sort the types
-        self.required_types = list(own_types)
-        self.required_functions = sorted(list(own_functions), key = lambda function: function.name.canonical_case())
-        self.required_extensions = sorted(list(required_extensions), key = lambda extension: extension.name.canonical_case())
+        if id(self) in required_extensions:
+            del required_extensions[id(self)]
+
+        self.required_types = sort_types_topologically(own_types)
+        self.required_functions = sorted(own_functions, key = lambda function: function.name.canonical_case())
+        self.required_extensions = sorted(required_extensions.values(), key = lambda extension: extension.name.canonical_case())
 
         self.required_headers = set([typ.header for typ in self.required_types if isinstance(typ, SystemType)])
         for extension in self.required_extensions:
             self.required_headers.difference_update(extension.required_headers)
         self.required_headers = sorted(list(self.required_headers))
 
+    # Adds the values defined by the extension to the enums and bitmasks it extends. This doesn't
+    # need the extension to be linked, so it is done even for extensions that aren't generated.
+    def add_values(self, types):
         for value in self.enum_values:
             types[value.extends.canonical_case()].add_value(value.name, value.value)
 
@@ -636,20 +917,58 @@ class Extension:
             types[bit.extends.canonical_case()].add_bit(bit.name, bit.value)
 
 # A custom Jinja2 template loader that removes the extra indentation
-# of the template blocks so that the output is correctly indented
-class PreprocessingLoader(jinja2.BaseLoader):
-    def __init__(self, path):
+# of the template blocks so that the output is correctly indented.
+# It is used through a jinja2.FunctionLoader so that jinja2, which is slow to import, is only
+# imported when templates are actually rendered.
+# When given a cache directory the preprocessed sources are stored there, keyed by the hash of the
+# template source and of the generator that does the preprocessing, so that warm runs skip it.
+class PreprocessingLoader:
+    def __init__(self, path, cache_dir=None, generator_filename=None):
         self.path = path
+        self.cache_dir = cache_dir
+        self.generator_fingerprint = None
+
+        if cache_dir != None:
+            if generator_filename == None:
+                generator_filename = os.path.abspath(__file__)
+            with open(generator_filename, 'rb') as f:
+                self.generator_fingerprint = hashlib.sha256(f.read()).hexdigest()
 
-    def get_source(self, environment, template):
+    def get_source(self, template):
         path = os.path.join(self.path, template)
         if not os.path.exists(path):
-            raise jinja2.TemplateNotFound(template)
+            return None
         mtime = os.path.getmtime(path)
         with open(path) as f:
-            source = self.preprocess(f.read())
+            source = self.cached_preprocess(template, f.read())
         return source, path, lambda: mtime == os.path.getmtime(path)
 
+    def cached_preprocess(self, template, source):
+        if self.cache_dir == None:
+            return self.preprocess(source)
+
+        key = hashlib.sha256((self.generator_fingerprint + ':' + source).encode()).hexdigest()
+        prefix = 'preprocessed-' + template.replace(os.path.sep, '_') + '-'
+        cache_path = os.path.join(self.cache_dir, prefix + key + '.txt')
+
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return f.read()
+
+        result = self.preprocess(source)
+        write_file_atomically(cache_path, result)
+
+        # Remove the entries for previous versions of that template. The render workers of --jobs
+        # share the cache so another one may have removed an entry already.
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix) and filename.endswith('.txt') and filename != os.path.basename(cache_path):
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+
+        return result
+
     def preprocess(self, source):
         # Remove the trailing newline
         lines = source.split("\n")
@@ -688,73 +1007,174 @@ class PreprocessingLoader(jinja2.BaseLoader):
             lines.append(line)
         return '\n'.join(lines)
 
-def parse_vulkan_xml(filename):
-    constants = []
-    types = []
-    functions = []
-    main_api = None
-    extensions = []
+# Collects the model objects as the registry elements are read. It is fed either from the whole
+# DOM or from a stream of elements, and builds the same model in both cases.
+class RegistryReader:
+    def __init__(self):
+        self.constants = []
+        self.enum_types = []
+        self.other_types = []
+        self.functions = []
+        self.main_api = None
+        self.extensions = []
 
-    with open(filename) as xml_file:
-        root = xml.etree.ElementTree.parse(xml_file).getroot()
+        self.found_bitmask_names = set()
 
-    found_bitmask_names = set()
-    for enum in root.iter('enums'):
+    def add_enums(self, enum):
         # Some random constants are defined inside an enum, skip them.
         if enum.attrib['name'] == 'API Constants':
             for child in enum:
-                constants.append(Constant(child))
+                self.constants.append(Constant(child))
 
         elif enum.attrib['type'] == 'enum':
             # VkResult values are not namespaced in C Vulkan so we can't factor the enum name out
             factor = enum.attrib['name'] != 'VkResult'
-            types.append(EnumType(enum, factor))
+            self.enum_types.append(EnumType(enum, factor))
 
         elif enum.attrib['type'] == 'bitmask':
             bitmask = BitmaskType(enum)
-            types.append(bitmask)
-            found_bitmask_names.update((bitmask.name.canonical_case(),))
+            self.enum_types.append(bitmask)
+            self.found_bitmask_names.update((bitmask.name.canonical_case(),))
 
-    types_node = root.find('types')
-    for typ in types_node:
+    def add_type(self, typ):
         if typ.tag != 'type':
             pass
 
         elif not 'category' in typ.attrib:
-            types.append(SystemType(typ))
+            self.other_types.append(SystemType(typ))
 
         elif typ.attrib['category'] == 'basetype':
-            types.append(BaseType(typ))
+            self.other_types.append(BaseType(typ))
 
         elif typ.attrib['category'] == 'handle':
-            types.append(HandleType(typ))
+            self.other_types.append(HandleType(typ))
 
         elif typ.attrib['category'] == 'struct':
-            types.append(StructType(typ, False))
+            self.other_types.append(StructType(typ, False))
 
         elif typ.attrib['category'] == 'union':
-            types.append(StructType(typ, True))
+            self.other_types.append(StructType(typ, True))
 
         elif typ.attrib['category'] == 'funcpointer':
-            types.append(FnptrType(typ))
+            self.other_types.append(FnptrType(typ))
 
-        # Some empty bitmasks have a typedef but no enum definition
+        # Some empty bitmasks have a typedef but no enum definition, the ones that do have an
+        # enum definition are filtered out in finish() as the <enums> can come after the <types>.
         elif typ.attrib['category'] == 'bitmask' and not 'require' in typ.attrib:
-            bitmask = BitmaskType(typ)
-            if not bitmask.name.canonical_case() in found_bitmask_names:
-                types.append(BitmaskType(typ))
+            self.other_types.append(BitmaskType(typ))
 
-    for element in root.find('commands'):
+    def add_command(self, element):
         assert(element.tag == 'command')
-        functions.append(Function(element))
+        self.functions.append(Function(element))
+
+    def add_feature(self, element):
+        assert(self.main_api == None)
+        self.main_api = Extension(element, main=True)
+
+    def add_extension(self, element):
+        assert(element.tag == 'extension')
+        self.extensions.append(Extension(element, main=False))
+
+    def finish(self):
+        assert(self.main_api != None)
+
+        other_types = [typ for typ in self.other_types
+            if not (isinstance(typ, BitmaskType) and typ.name.canonical_case() in self.found_bitmask_names)]
+
+        return (self.enum_types + other_types, self.constants, self.functions, self.main_api, self.extensions)
+
+def read_registry_dom(filename):
+    reader = RegistryReader()
+
+    with open(filename) as xml_file:
+        root = xml.etree.ElementTree.parse(xml_file).getroot()
+
+    for enum in root.iter('enums'):
+        reader.add_enums(enum)
+
+    for typ in root.find('types'):
+        reader.add_type(typ)
+
+    for element in root.find('commands'):
+        reader.add_command(element)
 
     assert(len(root.findall('feature')) == 1)
-    main_api = Extension(root.find('feature'), main=True)
+    reader.add_feature(root.find('feature'))
 
     for extension in root.find('extensions'):
-        assert(extension.tag == 'extension')
-        extensions.append(Extension(extension, main=False))
+        reader.add_extension(extension)
+
+    return reader.finish()
+
+# Reads the registry with iterparse, handing each top-level definition to the reader as soon as
+# it is complete then dropping it, so that the XML tree is never fully in memory.
+def read_registry_streaming(filename):
+    reader = RegistryReader()
+
+    # Definitions that are direct children of the registry, and of the registry's sections.
+    toplevel_handlers = {
+        'enums': reader.add_enums,
+        'feature': reader.add_feature,
+    }
+    section_handlers = {
+        'types': reader.add_type,
+        'commands': reader.add_command,
+        'extensions': reader.add_extension,
+    }
+
+    ancestors = []
+    for (event, element) in xml.etree.ElementTree.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            ancestors.append(element)
+            continue
+
+        ancestors.pop()
+        if len(ancestors) == 1:
+            if element.tag in toplevel_handlers:
+                toplevel_handlers[element.tag](element)
+        elif len(ancestors) == 2 and ancestors[1].tag in section_handlers:
+            section_handlers[ancestors[1].tag](element)
+        else:
+            # Inside a definition, keep the element until the whole definition is read.
+            continue
+
+        # The definition has been consumed, remove it from its parent so it can be freed.
+        element.clear()
+        del ancestors[-1][:]
+
+    return reader.finish()
+
+# Links the types and functions required by the extensions, transitively. Types that aren't
+# needed by any of the extensions are left unlinked.
+def link_required(extensions, type_dict, function_dict):
+    linked = []
+    linked_ids = set()
 
+    to_link = []
+    for extension in extensions:
+        to_link += [type_dict[name.canonical_case()] for name in extension.required_types]
+        to_link += [function_dict[name.canonical_case()] for name in extension.required_functions]
+
+    while len(to_link) != 0:
+        thing = to_link.pop()
+        if id(thing) in linked_ids:
+            continue
+        linked_ids.add(id(thing))
+
+        thing.link(type_dict)
+        linked.append(thing)
+        to_link += thing.required_types()
+
+    return [thing for thing in linked if isinstance(thing, Type)]
+
+def read_registry(filename, streaming=True):
+    if streaming:
+        return read_registry_streaming(filename)
+    else:
+        return read_registry_dom(filename)
+
+# Returns the dictionaries used to link the registry and the extensions that can be generated.
+def index_registry(types, functions, main_api, extensions):
     type_dict = {}
     for typ in types:
         type_dict[typ.name.canonical_case()] = typ
@@ -769,23 +1189,327 @@ def parse_vulkan_xml(filename):
     for extension in extensions:
         extension_dict[extension.name.canonical_case()] = extension
 
-    for typ in types:
-        typ.link(type_dict)
-
-    for function in functions:
-        function.link(type_dict)
-
     interesting_extensions = [
         main_api,
     ] + [extension for extension in extension_dict.values() if extension.protect == '']
 
-    for extension in interesting_extensions:
+    return (type_dict, function_dict, interesting_extensions)
+
+# Only the chosen extensions and what they require are linked. They are linked in registry
+# order whatever the order of the list, so that the types are owned by the same extensions
+# as if all the extensions were linked (as long as the chosen extensions don't require
+# types from extensions that aren't chosen, in which case they can't be generated anyway).
+def extensions_to_link(chosen_extensions, interesting_extensions):
+    chosen_ids = set(id(extension) for extension in chosen_extensions)
+    return [extension for extension in interesting_extensions if id(extension) in chosen_ids]
+
+# The values that all the extensions add to enums are added, the same as when everything is linked.
+def link_extensions(to_link, interesting_extensions, linked_types, type_dict, function_dict):
+    for extension in to_link:
         extension.link(type_dict, function_dict)
 
-    for typ in types:
+    for extension in interesting_extensions:
+        extension.add_values(type_dict)
+
+    # Only the linked types can be generated, the others don't need to be finalized.
+    for typ in linked_types:
         typ.finalize()
 
-    return (types, constants, interesting_extensions)
+# The generated names of the types and commands that can be used: types by their name in namespace
+# vk, commands by their loader method and by their C name.
+def usage_lookup(linked_types, extensions, function_dict):
+    lookup = {}
+    for typ in linked_types:
+        lookup[typ.name.Typename()] = typ
+    for extension in extensions:
+        for name in extension.required_functions:
+            function = function_dict[name.canonical_case()]
+            lookup[function.name.CamelCase()] = function
+            lookup['vk' + function.name.CamelCase()] = function
+    return lookup
+
+# Keeps only the types and commands of the extensions that are reachable from the used names, with
+# the same walk over the required types as Extension.link. Names that aren't types or commands of
+# the extensions are ignored, they are often other identifiers found by scan_usage_sources. The
+# kept things are given to the extension that owns them when everything is linked, which isn't
+# always one listing them as some types are only reached through others.
+def shake_extensions(extensions, usage, linked_types, type_dict, function_dict):
+    lookup = usage_lookup(linked_types, extensions, function_dict)
+
+    owners = {}
+    for extension in extensions:
+        required_extensions = OrderedDict()
+        to_visit = [type_dict[name.canonical_case()] for name in extension.required_types]
+        to_visit += [function_dict[name.canonical_case()] for name in extension.required_functions]
+        while len(to_visit) != 0:
+            thing = to_visit.pop()
+            if id(thing) in owners:
+                if owners[id(thing)] is not extension:
+                    required_extensions[id(owners[id(thing)])] = owners[id(thing)]
+                continue
+            owners[id(thing)] = extension
+            to_visit += thing.required_types()
+        extension.kept_required_extensions = list(required_extensions.values())
+
+    # The device dispatch tables take a Device.
+    device_type = type_dict[Name(split_Typename('VkDevice')).canonical_case()]
+
+    reachable = []
+    reachable_ids = set()
+    to_visit = [lookup[name] for name in usage if name in lookup] + [device_type]
+    while len(to_visit) != 0:
+        thing = to_visit.pop()
+        if id(thing) in reachable_ids:
+            continue
+        reachable_ids.add(id(thing))
+        reachable.append(thing)
+        to_visit += thing.required_types()
+
+    for extension in extensions:
+        functions = [function_dict[name.canonical_case()] for name in extension.required_functions]
+        had_device_functions = any(function.dispatch == 'device' for function in functions)
+
+        owned = [thing for thing in reachable if owners.get(id(thing)) is extension]
+        extension.required_types = [thing.name for thing in owned if isinstance(thing, Type)]
+        extension.required_functions = [thing.name for thing in owned if isinstance(thing, Function)]
+        extension.keeps_device_dispatch = had_device_functions and not any(thing.dispatch == 'device' for thing in owned if isinstance(thing, Function))
+
+# With usage, a list of names used by the consumers of the generated code, only what they need is
+# generated, see shake_extensions.
+def parse_vulkan_xml(filename, extension_names=None, streaming=True, profiler=None, usage=None):
+    if profiler == None:
+        profiler = Profiler(enabled=False)
+
+    (types, constants, functions, main_api, extensions) = profiler.run('parse', lambda: read_registry(filename, streaming))
+    (type_dict, function_dict, interesting_extensions) = index_registry(types, functions, main_api, extensions)
+
+    def choose():
+        chosen_extensions = interesting_extensions
+        if extension_names != None:
+            chosen_extensions = choose_extensions(extension_names, interesting_extensions)
+        return (chosen_extensions, extensions_to_link(chosen_extensions, interesting_extensions))
+    (chosen_extensions, to_link) = profiler.run('choose_extensions', choose)
+
+    def link():
+        linked_types = link_required(to_link, type_dict, function_dict)
+        if usage != None:
+            shake_extensions(to_link, usage, linked_types, type_dict, function_dict)
+        link_extensions(to_link, interesting_extensions, linked_types, type_dict, function_dict)
+        return linked_types
+    linked_types = profiler.run('link', link)
+
+    return (linked_types, constants, chosen_extensions)
+
+# Writes to a temporary file in the same directory and renames it over the target so that other
+# processes (concurrent generator runs, parallel builds) never see a partially written file.
+def write_file_atomically(path, content, binary=False):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    # mkstemp creates files only readable by the user, give them the permissions open() would.
+    umask = os.umask(0)
+    os.umask(umask)
+
+    (fd, temp_path) = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+# Leaves the file untouched if it already has the right content so that its mtime doesn't change
+# and the build system doesn't recompile everything that depends on it. Returns whether the file
+# was written.
+def write_if_changed(path, content):
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+
+    write_file_atomically(path, content)
+    return True
+
+# Parsing and linking vk.xml is the most expensive part of the generator, and CMake runs the
+# generator several times per configure, so the linked model is pickled to an on-disk cache.
+# The cache key covers everything the model depends on: the content of vk.xml, of the extension
+# list and of this script, the usage list if any, as well as the Python version since pickles
+# aren't portable across versions. Pickles also refer to the classes by module, which is __main__
+# when running the script and generate when importing it, so the module name is part of the key
+# too: a pickle of the other module would load a second copy of the classes.
+def registry_cache_key(xml_filename, extensions_filename, usage=None, generator_filename=None):
+    if generator_filename == None:
+        generator_filename = os.path.abspath(__file__)
+
+    key = hashlib.sha256()
+    key.update(('python-%d.%d;pickle-%d' % (sys.version_info[0], sys.version_info[1], pickle.HIGHEST_PROTOCOL)).encode())
+    key.update(('module-%s;' % __name__).encode())
+
+    for filename in (generator_filename, xml_filename, extensions_filename):
+        if filename == None:
+            key.update(b'<none>')
+            continue
+        with open(filename, 'rb') as f:
+            content = f.read()
+        key.update(('%s:%d:' % (os.path.basename(filename), len(content))).encode())
+        key.update(content)
+
+    if usage != None:
+        key.update(('usage:' + ' '.join(usage)).encode())
+
+    return key.hexdigest()
+
+def pickle_registry(registry):
+    # The model is a deeply nested graph of objects so pickling it recurses a lot.
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 20000))
+    try:
+        return pickle.dumps(registry, pickle.HIGHEST_PROTOCOL)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+class RegistryCache:
+    prefix = 'registry-'
+    suffix = '.pickle'
+    # Several keys are used alternately with the same cache dir, for example by --batch which
+    # parses all the extensions and a normal generation, so the most recently used entries are kept.
+    max_entries = 4
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, key):
+        return os.path.join(self.directory, self.prefix + key + self.suffix)
+
+    def load(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+
+        # Any failure to read the cache (truncated file, pickle from an incompatible version of
+        # the classes, ...) is treated as a cache miss, the model will be parsed again and the
+        # entry replaced.
+        try:
+            with open(path, 'rb') as f:
+                (stored_key, registry) = pickle.load(f)
+        except Exception:
+            return None
+
+        if stored_key != key:
+            return None
+
+        # Mark the entry as recently used, another generation might have removed it meanwhile.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return registry
+
+    def store(self, key, registry):
+        data = pickle_registry((key, registry))
+        write_file_atomically(self.path_for(key), data, binary=True)
+
+        # Remove the least recently used entries.
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.startswith(self.prefix) and filename.endswith(self.suffix):
+                path = os.path.join(self.directory, filename)
+                entries.append((os.path.getmtime(path), path))
+        entries.sort(reverse=True)
+        for (_, path) in entries[self.max_entries:]:
+            if path != self.path_for(key):
+                os.remove(path)
+
+def load_vulkan_registry(xml_filename, extensions_filename, cache_dir, profiler=None, usage=None):
+    if profiler == None:
+        profiler = Profiler(enabled=False)
+
+    extension_names = None
+    if extensions_filename != None:
+        extension_names = read_extension_list(extensions_filename)
+
+    if cache_dir == None:
+        return parse_vulkan_xml(xml_filename, extension_names, profiler=profiler, usage=usage)
+
+    cache = RegistryCache(cache_dir)
+    key = registry_cache_key(xml_filename, extensions_filename, usage)
+
+    registry = profiler.run('load_cache', lambda: cache.load(key))
+    if registry == None:
+        registry = parse_vulkan_xml(xml_filename, extension_names, profiler=profiler, usage=usage)
+        profiler.run('store_cache', lambda: cache.store(key, registry))
+    return registry
+
+# The 32 bit FNV-1a hash of the name with the seed as offset basis, followed by the MurmurHash3
+# finalizer because the last characters of FNV-1a barely change the low bits that the tables use.
+# FunctionLoader::HashFunctionName in FunctionLoader.h must compute the same thing.
+def function_name_hash(seed, name):
+    if seed == 0:
+        seed = 0x811c9dc5
+    for char in name.encode():
+        seed = ((seed ^ char) * 0x01000193) & 0xffffffff
+
+    seed ^= seed >> 16
+    seed = (seed * 0x85ebca6b) & 0xffffffff
+    seed ^= seed >> 13
+    seed = (seed * 0xc2b2ae35) & 0xffffffff
+    seed ^= seed >> 16
+    return seed
+
+class PerfectHashError(Exception):
+    pass
+
+# Builds a minimal perfect hash of the names with the "hash, displace" method: the names are put
+# in buckets with the seed 0 and each bucket then gets a displacement, either a seed that puts all
+# of its names in free slots, or for buckets of a single name, the free slot itself encoded as
+# -slot - 1. Returns the displacements and the names in their slots, see perfect_hash_slot.
+def build_perfect_hash(names, max_seed=100000):
+    size = len(names)
+    if len(set(names)) != size:
+        raise PerfectHashError('Cannot hash duplicate names')
+
+    buckets = [[] for _ in range(size)]
+    for name in names:
+        buckets[function_name_hash(0, name) % size].append(name)
+
+    displacements = [0] * size
+    slots = [None] * size
+
+    # Place the largest buckets first while there are many free slots.
+    order = sorted(range(size), key=lambda bucket: (-len(buckets[bucket]), bucket))
+    for bucket in order:
+        if len(buckets[bucket]) <= 1:
+            break
+
+        for seed in range(1, max_seed):
+            candidates = [function_name_hash(seed, name) % size for name in buckets[bucket]]
+            if len(set(candidates)) == len(candidates) and all(slots[slot] == None for slot in candidates):
+                break
+        else:
+            raise PerfectHashError('No seed found for the bucket of ' + ', '.join(buckets[bucket]))
+
+        displacements[bucket] = seed
+        for (name, slot) in zip(buckets[bucket], candidates):
+            slots[slot] = name
+
+    free_slots = [slot for slot in range(size) if slots[slot] == None]
+    for bucket in order:
+        if len(buckets[bucket]) == 1:
+            slot = free_slots.pop()
+            displacements[bucket] = -slot - 1
+            slots[slot] = buckets[bucket][0]
+
+    return (displacements, slots)
+
+# The slot where the name would be, the caller has to check that it is the name in the slot.
+def perfect_hash_slot(displacements, name):
+    displacement = displacements[function_name_hash(0, name) % len(displacements)]
+    if displacement < 0:
+        return -displacement - 1
+    return function_name_hash(displacement, name) % len(displacements)
 
 #TODO(kangz)
 # - Output
@@ -796,44 +1520,37 @@ def parse_vulkan_xml(filename):
 #   - Do not require any patching of vk.xml
 #   - Handle extensions with a protect attribute
 
+# The table used by the loader's GetFunction to find its functions by name, returns the
+# displacements and the (name, function) pairs in their slots.
+def function_hash_table(extension):
+    functions_by_name = {}
+    for function in extension.required_functions:
+        functions_by_name['vk' + function.name.CamelCase()] = function
+    (displacements, slots) = build_perfect_hash(sorted(functions_by_name.keys()))
+    return (displacements, [(name, functions_by_name[name]) for name in slots])
+
+# The table used by LoaderManager::GetLoadedFunction to find a function of any of the loaders with
+# a single lookup instead of one per loader. Its entries are the (name, extension, slot) of each
+# function in its slot, with the index of the function's extension in the generated ones and the
+# slot of the function in the table of that extension's loader.
+def loaded_function_table(extensions):
+    entries_by_name = {}
+    for (index, extension) in enumerate(extensions):
+        (_, slots) = function_hash_table(extension)
+        for (slot, (name, function)) in enumerate(slots):
+            entries_by_name[name] = (name, index, slot)
+    (displacements, slots) = build_perfect_hash(sorted(entries_by_name.keys()))
+
+    return {
+        'loaded_function_extensions': [extension.filename for extension in extensions],
+        'loaded_function_displacements': displacements,
+        'loaded_function_entries': [entries_by_name[name] for name in slots],
+    }
+
 def extension_template_args(types, constants, extension):
     def sort_by_name(things):
         return sorted(things, key=lambda thing: thing.name.canonical_case())
 
-    # Some Vulkan structures depend oni the definition of other structure so we
-    # need to make sure the definitions being depended on come first. Also we want
-    # the structure to be in alphabetical order as much as possible.
-    # Ideally we would have a stable topological sort do that for us, but such sorts
-    # are very complex (but if you know of one, please change this implementation).
-    # Instead we output the types with 0 dependencies, sorted, then update the
-    # dependencies and start over again. It is a good and easy approximation.
-    # Worst case complexity is, O(depth * nTypes * meanRequiredTypes) plus the alphabetical
-    # sort but in practice depth and meanRequiredTypes are small.
-    def sort_types(to_sort):
-        sorted_types = []
-
-        to_sort_dict = {}
-        for typ in to_sort:
-            to_sort_dict[typ.name.canonical_case()] = typ
-
-        while len(to_sort_dict) != 0:
-            types_to_add = []
-            for typ in to_sort_dict.values():
-                can_add = True
-                for required in typ.required_types():
-                    if required.name.canonical_case() in to_sort_dict:
-                        can_add = False
-                        break
-                if can_add:
-                    types_to_add.append(typ)
-
-            for typ in types_to_add:
-                del to_sort_dict[typ.name.canonical_case()]
-
-            sorted_types += sort_by_name(types_to_add)
-
-        return sorted_types
-
     params = {
         'extension': extension,
         'system_types': sort_by_name(filter(lambda typ: isinstance(typ, SystemType), extension.required_types)),
@@ -841,32 +1558,36 @@ def extension_template_args(types, constants, extension):
         'bitmask_types': sort_by_name(filter(lambda typ: isinstance(typ, BitmaskType), extension.required_types)),
         'enum_types': sort_by_name(filter(lambda typ: isinstance(typ, EnumType), extension.required_types)),
         'handle_types': sort_by_name(filter(lambda typ: isinstance(typ, HandleType), extension.required_types)),
-        'struct_types': sort_types(filter(lambda typ: isinstance(typ, StructType), extension.required_types)),
+        'struct_types': sort_types_topologically(filter(lambda typ: isinstance(typ, StructType), extension.required_types)),
         'fnptr_types': sort_by_name(filter(lambda typ: isinstance(typ, FnptrType), extension.required_types)),
         'functions': sort_by_name(extension.required_functions),
+        'device_functions': sort_by_name(filter(lambda function: function.dispatch == 'device', extension.required_functions)),
         'required_extensions': sort_by_name(extension.required_extensions),
         'required_headers': sorted(extension.required_headers),
     }
 
+    (displacements, slots) = function_hash_table(extension)
+    params['function_hash_displacements'] = displacements
+    params['function_hash_slots'] = slots
+
+    params['device_dispatch'] = len(params['device_functions']) != 0 or extension.keeps_device_dispatch
+
     if extension.is_main:
         params['constants'] = sort_by_name(constants)
 
     return params
 
-def choose_extensions(args, extensions):
-    if args.extensions == None:
-        return extensions
+def read_extension_list(filename):
+    with open(filename) as f:
+        return [name.strip() for name in f.readlines()]
 
+def choose_extensions(names, extensions):
     extension_dict = {}
     for extension in extensions:
         extension_dict[extension.name.CamelCase()] = extension
 
     result = []
-    with open(args.extensions) as f:
-        arg_extensions = f.readlines()
-
-    for name in arg_extensions:
-        name = name.strip()
+    for name in names:
         if not name in extension_dict:
             print('"' + name + '" is not the name of an extension.')
             return []
@@ -874,6 +1595,747 @@ def choose_extensions(args, extensions):
 
     return result
 
+# Generate a list of files to create, params_dicts will get squashed to create the template parameters
+FileToRender = namedtuple('FileToRender', ['template', 'output', 'params_dicts'])
+
+# The (template, output) pairs for an extension only depend on its filename so that the outputs
+# can be listed without parsing the registry. With unity_file the sources are rendered in it
+# instead, together with the sources of other extensions, and the checks in its Checks variant.
+def extension_outputs(filename, is_main, unity_file=None):
+    template_prefix = ''
+    if is_main:
+        template_prefix = 'Main'
+
+    checks_output = filename + 'Checks.cpp'
+    loader_output = filename + '.cpp'
+    if unity_file != None:
+        checks_output = unity_file + 'Checks.cpp'
+        loader_output = unity_file + '.cpp'
+
+    return [
+        ('ExtensionFwd.h', filename + 'Fwd.h'),
+        (template_prefix + 'Extension.h', filename + '.h'),
+        ('ExtensionChecks.cpp', checks_output),
+        ('Extension.cpp', loader_output),
+    ]
+
+# The base name of the unity files of the index-th of count extensions when the sources are
+# combined in unity files, consecutive extensions go in the same files.
+def unity_file_for(index, count, unity):
+    if unity <= 0:
+        return None
+    return 'VkCppUnity%d' % (index * min(unity, count) // count)
+
+# With call_profiling the wrappers also record their calls in vk::CallProfiler. With lazy_loading
+# the wrappers look up their function on the first call when the LoaderManager loads lazily,
+# otherwise they only load the pointer. The loader source of the main extension also gets the
+# loaded_function_table of all the extensions.
+def compute_files_to_render(types, constants, extensions, output_dir, unity=0, call_profiling=False, lazy_loading=False):
+    to_render = []
+
+    for (index, extension) in enumerate(extensions):
+        params = [extension_template_args(types, constants, extension), {'call_profiling': call_profiling, 'lazy_loading': lazy_loading}]
+        unity_file = unity_file_for(index, len(extensions), unity)
+        for (template, output) in extension_outputs(extension.filename, extension.is_main, unity_file):
+            if template == 'Extension.cpp' and extension.is_main:
+                to_render.append(FileToRender(template, os.path.join(output_dir, output), params + [loaded_function_table(extensions)]))
+            else:
+                to_render.append(FileToRender(template, os.path.join(output_dir, output), params))
+
+    return to_render
+
+# Templates referenced by another template through import, extends, include or from.
+template_reference = re.compile(r'''{%-?\s*(?:import|extends|include|from)\s+['"]([^'"]+)['"]''')
+
+def template_dependencies(template_dir, templates):
+    dependencies = set()
+    to_visit = list(templates)
+    while len(to_visit) != 0:
+        template = to_visit.pop()
+        if template in dependencies:
+            continue
+        dependencies.add(template)
+
+        with open(os.path.join(template_dir, template)) as f:
+            to_visit += template_reference.findall(f.read())
+
+    return sorted(dependencies)
+
+# Each output is fingerprinted with the exact inputs of its renders: the content of this script,
+# of the template and of the templates it references, and a description of the template
+# parameters. Outputs whose fingerprint didn't change since the last generation are not rendered
+# again.
+
+# Appends a canonical description of a template parameter to parts. Types, functions and
+# extensions are described fully at the top of a parameter, elsewhere only their name is used:
+# the templates only use the name of the objects they reference, and it keeps a change in an
+# extension from changing the fingerprint of the extensions using it.
+def describe_template_param(value, parts, top=True):
+    if isinstance(value, Name):
+        parts.append('Name%r' % ((value.chunks, value.vendor),))
+    elif isinstance(value, (list, tuple)):
+        parts.append('[')
+        for element in value:
+            describe_template_param(element, parts, top)
+        parts.append(']')
+    elif isinstance(value, (set, frozenset)):
+        elements = []
+        for element in value:
+            element_parts = []
+            describe_template_param(element, element_parts, top)
+            elements.append(''.join(element_parts))
+        parts.append('{%s}' % ','.join(sorted(elements)))
+    elif isinstance(value, dict):
+        parts.append('{')
+        for key in sorted(value.keys()):
+            parts.append(repr(key) + ':')
+            describe_template_param(value[key], parts, top)
+        parts.append('}')
+    elif isinstance(value, (Type, Function, Extension)) and not top:
+        parts.append('%s(%s)' % (type(value).__name__, value.name.canonical_case()))
+    elif hasattr(value, '__dict__'):
+        parts.append(type(value).__name__ + '(')
+        for key in sorted(vars(value).keys()):
+            parts.append(key + '=')
+            describe_template_param(getattr(value, key), parts, False)
+        parts.append(')')
+    else:
+        parts.append(repr(value))
+
+class RenderFingerprints:
+    def __init__(self, template_dir, generator_filename=None):
+        self.template_dir = template_dir
+        self.template_fingerprints = {}
+        self.params_fingerprints = {}
+
+        # Changing how the model is built or how the templates are called changes the outputs too.
+        if generator_filename == None:
+            generator_filename = os.path.abspath(__file__)
+        with open(generator_filename, 'rb') as f:
+            self.generator_fingerprint = hashlib.sha256(f.read()).hexdigest()
+
+    def template_fingerprint(self, template):
+        if not template in self.template_fingerprints:
+            fingerprint = hashlib.sha256()
+            for dependency in template_dependencies(self.template_dir, [template]):
+                with open(os.path.join(self.template_dir, dependency), 'rb') as f:
+                    content = f.read()
+                fingerprint.update(('%s:%d:' % (dependency, len(content))).encode())
+                fingerprint.update(content)
+            self.template_fingerprints[template] = fingerprint.hexdigest()
+        return self.template_fingerprints[template]
+
+    # The renders of an extension share their parameters so they are only described once.
+    def params_fingerprint(self, params_dicts):
+        key = tuple(id(params) for params in params_dicts)
+        if not key in self.params_fingerprints:
+            parts = []
+            for params in params_dicts:
+                describe_template_param(params, parts)
+            self.params_fingerprints[key] = hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+        return self.params_fingerprints[key]
+
+    # The fingerprint of each output of to_render, made of the fingerprints of all its renders.
+    def output_fingerprints(self, to_render):
+        fingerprints = OrderedDict()
+        for render in to_render:
+            if not render.output in fingerprints:
+                fingerprints[render.output] = hashlib.sha256(self.generator_fingerprint.encode())
+            fingerprint = fingerprints[render.output]
+            fingerprint.update(self.template_fingerprint(render.template).encode())
+            fingerprint.update(self.params_fingerprint(render.params_dicts).encode())
+
+        return OrderedDict((output, fingerprint.hexdigest()) for (output, fingerprint) in fingerprints.items())
+
+# The manifest of the fingerprints of the outputs of an output dir. --batch targets can share a cache
+# dir so each output dir has its own manifest.
+def fingerprint_manifest_path(cache_dir, output_dir):
+    key = hashlib.sha256(os.path.abspath(output_dir).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, 'fingerprints-%s.json' % key)
+
+# The size and modification time of an output, recorded with its fingerprint so that an output
+# written by something else than the generation that recorded it, such as an edit or a generation
+# with another cache dir, is rendered again.
+def output_state(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+# The fingerprints and states of the outputs when they were last written, by path relative to the
+# output dir.
+def read_fingerprint_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except ValueError:
+        return {}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('outputs'), dict):
+        return {}
+    return manifest['outputs']
+
+def write_fingerprint_manifest(path, output_dir, fingerprints):
+    outputs = OrderedDict()
+    for (output, fingerprint) in fingerprints.items():
+        outputs[os.path.relpath(output, output_dir)] = OrderedDict([('fingerprint', fingerprint), ('state', output_state(output))])
+    manifest = OrderedDict([('outputs', outputs)])
+    write_file_atomically(path, json.dumps(manifest, indent=4, sort_keys=True) + '\n')
+
+# Records the fingerprints of the outputs of to_render once they are written, for the generations
+# that don't check them first (--watch and --batch) so that the next generation doesn't compare
+# against the fingerprints of older outputs.
+def update_fingerprint_manifest(cache_dir, template_dir, output_dir, to_render):
+    fingerprints = RenderFingerprints(template_dir).output_fingerprints(to_render)
+    write_fingerprint_manifest(fingerprint_manifest_path(cache_dir, output_dir), output_dir, fingerprints)
+
+# Returns the indices of the renders of outputs that are missing, whose fingerprint changed or that
+# were written since the manifest was.
+def renders_to_update(to_render, output_dir, fingerprints, previous_outputs):
+    indices = []
+    for (index, render) in enumerate(to_render):
+        previous = previous_outputs.get(os.path.relpath(render.output, output_dir))
+        state = output_state(render.output)
+        if (state == None or not isinstance(previous, dict) or previous.get('fingerprint') != fingerprints[render.output]
+                or previous.get('state') != state):
+            indices.append(index)
+    return indices
+
+# The sources of the VkCPP library, always scanned when generating with a usage list so that the
+# library itself keeps compiling.
+VKCPP_LIBRARY_SOURCES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'include'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'),
+]
+USAGE_SOURCE_SUFFIXES = ('.h', '.hpp', '.inl', '.c', '.cc', '.cpp')
+
+# The source files in the paths, directories are searched recursively.
+def usage_source_files(paths):
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for (directory, subdirectories, filenames) in os.walk(path):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(USAGE_SOURCE_SUFFIXES):
+                    files.append(os.path.join(directory, filename))
+    return files
+
+identifier = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Every identifier of the sources is taken, not only those after vk:: or in method calls, so that
+# the names used inside namespace vk or through a using declaration are found too. The identifiers
+# that aren't Vulkan names only cost the time to look them up.
+def scan_usage_sources(paths):
+    usage = set()
+    for filename in usage_source_files(paths):
+        with open(filename) as f:
+            usage.update(identifier.findall(f.read()))
+    return usage
+
+# A usage list has a name per line, like "InstanceCreateInfo", "vk::SurfaceKHR", "CreateInstance"
+# or "vkCreateInstance", and comments starting with #.
+def read_usage_list(filename):
+    usage = set()
+    with open(filename) as f:
+        for line in f.readlines():
+            name = line.split('#')[0].strip()
+            if name.startswith('vk::'):
+                name = name[len('vk::'):]
+            if name != '':
+                usage.add(name)
+    return usage
+
+# Returns the sorted list of names used by the consumers according to the --usage and
+# --usage-sources options, or None when the whole API is generated.
+def read_usage(args):
+    if args.usage == None and args.usage_sources == None:
+        return None
+
+    usage = scan_usage_sources(VKCPP_LIBRARY_SOURCES + (args.usage_sources or []))
+    if args.usage != None:
+        usage.update(read_usage_list(args.usage))
+    return sorted(usage)
+
+# The files the usage is read from.
+def usage_dependencies(args):
+    if args.usage == None and args.usage_sources == None:
+        return []
+
+    dependencies = usage_source_files(VKCPP_LIBRARY_SOURCES + (args.usage_sources or []))
+    if args.usage != None:
+        dependencies.append(args.usage)
+    return [os.path.abspath(dependency) for dependency in dependencies]
+
+# Computes the dependencies and outputs of the generation for the build system. The outputs only
+# depend on the extension list, so when there is one neither the registry is parsed nor jinja2
+# imported.
+def compute_manifest(args, cache_dir):
+    if args.extensions != None:
+        filenames = read_extension_list(args.extensions)
+    else:
+        (types, constants, extensions) = load_vulkan_registry(args.xml[0], args.extensions, cache_dir, usage=read_usage(args))
+        filenames = [extension.filename for extension in extensions]
+
+    templates = set()
+    outputs = set()
+    for (index, filename) in enumerate(filenames):
+        unity_file = unity_file_for(index, len(filenames), args.unity)
+        for (template, output) in extension_outputs(filename, filename == MAIN_EXTENSION_FILENAME, unity_file):
+            templates.add(template)
+            outputs.add(os.path.join(args.output_dir, output))
+
+    dependencies = [os.path.abspath(__file__), os.path.abspath(args.xml[0])]
+    if args.extensions != None:
+        dependencies.append(os.path.abspath(args.extensions))
+    for template in template_dependencies(args.template_dir, templates):
+        dependencies.append(os.path.join(args.template_dir, template))
+    dependencies += usage_dependencies(args)
+
+    return (sorted(dependencies), sorted(outputs))
+
+# The sources that only check the layout of the types against vulkan.h, they don't need to be part of
+# the library and can be compiled separately.
+def is_layout_check_source(output):
+    return output.endswith('Checks.cpp')
+
+def format_manifest(manifest_format, dependencies, outputs):
+    if manifest_format == 'cmake':
+        checks = [output for output in outputs if is_layout_check_source(output)]
+        return (
+            'set(VKCPP_DEPENDENCIES "' + ';'.join(dependencies) + '")\n' +
+            'set(VKCPP_OUTPUTS "' + ';'.join(outputs) + '")\n' +
+            'set(VKCPP_CHECK_SOURCES "' + ';'.join(checks) + '")\n'
+        )
+
+    assert(manifest_format == 'depfile')
+    def escape(path):
+        return path.replace('\\', '/').replace(' ', '\\ ')
+    return ' '.join(map(escape, outputs)) + ': ' + ' '.join(map(escape, dependencies)) + '\n'
+
+# Checks jinja2 is installed without paying for its import.
+def jinja2_available():
+    return importlib.util.find_spec('jinja2') != None
+
+# With a cache directory, both the preprocessed template sources and the Python code Jinja
+# compiles them to are persisted there, so a warm run doesn't compile any template.
+def create_environment(template_dir, cache_dir=None, timings=None):
+    import jinja2
+
+    bytecode_cache = None
+    if cache_dir != None:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+
+    loader = jinja2.FunctionLoader(PreprocessingLoader(template_dir, cache_dir).get_source)
+    if timings != None:
+        timings.instrument_loader(loader)
+
+    return jinja2.Environment(loader=loader, bytecode_cache=bytecode_cache, trim_blocks=True, lstrip_blocks=True)
+
+# Measures, for each template, the time spent loading it (preprocessing and compiling it, or
+# getting it from the cache) separately from the time spent rendering it.
+class TemplateTimings:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.load_times = {}
+        self.render_times = {}
+        self.render_counts = {}
+        self.load_time_during_render = 0
+
+    # Returns the timings gathered so far and starts gathering anew.
+    def take(self):
+        result = TemplateTimings()
+        (result.load_times, result.render_times, result.render_counts) = (self.load_times, self.render_times, self.render_counts)
+        self.reset()
+        return result
+
+    def instrument_loader(self, loader):
+        load = loader.load
+        def timed_load(environment, name, globals=None):
+            start = time.time()
+            template = load(environment, name, globals)
+            duration = time.time() - start
+
+            self.load_times[name] = self.load_times.get(name, 0) + duration
+            self.load_time_during_render += duration
+            return template
+        loader.load = timed_load
+
+    def add_render(self, template, duration):
+        # Imported templates are loaded while rendering, don't count that as rendering time.
+        self.render_times[template] = self.render_times.get(template, 0) + duration - self.load_time_during_render
+        self.render_counts[template] = self.render_counts.get(template, 0) + 1
+        self.load_time_during_render = 0
+
+    def merge(self, other):
+        for (template, duration) in other.load_times.items():
+            self.load_times[template] = self.load_times.get(template, 0) + duration
+        for (template, duration) in other.render_times.items():
+            self.render_times[template] = self.render_times.get(template, 0) + duration
+        for (template, count) in other.render_counts.items():
+            self.render_counts[template] = self.render_counts.get(template, 0) + count
+
+    def report(self):
+        lines = ['VkCPP template timings:']
+        for template in sorted(set(self.load_times.keys()) | set(self.render_times.keys())):
+            lines.append('    %-24s load %8.2fms    render %8.2fms (%d files)' % (template,
+                1000 * self.load_times.get(template, 0), 1000 * self.render_times.get(template, 0),
+                self.render_counts.get(template, 0)))
+        return '\n'.join(lines) + '\n'
+
+# Records the wall time, CPU time and memory of each stage of a run, for --profile.
+# The memory is traced with tracemalloc, which slows everything down, so the times are best compared
+# with each other. When rendering with several processes the render stages only measure how long
+# the main process waited for each file, the CPU time and memory of the workers aren't counted.
+class Profiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self.object_counts = {}
+
+        if self.enabled:
+            tracemalloc.start()
+            self.start_wall = time.perf_counter()
+            self.start_cpu = time.process_time()
+
+    def run(self, name, function):
+        if not self.enabled:
+            return function()
+
+        (start_memory, _) = tracemalloc.get_traced_memory()
+        # Before Python 3.9 the peak can't be reset, it is then the peak since the profiling started.
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+
+        result = function()
+
+        wall = time.perf_counter() - start_wall
+        cpu = time.process_time() - start_cpu
+        (end_memory, peak_memory) = tracemalloc.get_traced_memory()
+
+        self.stages.append(OrderedDict([
+            ('name', name),
+            ('wall', wall),
+            ('cpu', cpu),
+            ('memory_peak', peak_memory),
+            ('memory_delta', end_memory - start_memory),
+        ]))
+        return result
+
+    # Counts the live objects of each of the generator's classes, such as Name or StructMember.
+    def count_objects(self):
+        if not self.enabled:
+            return
+
+        self.object_counts = {}
+        for obj in gc.get_objects():
+            cls = type(obj)
+            if cls.__module__ == __name__ and cls != Profiler:
+                self.object_counts[cls.__name__] = self.object_counts.get(cls.__name__, 0) + 1
+
+    def finish(self):
+        self.total = OrderedDict([
+            ('wall', time.perf_counter() - self.start_wall),
+            ('cpu', time.process_time() - self.start_cpu),
+            ('memory_peak', max([stage['memory_peak'] for stage in self.stages] + [0])),
+        ])
+        tracemalloc.stop()
+
+    def to_json(self):
+        return json.dumps(OrderedDict([
+            ('stages', self.stages),
+            ('total', self.total),
+            ('objects', OrderedDict(sorted(self.object_counts.items()))),
+        ]), indent=4) + '\n'
+
+    def report(self):
+        lines = ['VkCPP profile:']
+        lines.append('    %-48s %10s %10s %12s %12s' % ('stage', 'wall', 'cpu', 'peak', 'delta'))
+        for stage in self.stages + [OrderedDict([('name', 'total'), ('memory_delta', None)] + list(self.total.items()))]:
+            delta = ''
+            if stage['memory_delta'] != None:
+                delta = '%+10.1fKiB' % (stage['memory_delta'] / 1024.0)
+            lines.append('    %-48s %8.2fms %8.2fms %9.1fKiB %12s' % (stage['name'], 1000 * stage['wall'],
+                1000 * stage['cpu'], stage['memory_peak'] / 1024.0, delta))
+
+        lines.append('VkCPP objects:')
+        for (name, count) in sorted(self.object_counts.items()):
+            lines.append('    %-48s %10d' % (name, count))
+        return '\n'.join(lines) + '\n'
+
+def render_file(env, render, timings=None):
+    params = OrderedDict()
+    for param_dict in render.params_dicts:
+        params.update(param_dict)
+
+    start = time.time()
+    content = env.get_template(render.template).render(**params) + "\n"
+    if timings != None:
+        timings.add_render(render.template, time.time() - start)
+    return content
+
+# When rendering with several processes, each worker gets the linked model once when it starts
+# and builds its own Jinja environment and list of files to render. Tasks are then only indices
+# in that list, and the rendered content is sent back to the parent which writes the files.
+render_worker_state = {}
+
+def init_render_worker(template_dir, output_dir, pickled_registry, cache_dir, timed, unity, call_profiling, lazy_loading):
+    (types, constants, extensions) = pickle.loads(pickled_registry)
+    timings = None
+    if timed:
+        timings = TemplateTimings()
+    render_worker_state['timings'] = timings
+    render_worker_state['env'] = create_environment(template_dir, cache_dir, timings)
+    render_worker_state['to_render'] = compute_files_to_render(types, constants, extensions, output_dir, unity,
+                                                               call_profiling, lazy_loading)
+
+def render_file_in_worker(index):
+    timings = render_worker_state['timings']
+    content = render_file(render_worker_state['env'], render_worker_state['to_render'][index], timings)
+
+    # Send the timings of this file back to the parent.
+    if timings != None:
+        timings = timings.take()
+    return (content, timings)
+
+# Yields the content of each file of to_render, or only of the files at the given indices, in
+# order whatever the number of jobs.
+def render_files(template_dir, output_dir, registry, to_render, jobs, cache_dir=None, timings=None, call_profiling=False,
+                 indices=None, unity=0, lazy_loading=False):
+    if indices == None:
+        indices = range(len(to_render))
+
+    if jobs <= 1 or len(indices) <= 1:
+        env = create_environment(template_dir, cache_dir, timings)
+        for index in indices:
+            yield render_file(env, to_render[index], timings)
+        return
+
+    pool = multiprocessing.Pool(min(jobs, len(indices)), initializer=init_render_worker,
+                                initargs=(template_dir, output_dir, pickle_registry(registry), cache_dir, timings != None, unity,
+                                          call_profiling, lazy_loading))
+    try:
+        for (content, file_timings) in pool.imap(render_file_in_worker, indices):
+            if timings != None:
+                timings.merge(file_timings)
+            yield content
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+# Writes the rendered contents of to_render, unity files once the last of their parts is rendered.
+# Returns the number of files written and the number of files left unchanged.
+def write_rendered_files(output_dir, to_render, contents, profiler):
+    remaining_parts = Counter(render.output for render in to_render)
+    parts = defaultdict(list)
+
+    written = 0
+    for render in to_render:
+        filename = os.path.relpath(render.output, output_dir)
+        parts[render.output].append(profiler.run('render ' + filename, lambda: next(contents)))
+
+        remaining_parts[render.output] -= 1
+        if remaining_parts[render.output] != 0:
+            continue
+
+        content = '\n'.join(parts.pop(render.output))
+        if profiler.run('write ' + filename, lambda: write_if_changed(render.output, content)):
+            written += 1
+
+    return (written, len(remaining_parts) - written)
+
+# The renders of to_render that use one of the changed templates, directly or through imports,
+# and the other parts of the unity files they are in.
+def affected_renders(template_dir, to_render, changed_templates):
+    changed_templates = set(changed_templates)
+    affected_templates = set()
+    for template in set(render.template for render in to_render):
+        if changed_templates.intersection(template_dependencies(template_dir, [template])):
+            affected_templates.add(template)
+
+    affected_outputs = set(render.output for render in to_render if render.template in affected_templates)
+    return [render for render in to_render if render.output in affected_outputs]
+
+# Keeps the linked registry and the Jinja environment between generations. Each check looks at
+# the modification times of the inputs: a change of vk.xml, of the extension list or of the usage
+# reloads the registry and renders everything again, a template change only renders the files using it.
+class Watcher:
+    def __init__(self, args, cache_dir, registry, to_render):
+        self.args = args
+        self.cache_dir = cache_dir
+        self.registry = registry
+        self.to_render = to_render
+
+        template_cache_dir = None
+        if cache_dir != None:
+            template_cache_dir = os.path.join(cache_dir, 'templates')
+        self.env = create_environment(args.template_dir, template_cache_dir)
+        self.mtimes = self.input_mtimes()
+
+    def template_paths(self):
+        templates = set(render.template for render in self.to_render)
+        return [os.path.join(self.args.template_dir, template) for template in template_dependencies(self.args.template_dir, templates)]
+
+    # The files the registry is loaded from: vk.xml, the extension list and the usage files.
+    def registry_paths(self):
+        paths = [self.args.xml[0]]
+        if self.args.extensions != None:
+            paths.append(self.args.extensions)
+        return paths + usage_dependencies(self.args)
+
+    def input_mtimes(self):
+        mtimes = {}
+        for path in self.registry_paths() + self.template_paths():
+            mtimes[path] = None
+            if os.path.exists(path):
+                mtimes[path] = os.path.getmtime(path)
+        return mtimes
+
+    # Renders what changed since the last check and returns the renders that were done.
+    def check(self):
+        mtimes = self.input_mtimes()
+        # Sources added to or removed from the usage source directories are changes too.
+        paths = set(mtimes.keys()) | set(self.mtimes.keys())
+        changed = sorted(path for path in paths if mtimes.get(path) != self.mtimes.get(path))
+        self.mtimes = mtimes
+        if len(changed) == 0:
+            return []
+
+        args = self.args
+        template_paths = set(self.template_paths())
+        if any(not path in template_paths for path in changed):
+            self.registry = load_vulkan_registry(args.xml[0], args.extensions, self.cache_dir, usage=read_usage(args))
+            self.to_render = compute_files_to_render(*self.registry, output_dir=args.output_dir,
+                                                     unity=args.unity, call_profiling=args.call_profiling,
+                                                     lazy_loading=args.lazy_loading)
+            self.mtimes = self.input_mtimes()
+            renders = self.to_render
+        else:
+            changed_templates = [os.path.relpath(path, args.template_dir) for path in changed]
+            renders = affected_renders(args.template_dir, self.to_render, changed_templates)
+
+        contents = (render_file(self.env, render) for render in renders)
+        (written, skipped) = write_rendered_files(args.output_dir, renders, contents, Profiler(enabled=False))
+        if self.cache_dir != None:
+            update_fingerprint_manifest(self.cache_dir, args.template_dir, args.output_dir, self.to_render)
+        print('VkCPP: wrote %d files, skipped %d unchanged files.' % (written, skipped))
+        return renders
+
+    def run(self, interval):
+        print('VkCPP: watching for changes, press Ctrl-C to stop.')
+        try:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check()
+                except Exception:
+                    # Keep watching so that the mistake can be fixed, the next change renders again.
+                    traceback.print_exc()
+        except KeyboardInterrupt:
+            pass
+
+# A target of --batch generation, paths are relative to the config file. The extensions are the
+# extension list file, None to generate all of them.
+BatchTarget = namedtuple('BatchTarget', ['extensions', 'output_dir', 'template_dir', 'unity', 'call_profiling', 'lazy_loading'])
+
+class BatchConfigError(Exception):
+    pass
+
+# Reads a --batch config, a JSON object with a "targets" list, for example:
+#   {"targets": [{"extensions": "Headless.txt", "output_dir": "headless"},
+#                {"extensions": "ExtensionList.txt", "output_dir": "client", "unity": 4}]}
+# Targets also accept "template_dir", "call_profiling" and "lazy_loading", like the command line options.
+def read_batch_config(filename, default_template_dir):
+    with open(filename) as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise BatchConfigError('%s is not valid JSON: %s' % (filename, e))
+
+    if not isinstance(config, dict) or not isinstance(config.get('targets'), list):
+        raise BatchConfigError('%s must be an object with a "targets" list' % filename)
+
+    base_dir = os.path.dirname(os.path.abspath(filename))
+    def path(target, key, default=None):
+        if not key in target:
+            return default
+        return os.path.join(base_dir, target[key])
+
+    known_keys = set(BatchTarget._fields)
+    targets = []
+    for target in config['targets']:
+        if not isinstance(target, dict) or not 'output_dir' in target:
+            raise BatchConfigError('Each target of %s must be an object with an "output_dir"' % filename)
+        unknown_keys = set(target.keys()) - known_keys
+        if len(unknown_keys) != 0:
+            raise BatchConfigError('Unknown keys %s in a target of %s' % (', '.join(sorted(unknown_keys)), filename))
+
+        targets.append(BatchTarget(
+            extensions=path(target, 'extensions'),
+            output_dir=path(target, 'output_dir'),
+            template_dir=path(target, 'template_dir', default_template_dir),
+            unity=target.get('unity', 0),
+            call_profiling=target.get('call_profiling', False),
+            lazy_loading=target.get('lazy_loading', False),
+        ))
+
+    return targets
+
+# Generates all the targets from a single parse of the registry where every extension is linked,
+# which renders the same as linking only the chosen extensions. The content of a render only
+# depends on the template and the extension, so renders shared by several targets are done once.
+# Returns the number of files written and left unchanged for each target, and the number of
+# renders that were done.
+def generate_batch(xml_filename, targets, cache_dir=None, profiler=None):
+    if profiler == None:
+        profiler = Profiler(enabled=False)
+
+    (types, constants, extensions) = load_vulkan_registry(xml_filename, None, cache_dir, profiler)
+
+    template_cache_dir = None
+    if cache_dir != None:
+        template_cache_dir = os.path.join(cache_dir, 'templates')
+
+    envs = {}
+    rendered = {}
+    def render_shared(target, render):
+        # The loaded function table depends on all the extensions of the target.
+        table_extensions = tuple(render.params_dicts[-1].get('loaded_function_extensions', []))
+        key = (target.template_dir, target.call_profiling, target.lazy_loading, render.template, render.params_dicts[0]['extension'].filename, table_extensions)
+        if not key in rendered:
+            if not target.template_dir in envs:
+                envs[target.template_dir] = create_environment(target.template_dir, template_cache_dir)
+            rendered[key] = render_file(envs[target.template_dir], render)
+        return rendered[key]
+
+    results = []
+    for target in targets:
+        chosen_extensions = extensions
+        if target.extensions != None:
+            names = read_extension_list(target.extensions)
+            chosen_extensions = choose_extensions(names, extensions)
+            if len(chosen_extensions) != len(names):
+                raise BatchConfigError('%s lists unknown extensions' % target.extensions)
+
+        to_render = compute_files_to_render(types, constants, chosen_extensions, target.output_dir,
+                                            target.unity, target.call_profiling, target.lazy_loading)
+        contents = (render_shared(target, render) for render in to_render)
+        results.append(write_rendered_files(target.output_dir, to_render, contents, profiler))
+        if cache_dir != None:
+            update_fingerprint_manifest(cache_dir, target.template_dir, target.output_dir, to_render)
+
+    return (results, len(rendered))
+
 def main():
     parser = argparse.ArgumentParser(
         description = 'Outputs a C++ wrapper for the Vulkan C API.',
@@ -884,62 +2346,126 @@ def main():
     parser.add_argument('-e', '--extensions', default=None, type=str, help='File listing the extensions to generate, one per line.')
     parser.add_argument('-s', '--source-dir', default="sources", type=str, help='Directory with source files.')
     parser.add_argument('-o', '--output-dir', default=None, type=str, help='Output directory for the generated source files.')
+    parser.add_argument('-c', '--cache-dir', default=None, type=str, help='Directory for the parsed registry cache, defaults to OUTPUT_DIR/.cache.')
+    parser.add_argument('--no-cache', action='store_true', help='Always parse the Vulkan XML, without reading or writing the registry cache.')
+    parser.add_argument('--usage', default=None, type=str, help='File listing the types and commands used by the consumers, one per line, only them and what they need are generated.')
+    parser.add_argument('--usage-sources', default=None, nargs='+', type=str, help='Sources or directories of sources of the consumers, the types and commands they name are added to the usage, like with --usage.')
+    parser.add_argument('--unity', default=0, type=int, help='Combines the generated loader sources, and separately the checks, in that many unity files to compile fewer translation units, 0 keeps one loader and one checks source per extension.')
+    parser.add_argument('--call-profiling', action='store_true', help='Generates wrappers that count the calls and time spent in each command, see vkcpp/CallProfiler.h.')
+    parser.add_argument('--lazy-loading', action='store_true', help='Generates loaders that support vk::LoadingMode::Lazy, where each wrapper looks up its function on the first call. Otherwise calls only load the function pointer and the loaders always load eagerly.')
+    parser.add_argument('-j', '--jobs', default=1, type=int, help='Number of processes used to render the templates, 0 uses one per CPU.')
+    parser.add_argument('--batch', default=None, type=str, help='Generates the targets listed in this JSON file, each with its own extension list and output directory, from a single parse of VULKAN_XML.')
+    parser.add_argument('--watch', action='store_true', help='Keeps running after the generation and generates again when vk.xml, the extension list or a template changes, only rendering the files using the changed templates.')
+    parser.add_argument('--watch-interval', default=0.1, type=float, help='Seconds between the checks for changes with --watch.')
+    parser.add_argument('--template-timings', action='store_true', help='Prints the time spent loading and rendering each template on stderr.')
+    parser.add_argument('--profile', action='store_true', help='Prints the time and memory used by each stage of the generation and the number of objects of each class on stderr.')
+    parser.add_argument('--profile-output', default=None, type=str, help='Writes the --profile report as JSON to this file instead of stderr, implies --profile.')
     parser.add_argument('--print-dependencies', action='store_true', help='Prints a space separated list of file dependencies, used for CMake integration')
     parser.add_argument('--print-outputs', action='store_true', help='Prints a space separated list of file outputs, used for CMake integration')
+    parser.add_argument('--print-manifest', default=None, choices=['cmake', 'depfile'], help='Prints both the dependencies and the outputs, as CMake set() commands or as a Ninja depfile')
 
     args = parser.parse_args()
 
-    (types, constants, extensions) = parse_vulkan_xml(args.xml[0])
-
-    extensions = choose_extensions(args, extensions)
-
-    # Generate a list of files to create, params_dicts will get squashed to create the template parameters
-    FileToRender = namedtuple('FileToRender', ['template', 'output', 'params_dicts'])
-    to_render = []
-
-    base_dir = args.output_dir + os.path.sep
-
-    for extension in extensions:
-        params = [extension_template_args(types, constants, extension)]
-        template_prefix = ''
-        if extension.is_main:
-            template_prefix = 'Main'
-        to_render.append(FileToRender(template_prefix + 'Extension.h', base_dir + extension.filename + '.h', params))
-        to_render.append(FileToRender('ExtensionChecks.cpp', base_dir + extension.filename + 'Checks.cpp', params))
-        to_render.append(FileToRender('Extension.cpp', base_dir + extension.filename + '.cpp', params))
-
-    FileToCopy = namedtuple('FileToCopy', ['source', 'target'])
+    cache_dir = args.cache_dir
+    if cache_dir == None and args.output_dir != None:
+        cache_dir = os.path.join(args.output_dir, '.cache')
+    if args.no_cache:
+        cache_dir = None
+
+    if args.print_manifest != None:
+        if not jinja2_available():
+            sys.stderr.write('Missing dependencies for VkCPP generation, please ensure you have python-jinja2 installed.\n')
+            return 1
+        (dependencies, outputs) = compute_manifest(args, cache_dir)
+        sys.stdout.write(format_manifest(args.print_manifest, dependencies, outputs))
+        return 0
 
     if args.print_dependencies:
-        dependencies = set(
-            [args.template_dir + os.path.sep + 'TemplateUtils.h'] +
-            [args.template_dir + os.path.sep + render.template for render in to_render] +
-            [os.path.abspath(args.xml[0])]
-        )
-        if args.extensions != None:
-            dependencies.add(os.path.abspath(args.extensions))
+        (dependencies, outputs) = compute_manifest(args, cache_dir)
         sys.stdout.write(';'.join(dependencies))
         return 0
 
     if args.print_outputs:
-        outputs = set([render.output for render in to_render])
+        (dependencies, outputs) = compute_manifest(args, cache_dir)
         sys.stdout.write(';'.join(outputs))
         return 0
 
+    profiler = Profiler(enabled=args.profile or args.profile_output != None)
+
+    if args.batch != None:
+        try:
+            targets = read_batch_config(args.batch, args.template_dir)
+            if cache_dir == None and not args.no_cache and len(targets) != 0:
+                cache_dir = os.path.join(targets[0].output_dir, '.cache')
+            (results, render_count) = generate_batch(args.xml[0], targets, cache_dir, profiler)
+        except BatchConfigError as e:
+            sys.stderr.write('VkCPP: %s\n' % e)
+            return 1
+
+        for (target, (written, skipped)) in zip(targets, results):
+            print('VkCPP: %s: wrote %d files, skipped %d unchanged files.' % (target.output_dir, written, skipped))
+        print('VkCPP: rendered %d files for %d targets.' % (render_count, len(targets)))
+
+        if profiler.enabled:
+            profiler.finish()
+            if args.profile_output != None:
+                write_file_atomically(args.profile_output, profiler.to_json())
+            else:
+                sys.stderr.write(profiler.report())
+        return 0
+
+    (types, constants, extensions) = load_vulkan_registry(args.xml[0], args.extensions, cache_dir, profiler, read_usage(args))
+
+    to_render = profiler.run('parameters', lambda: compute_files_to_render(types, constants, extensions, args.output_dir, args.unity,
+                                                                                   args.call_profiling, args.lazy_loading))
+    profiler.count_objects()
+
     if args.output_dir != None:
-        env = jinja2.Environment(loader=PreprocessingLoader(args.template_dir), trim_blocks=True, lstrip_blocks=True)
-        for render in to_render:
-            params = OrderedDict()
-            for param_dict in render.params_dicts:
-                params.update(param_dict)
-            content = env.get_template(render.template).render(**params) + "\n"
+        jobs = args.jobs
+        if jobs <= 0:
+            jobs = multiprocessing.cpu_count()
+
+        template_cache_dir = None
+        if cache_dir != None:
+            template_cache_dir = os.path.join(cache_dir, 'templates')
+
+        timings = None
+        if args.template_timings:
+            timings = TemplateTimings()
+
+        # Only render the outputs whose inputs changed, the fingerprints are kept with the caches.
+        indices = None
+        fingerprints = None
+        if cache_dir != None:
+            fingerprint_manifest = fingerprint_manifest_path(cache_dir, args.output_dir)
+            fingerprints = profiler.run('fingerprints', lambda: RenderFingerprints(args.template_dir).output_fingerprints(to_render))
+            indices = renders_to_update(to_render, args.output_dir, fingerprints, read_fingerprint_manifest(fingerprint_manifest))
+
+        contents = render_files(args.template_dir, args.output_dir, (types, constants, extensions), to_render, jobs,
+                                template_cache_dir, timings, args.call_profiling, indices, args.unity, args.lazy_loading)
+        rendered = to_render
+        if indices != None:
+            rendered = [to_render[index] for index in indices]
+        (written, skipped) = write_rendered_files(args.output_dir, rendered, contents, profiler)
+
+        if fingerprints != None:
+            skipped += len(fingerprints) - len(set(render.output for render in rendered))
+            write_fingerprint_manifest(fingerprint_manifest, args.output_dir, fingerprints)
+
+        if timings != None:
+            sys.stderr.write(timings.report())
+
+        if profiler.enabled:
+            profiler.finish()
+            if args.profile_output != None:
+                write_file_atomically(args.profile_output, profiler.to_json())
+            else:
+                sys.stderr.write(profiler.report())
 
-            directory = os.path.dirname(render.output)
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+        print('VkCPP: wrote %d files, skipped %d unchanged files.' % (written, skipped))
 
-            with open(render.output, 'w') as outfile:
-                outfile.write(content)
+        if args.watch:
+            Watcher(args, cache_dir, (types, constants, extensions), to_render).run(args.watch_interval)
         return 0
     return 1
 
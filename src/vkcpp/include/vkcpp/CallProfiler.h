@@ -0,0 +1,85 @@
+// PrototypeRenderer Source Code
+// Copyright (c) 2014-2016, Daemon Developers
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// * Redistributions of source code must retain the above copyright notice, this
+//   list of conditions and the following disclaimer.
+//
+// * Redistributions in binary form must reproduce the above copyright notice,
+//   this list of conditions and the following disclaimer in the documentation
+//   and/or other materials provided with the distribution.
+//
+// * Neither the name of Daemon CBSE nor the names of its
+//   contributors may be used to endorse or promote products derived from
+//   this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#ifndef VKCPP_CALL_PROFILER_H_
+#define VKCPP_CALL_PROFILER_H_
+
+#include <chrono>
+#include <cstdint>
+#include <vector>
+
+namespace vk {
+
+    // Counts the calls and the time spent in each Vulkan command when the wrappers are generated
+    // with --call-profiling. Each thread records in its own counters so that calls don't contend,
+    // the counters of all the threads are only summed when taking a snapshot.
+    class CallProfiler {
+        public:
+            // The most commands that can be profiled, more than there are in the registry.
+            static constexpr uint32_t MaxCommands = 1024;
+
+            struct CommandStats {
+                const char* name;
+                uint64_t calls;
+                uint64_t nanoseconds;
+            };
+
+            // Returns the id of the command with that name, the name must outlive the profiler.
+            static uint32_t RegisterCommand(const char* name);
+
+            // Returns the calls to each registered command since the last reset.
+            static std::vector<CommandStats> Snapshot();
+            static void Reset();
+            // Same as Snapshot followed by Reset, without missing the calls made in between, for
+            // example to get the calls made during each frame.
+            static std::vector<CommandStats> SnapshotAndReset();
+
+            static void Record(uint32_t command, uint64_t nanoseconds);
+
+            // Records a call to the command for its lifetime.
+            class ScopedCall {
+                public:
+                    ScopedCall(uint32_t command): command(command), start(std::chrono::steady_clock::now()) {}
+                    ~ScopedCall() {
+                        auto duration = std::chrono::steady_clock::now() - start;
+                        Record(command, std::chrono::duration_cast<std::chrono::nanoseconds>(duration).count());
+                    }
+
+                    ScopedCall(const ScopedCall&) = delete;
+                    ScopedCall& operator=(const ScopedCall&) = delete;
+
+                private:
+                    uint32_t command;
+                    std::chrono::steady_clock::time_point start;
+            };
+    };
+
+}
+
+#endif // VKCPP_CALL_PROFILER_H_
@@ -30,6 +30,10 @@
 #ifndef VKCPP_FUNCTION_LOADER_H_
 #define VKCPP_FUNCTION_LOADER_H_
 
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+
 namespace vk {
 
     class LoaderManager;
@@ -38,13 +42,71 @@ namespace vk {
 
     class FunctionLoader {
         public:
-            FunctionLoader(LoaderManager* manager);
+            // The extension name is the filename of the extension of the loader, like "KHRSwapchain".
+            FunctionLoader(LoaderManager* manager, const char* extensionName);
 
             virtual void LoadGlobalFunctions() = 0;
             virtual void LoadInstanceFunctions() = 0;
+            // Forgets the instance functions so that they are looked up again, for lazy loading.
+            virtual void ResetInstanceFunctions() = 0;
+            // Whether the wrappers look functions up on their first call, only loaders generated
+            // with --lazy-loading do and the others are always loaded eagerly.
+            virtual bool LoadsLazily() const = 0;
+
+            const char* GetExtensionName() const {
+                return extensionName;
+            }
+
+            // Returns the function of this loader with that name, like vkGetInstanceProcAddr but
+            // without calling in the driver, or nullptr if the loader doesn't have it.
+            virtual UntypedFnptr GetFunction(const char* name) const = 0;
+            // The same with the slot of the name in the table of the loader already known, used by
+            // LoaderManager::GetLoadedFunction that finds it in the table of all the loaders.
+            virtual UntypedFnptr GetFunctionInSlot(size_t slot, const char* name) const = 0;
+
+            // The hash of the perfect hash tables built by build_perfect_hash in generate.py, it is
+            // 32 bit FNV-1a with the seed as offset basis followed by the MurmurHash3 finalizer.
+            static uint32_t HashFunctionName(uint32_t seed, const char* name) {
+                uint32_t hash = seed == 0 ? 0x811c9dc5u : seed;
+                for (; *name != '\0'; name++) {
+                    hash = (hash ^ static_cast<unsigned char>(*name)) * 0x01000193u;
+                }
+
+                hash ^= hash >> 16;
+                hash *= 0x85ebca6bu;
+                hash ^= hash >> 13;
+                hash *= 0xc2b2ae35u;
+                hash ^= hash >> 16;
+                return hash;
+            }
+
+            // Returns the slot where the name would be in the table, the caller has to check that
+            // it is the same name, see perfect_hash_slot in generate.py.
+            static size_t FindFunctionSlot(const char* name, const int32_t* displacements, size_t size) {
+                int32_t displacement = displacements[HashFunctionName(0, name) % size];
+                if (displacement < 0) {
+                    return static_cast<size_t>(-displacement - 1);
+                }
+                return HashFunctionName(static_cast<uint32_t>(displacement), name) % size;
+            }
 
         protected:
+            // Returns the function, looking it up first if it isn't loaded yet, used by the wrappers of
+            // loaders generated with --lazy-loading. Threads racing to look it up get the same pointer
+            // so it is published with a simple release store.
+            UntypedFnptr Resolve(std::atomic<UntypedFnptr>& function, const char* name, bool global) const {
+                UntypedFnptr result = function.load(std::memory_order_acquire);
+                if (result == nullptr) {
+                    result = ResolveSlow(function, name, global);
+                }
+                return result;
+            }
+
             const LoaderManager& manager;
+            const char* extensionName;
+
+        private:
+            UntypedFnptr ResolveSlow(std::atomic<UntypedFnptr>& function, const char* name, bool global) const;
     };
 
 }
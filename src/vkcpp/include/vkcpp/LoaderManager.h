@@ -37,12 +37,43 @@
 
 namespace vk {
 
+    // Eager loading looks up all the functions of the registered loaders when the instance is set,
+    // lazy loading looks up each function when it is first called. Only the loaders generated with
+    // --lazy-loading support lazy loading, the others are loaded eagerly in both modes.
+    enum class LoadingMode {
+        Eager,
+        Lazy,
+    };
+
+    // The perfect hash table of the functions of all the generated loaders, defined in the loader
+    // source of the main extension. Each entry gives the index of the function's extension in
+    // extensions and the slot of the function in the table of that extension's loader.
+    struct LoadedFunctionTable {
+        struct Entry {
+            uint32_t extension;
+            uint32_t slot;
+        };
+
+        const int32_t* displacements;
+        const Entry* entries;
+        size_t size;
+        const char* const* extensions;
+        size_t extensionCount;
+    };
+
+    extern const LoadedFunctionTable loadedFunctionTable;
+
     class LoaderManager {
         public:
-            LoaderManager(UntypedFnptr getInstanceProcAddr);
+            LoaderManager(UntypedFnptr getInstanceProcAddr, LoadingMode mode = LoadingMode::Eager);
 
             UntypedFnptr GetGlobalFunction(const char* name) const;
             UntypedFnptr GetInstanceFunction(const char* name) const;
+            // Only valid after SetInstance, as vkGetDeviceProcAddr is an instance function.
+            UntypedFnptr GetDeviceFunction(Device device, const char* name) const;
+            // Looks up a function of the registered loaders by name without calling in the driver,
+            // with a single lookup in loadedFunctionTable whatever the number of loaders.
+            UntypedFnptr GetLoadedFunction(const char* name) const;
 
             void RegisterLoader(FunctionLoader* loader);
 
@@ -51,8 +82,12 @@ namespace vk {
 
         private:
             UntypedFnptr untypedGetProc;
+            LoadingMode mode;
+            UntypedFnptr untypedGetDeviceProc = nullptr;
             Instance instance = nullptr;
             std::vector<FunctionLoader*> loaders;
+            // The registered loader of each extension of loadedFunctionTable, or nullptr.
+            std::vector<FunctionLoader*> loadersByExtension;
     };
 
 }
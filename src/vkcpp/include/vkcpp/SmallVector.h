@@ -0,0 +1,93 @@
+// PrototypeRenderer Source Code
+// Copyright (c) 2014-2016, Daemon Developers
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// * Redistributions of source code must retain the above copyright notice, this
+//   list of conditions and the following disclaimer.
+//
+// * Redistributions in binary form must reproduce the above copyright notice,
+//   this list of conditions and the following disclaimer in the documentation
+//   and/or other materials provided with the distribution.
+//
+// * Neither the name of Daemon CBSE nor the names of its
+//   contributors may be used to endorse or promote products derived from
+//   this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#ifndef VKCPP_SMALL_VECTOR_H_
+#define VKCPP_SMALL_VECTOR_H_
+
+#include <algorithm>
+#include <cstddef>
+#include <memory>
+
+namespace vk {
+
+    // A vector that stores up to N elements inline and only allocates on the heap when it grows
+    // past that. It is meant to receive the arrays returned by the Vulkan commands, see the
+    // container helpers of the loaders, so T must be default constructible and copyable. The
+    // storage is never shrunk so that filling it again with a similar array doesn't allocate.
+    template<typename T, size_t N>
+    class SmallVector {
+        public:
+            SmallVector() : storage(inlineStorage), count(0), storageCapacity(N) {}
+
+            SmallVector(const SmallVector&) = delete;
+            SmallVector& operator=(const SmallVector&) = delete;
+
+            void resize(size_t size) {
+                if (size > storageCapacity) {
+                    size_t newCapacity = std::max(size, 2 * storageCapacity);
+                    std::unique_ptr<T[]> newStorage(new T[newCapacity]());
+                    std::copy(storage, storage + count, newStorage.get());
+
+                    heapStorage = std::move(newStorage);
+                    storage = heapStorage.get();
+                    storageCapacity = newCapacity;
+                }
+
+                // The new elements are value initialized like with std::vector.
+                std::fill(storage + std::min(count, size), storage + size, T());
+                count = size;
+            }
+
+            void clear() {count = 0;}
+
+            T* data() {return storage;}
+            const T* data() const {return storage;}
+            size_t size() const {return count;}
+            size_t capacity() const {return storageCapacity;}
+            bool empty() const {return count == 0;}
+
+            T& operator[](size_t i) {return storage[i];}
+            const T& operator[](size_t i) const {return storage[i];}
+
+            T* begin() {return storage;}
+            T* end() {return storage + count;}
+            const T* begin() const {return storage;}
+            const T* end() const {return storage + count;}
+
+        private:
+            T inlineStorage[N];
+            std::unique_ptr<T[]> heapStorage;
+            T* storage;
+            size_t count;
+            size_t storageCapacity;
+    };
+
+}
+
+#endif // VKCPP_SMALL_VECTOR_H_
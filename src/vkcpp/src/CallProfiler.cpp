@@ -0,0 +1,174 @@
+// PrototypeRenderer Source Code
+// Copyright (c) 2014-2016, Daemon Developers
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// * Redistributions of source code must retain the above copyright notice, this
+//   list of conditions and the following disclaimer.
+//
+// * Redistributions in binary form must reproduce the above copyright notice,
+//   this list of conditions and the following disclaimer in the documentation
+//   and/or other materials provided with the distribution.
+//
+// * Neither the name of Daemon CBSE nor the names of its
+//   contributors may be used to endorse or promote products derived from
+//   this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#include "vkcpp/CallProfiler.h"
+
+#include <atomic>
+#include <cstring>
+#include <memory>
+#include <mutex>
+
+namespace vk {
+
+    namespace {
+
+        // The counters of a thread are only written by that thread, with relaxed atomics so that
+        // snapshots can read them while it runs.
+        struct ThreadCounters {
+            ThreadCounters();
+            ~ThreadCounters();
+
+            std::atomic<uint64_t> calls[CallProfiler::MaxCommands];
+            std::atomic<uint64_t> nanoseconds[CallProfiler::MaxCommands];
+        };
+
+        struct Totals {
+            uint64_t calls[CallProfiler::MaxCommands] = {};
+            uint64_t nanoseconds[CallProfiler::MaxCommands] = {};
+        };
+
+        // Everything but the counters themselves is behind the mutex. A reset doesn't write to the
+        // counters of the other threads, it remembers their current values as the new baseline.
+        struct Registry {
+            std::mutex mutex;
+            std::vector<const char*> names;
+            std::vector<ThreadCounters*> threads;
+            // The counts of the threads that exited.
+            Totals exited;
+            Totals baseline;
+        };
+
+        // Leaked so that it is still there when threads exit during the static destruction.
+        Registry& GetRegistry() {
+            static Registry* registry = new Registry;
+            return *registry;
+        }
+
+        ThreadCounters::ThreadCounters() {
+            for (uint32_t i = 0; i < CallProfiler::MaxCommands; i++) {
+                calls[i].store(0, std::memory_order_relaxed);
+                nanoseconds[i].store(0, std::memory_order_relaxed);
+            }
+
+            Registry& registry = GetRegistry();
+            std::lock_guard<std::mutex> lock(registry.mutex);
+            registry.threads.push_back(this);
+        }
+
+        ThreadCounters::~ThreadCounters() {
+            Registry& registry = GetRegistry();
+            std::lock_guard<std::mutex> lock(registry.mutex);
+            for (uint32_t i = 0; i < CallProfiler::MaxCommands; i++) {
+                registry.exited.calls[i] += calls[i].load(std::memory_order_relaxed);
+                registry.exited.nanoseconds[i] += nanoseconds[i].load(std::memory_order_relaxed);
+            }
+            for (size_t i = 0; i < registry.threads.size(); i++) {
+                if (registry.threads[i] == this) {
+                    registry.threads[i] = registry.threads.back();
+                    registry.threads.pop_back();
+                    break;
+                }
+            }
+        }
+
+        void ComputeTotals(const Registry& registry, Totals* totals) {
+            *totals = registry.exited;
+            for (const ThreadCounters* thread : registry.threads) {
+                for (size_t i = 0; i < registry.names.size(); i++) {
+                    totals->calls[i] += thread->calls[i].load(std::memory_order_relaxed);
+                    totals->nanoseconds[i] += thread->nanoseconds[i].load(std::memory_order_relaxed);
+                }
+            }
+        }
+
+        std::vector<CallProfiler::CommandStats> TakeSnapshot(bool reset) {
+            Registry& registry = GetRegistry();
+            std::lock_guard<std::mutex> lock(registry.mutex);
+
+            std::unique_ptr<Totals> totals(new Totals);
+            ComputeTotals(registry, totals.get());
+
+            std::vector<CallProfiler::CommandStats> snapshot;
+            snapshot.reserve(registry.names.size());
+            for (size_t i = 0; i < registry.names.size(); i++) {
+                snapshot.push_back({
+                    registry.names[i],
+                    totals->calls[i] - registry.baseline.calls[i],
+                    totals->nanoseconds[i] - registry.baseline.nanoseconds[i],
+                });
+            }
+
+            if (reset) {
+                registry.baseline = *totals;
+            }
+            return snapshot;
+        }
+
+    }
+
+    uint32_t CallProfiler::RegisterCommand(const char* name) {
+        Registry& registry = GetRegistry();
+        std::lock_guard<std::mutex> lock(registry.mutex);
+
+        // The loader and the device dispatch tables share the counters of a command.
+        for (size_t i = 0; i < registry.names.size(); i++) {
+            if (strcmp(registry.names[i], name) == 0) {
+                return static_cast<uint32_t>(i);
+            }
+        }
+
+        // The commands past the limit share the last counters, which aren't in the snapshots.
+        if (registry.names.size() == MaxCommands - 1) {
+            return MaxCommands - 1;
+        }
+        registry.names.push_back(name);
+        return static_cast<uint32_t>(registry.names.size() - 1);
+    }
+
+    std::vector<CallProfiler::CommandStats> CallProfiler::Snapshot() {
+        return TakeSnapshot(false);
+    }
+
+    void CallProfiler::Reset() {
+        TakeSnapshot(true);
+    }
+
+    std::vector<CallProfiler::CommandStats> CallProfiler::SnapshotAndReset() {
+        return TakeSnapshot(true);
+    }
+
+    void CallProfiler::Record(uint32_t command, uint64_t nanoseconds) {
+        thread_local ThreadCounters counters;
+
+        // Only this thread writes its counters so they don't need atomic increments.
+        counters.calls[command].store(counters.calls[command].load(std::memory_order_relaxed) + 1, std::memory_order_relaxed);
+        counters.nanoseconds[command].store(counters.nanoseconds[command].load(std::memory_order_relaxed) + nanoseconds, std::memory_order_relaxed);
+    }
+
+}
@@ -33,8 +33,19 @@
 
 namespace vk {
 
-    FunctionLoader::FunctionLoader(LoaderManager* manager_): manager(*manager_) {
+    FunctionLoader::FunctionLoader(LoaderManager* manager_, const char* extensionName)
+    : manager(*manager_), extensionName(extensionName) {
         manager_->RegisterLoader(this);
     }
 
+    UntypedFnptr FunctionLoader::ResolveSlow(std::atomic<UntypedFnptr>& function, const char* name, bool global) const {
+        UntypedFnptr result = global ? manager.GetGlobalFunction(name) : manager.GetInstanceFunction(name);
+
+        // Don't remember missing functions, they could be available with another instance.
+        if (result != nullptr) {
+            function.store(result, std::memory_order_release);
+        }
+        return result;
+    }
+
 }
@@ -31,10 +31,12 @@
 
 #include "vulkan/vulkan.h"
 
+#include <cstring>
+
 namespace vk {
 
-    LoaderManager::LoaderManager(UntypedFnptr getInstanceProcAddr)
-    : untypedGetProc(getInstanceProcAddr) {
+    LoaderManager::LoaderManager(UntypedFnptr getInstanceProcAddr, LoadingMode mode)
+    : untypedGetProc(getInstanceProcAddr), mode(mode), loadersByExtension(loadedFunctionTable.extensionCount, nullptr) {
     }
 
     UntypedFnptr LoaderManager::GetGlobalFunction(const char* name) const {
@@ -47,20 +49,54 @@ namespace vk {
         return reinterpret_cast<UntypedFnptr>(getProc(reinterpret_cast<VkInstance>(instance), name));
     }
 
+    UntypedFnptr LoaderManager::GetDeviceFunction(Device device, const char* name) const {
+        auto getProc = reinterpret_cast<PFN_vkGetDeviceProcAddr>(untypedGetDeviceProc);
+        return reinterpret_cast<UntypedFnptr>(getProc(reinterpret_cast<VkDevice>(device), name));
+    }
+
+    UntypedFnptr LoaderManager::GetLoadedFunction(const char* name) const {
+        if (loadedFunctionTable.size == 0) {
+            return nullptr;
+        }
+
+        size_t slot = FunctionLoader::FindFunctionSlot(name, loadedFunctionTable.displacements, loadedFunctionTable.size);
+        const LoadedFunctionTable::Entry& entry = loadedFunctionTable.entries[slot];
+        FunctionLoader* loader = loadersByExtension[entry.extension];
+        if (loader == nullptr) {
+            return nullptr;
+        }
+        // The loader checks that it is the same name.
+        return loader->GetFunctionInSlot(entry.slot, name);
+    }
+
     void LoaderManager::RegisterLoader(FunctionLoader* loader) {
         loaders.push_back(loader);
+
+        // When several loaders of an extension are registered, the first one is used.
+        for (size_t i = 0; i < loadedFunctionTable.extensionCount; i++) {
+            if (loadersByExtension[i] == nullptr && strcmp(loadedFunctionTable.extensions[i], loader->GetExtensionName()) == 0) {
+                loadersByExtension[i] = loader;
+            }
+        }
     }
 
     void LoaderManager::LoadGlobals() {
         for (auto loader : loaders) {
-            loader->LoadGlobalFunctions();
+            if (mode != LoadingMode::Lazy || !loader->LoadsLazily()) {
+                loader->LoadGlobalFunctions();
+            }
         }
     }
 
     void LoaderManager::SetInstance(vk::Instance instance) {
         this->instance = instance;
+        untypedGetDeviceProc = GetInstanceFunction("vkGetDeviceProcAddr");
         for (auto loader : loaders) {
-            loader->LoadInstanceFunctions();
+            if (mode == LoadingMode::Lazy && loader->LoadsLazily()) {
+                loader->ResetInstanceFunctions();
+            } else {
+                loader->LoadInstanceFunctions();
+            }
         }
     }
 
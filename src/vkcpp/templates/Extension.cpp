@@ -34,54 +34,170 @@
 #include "vulkan/vulkan.h"
 #include "vkcpp/LoaderManager.h"
 
+#include <cstring>
+{% if call_profiling %}
+
+    #include "vkcpp/CallProfiler.h"
+{% endif %}
+
 namespace vk {
     {% set ClassName = extension.name.CamelCase() + 'Loader' %}
 
+    // Guarded because with --unity the sources of several extensions are in the same file.
+    #ifndef VKCPP_FORCE_CAST_DEFINED
+    #define VKCPP_FORCE_CAST_DEFINED
     template<typename To, typename From>
     To force_cast(const From& from) {
         return *reinterpret_cast<const To*>(&from);
     }
+    #endif // VKCPP_FORCE_CAST_DEFINED
 
-    {% set globalFunctionNames = [
-        'EnumerateInstanceExtensionProperties',
-        'EnumerateInstanceLayerProperties',
-        'CreateInstance',
-    ] %}
+    {{ClassName}}::{{ClassName}}(LoaderManager* manager): FunctionLoader(manager, "{{extension.filename}}") {
+    }
 
     void {{ClassName}}::LoadGlobalFunctions() {
         {% for function in functions %}
-            {% if function.name.CamelCase() in globalFunctionNames %}
+            {% if function.dispatch == 'global' %}
                 {{function.name.camelCase()}}_ = manager.GetGlobalFunction("vk{{function.name.CamelCase()}}");
             {% endif %}
         {% endfor %}
     }
     void {{ClassName}}::LoadInstanceFunctions() {
         {% for function in functions %}
-            {% if not function.name.CamelCase() in globalFunctionNames %}
+            {% if function.dispatch != 'global' %}
                 {{function.name.camelCase()}}_ = manager.GetInstanceFunction("vk{{function.name.CamelCase()}}");
             {% endif %}
         {% endfor %}
     }
+    void {{ClassName}}::ResetInstanceFunctions() {
+        {% for function in functions %}
+            {% if function.dispatch != 'global' %}
+                {{function.name.camelCase()}}_ = nullptr;
+            {% endif %}
+        {% endfor %}
+    }
 
-    {% for function in functions %}
-        {{function.return_type.name.Typename()}} {{ClassName}}::{{function.name.CamelCase()}}(
-            {%- call(param) utils.comma_foreach(function.params) -%}
-                {{utils.annotated_type(param)}} {{utils.annotated_name(param)}}
-            {%- endcall -%}
-        ) const {
-            {% set returns_void = function.return_type.name.Typename() != 'void' %}
-            auto cFnPtr = reinterpret_cast<PFN_vk{{function.name.CamelCase()}}>({{function.name.camelCase()}}_);
-            {% if returns_void %}
-                auto result ={{' '}}
-            {%- endif %}
-            cFnPtr(
-                {%- call(param) utils.comma_foreach(function.params) -%}
-                    force_cast<{{utils.annotated_type(param, native=True, array_to_pointer=True)}}>({{param.name.camelCase()}})
-                {%- endcall -%}
-            );
-            {% if returns_void %}
-                return force_cast<{{function.return_type.name.Typename()}}>(result);
+    bool {{ClassName}}::LoadsLazily() const {
+        return {{'true' if lazy_loading else 'false'}};
+    }
+
+    {% if function_hash_slots %}
+        // The perfect hash table of the function names, made by build_perfect_hash in generate.py
+        static const int32_t {{ClassName}}Displacements[] = {
+            {{function_hash_displacements|join(', ')}}
+        };
+    {% endif %}
+
+    UntypedFnptr {{ClassName}}::GetFunction(const char* name) const {
+        {% if function_hash_slots %}
+            return GetFunctionInSlot(FindFunctionSlot(name, {{ClassName}}Displacements, {{function_hash_slots|length}}), name);
+        {% else %}
+            return nullptr;
+        {% endif %}
+    }
+
+    UntypedFnptr {{ClassName}}::GetFunctionInSlot(size_t slot, const char* name) const {
+        {% if function_hash_slots %}
+            struct Entry {
+                const char* name;
+                std::atomic<UntypedFnptr> {{ClassName}}::* function;
+                bool global;
+            };
+
+            static const Entry entries[] = {
+                {% for (name, function) in function_hash_slots %}
+                    {"{{name}}", &{{ClassName}}::{{function.name.camelCase()}}_, {{'true' if function.dispatch == 'global' else 'false'}}},
+                {% endfor %}
+            };
+
+            const Entry& entry = entries[slot];
+            if (strcmp(entry.name, name) != 0) {
+                return nullptr;
+            }
+            {% if lazy_loading %}
+                return Resolve(const_cast<{{ClassName}}*>(this)->*entry.function, entry.name, entry.global);
+            {% else %}
+                return (this->*entry.function).load(std::memory_order_relaxed);
             {% endif %}
+        {% else %}
+            return nullptr;
+        {% endif %}
+    }
+
+    {% set DispatchName = extension.name.CamelCase() + 'DeviceDispatch' %}
+    {% if device_dispatch %}
+        {{DispatchName}}::{{DispatchName}}(const LoaderManager& manager, Device device) {
+            LoadDeviceFunctions(manager, device);
         }
+
+        void {{DispatchName}}::LoadDeviceFunctions(const LoaderManager& manager, Device device) {
+            {% for function in device_functions %}
+                {{function.name.camelCase()}}_ = manager.GetDeviceFunction(device, "vk{{function.name.CamelCase()}}");
+            {% endfor %}
+        }
+
+    {% endif %}
+    {% for (OwnerName, owner_functions) in [(ClassName, functions), (DispatchName, device_functions)] %}
+        {% for function in owner_functions %}
+            {{function.return_type.name.Typename()}} {{OwnerName}}::{{function.name.CamelCase()}}(
+                {%- call(param) utils.comma_foreach(function.params) -%}
+                    {{utils.annotated_type(param)}} {{utils.annotated_name(param)}}
+                {%- endcall -%}
+            ) const {
+                {% if call_profiling %}
+                    static const uint32_t profiledCommand = CallProfiler::RegisterCommand("vk{{function.name.CamelCase()}}");
+                    CallProfiler::ScopedCall profiledCall(profiledCommand);
+                {% endif %}
+                {% set returns_void = function.return_type.name.Typename() != 'void' %}
+                {% if OwnerName == ClassName and lazy_loading %}
+                    auto cFnPtr = reinterpret_cast<PFN_vk{{function.name.CamelCase()}}>(Resolve({{function.name.camelCase()}}_, "vk{{function.name.CamelCase()}}", {{'true' if function.dispatch == 'global' else 'false'}}));
+                {% elif OwnerName == ClassName %}
+                    //* Without lazy loading the pointer never changes after it is loaded, a relaxed load is a plain load.
+                    auto cFnPtr = reinterpret_cast<PFN_vk{{function.name.CamelCase()}}>({{function.name.camelCase()}}_.load(std::memory_order_relaxed));
+                {% else %}
+                    auto cFnPtr = reinterpret_cast<PFN_vk{{function.name.CamelCase()}}>({{function.name.camelCase()}}_);
+                {% endif %}
+                {% if returns_void %}
+                    auto result ={{' '}}
+                {%- endif %}
+                cFnPtr(
+                    {%- call(param) utils.comma_foreach(function.params) -%}
+                        force_cast<{{utils.annotated_type(param, native=True, array_to_pointer=True)}}>({{param.name.camelCase()}})
+                    {%- endcall -%}
+                );
+                {% if returns_void %}
+                    return force_cast<{{function.return_type.name.Typename()}}>(result);
+                {% endif %}
+            }
+        {% endfor %}
     {% endfor %}
+    {% if loaded_function_extensions %}
+
+        // The perfect hash table of the functions of all the generated loaders, made by
+        // loaded_function_table in generate.py and used by LoaderManager::GetLoadedFunction.
+        {% if loaded_function_entries %}
+            static const int32_t loadedFunctionDisplacements[] = {
+                {{loaded_function_displacements|join(', ')}}
+            };
+            static const LoadedFunctionTable::Entry loadedFunctionEntries[] = {
+                {% for (name, index, slot) in loaded_function_entries %}
+                    { {{index}}, {{slot}} }, // {{name}}
+                {% endfor %}
+            };
+        {% endif %}
+        static const char* const loadedFunctionExtensions[] = {
+            {% for filename in loaded_function_extensions %}
+                "{{filename}}",
+            {% endfor %}
+        };
+
+        const LoadedFunctionTable loadedFunctionTable = {
+            {% if loaded_function_entries %}
+                loadedFunctionDisplacements, loadedFunctionEntries, {{loaded_function_entries|length}},
+            {% else %}
+                nullptr, nullptr, 0,
+            {% endif %}
+            loadedFunctionExtensions, {{loaded_function_extensions|length}},
+        };
+    {% endif %}
 }
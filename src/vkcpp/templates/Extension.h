@@ -32,11 +32,14 @@
 #ifndef VKCPP_{{extension.name.SNAKE_CASE()}}_H_
 #define VKCPP_{{extension.name.SNAKE_CASE()}}_H_
 
+#include "{{extension.filename}}Fwd.h"
+
 {% for extension in required_extensions %}
     #include "{{extension.filename}}.h"
 {% endfor %}
 
 {% block extra_headers %}
+    #include "vkcpp/FunctionLoader.h"
 {% endblock %}
 
 {% for header in required_headers %}
@@ -49,10 +52,7 @@
 
 namespace vk {
 
-    {% for type in base_types %}
-        using {{type.name.Typename()}} = {{type.base_type.name.Typename()}};
-    {% endfor %}
-
+    //* Base types and handles are only in the Fwd header.
     {% for enum in enum_types %}
         enum class {{enum.name.Typename()}}: int32_t {
             {% for value in enum.values %}
@@ -84,17 +84,6 @@ namespace vk {
     {% block extra_base_definitions %}
     {% endblock %}
 
-    {% for typ in handle_types %}
-        {% if typ.dispatchable %}
-            using {{typ.name.Typename()}} = class {{typ.name.Typename()}}Impl*;
-        {% else %}
-            class {{typ.name.Typename()}} : public NonDispatchableHandle {
-                using NonDispatchableHandle::NonDispatchableHandle;
-            };
-        {% endif %}
-
-    {% endfor %}
-
     {% for type in fnptr_types %}
         using {{type.name.Typename()}} = {{type.return_type.name.Typename()}} (VKAPI_PTR*) (
             {%- call(param) utils.comma_foreach(type.params) -%}
@@ -126,10 +115,14 @@ namespace vk {
     {% set ClassName = extension.name.CamelCase() + 'Loader' %}
     class {{ClassName}} : public FunctionLoader {
         public:
-            using FunctionLoader::FunctionLoader;
+            {{ClassName}}(LoaderManager* manager);
 
             void LoadGlobalFunctions() override;
             void LoadInstanceFunctions() override;
+            void ResetInstanceFunctions() override;
+            bool LoadsLazily() const override;
+            UntypedFnptr GetFunction(const char* name) const override;
+            UntypedFnptr GetFunctionInSlot(size_t slot, const char* name) const override;
 
             {% for function in functions %}
                 {{function.return_type.name.Typename()}} {{function.name.CamelCase()}}(
@@ -138,12 +131,130 @@ namespace vk {
                     {%- endcall -%}
                 ) const;
             {% endfor %}
+            {% for function in functions if function.enumerated_array %}
+                {% if loop.first %}
+
+                    // Helpers for the commands returning an array: they query its size, resize the
+                    // container and fill it, again while the result is Incomplete. The container needs
+                    // resize() and data(), like std::vector or vk::SmallVector that doesn't allocate
+                    // when the array fits in its inline storage.
+                {% endif %}
+                template<typename Container>
+                {{function.return_type.name.Typename()}} {{function.name.CamelCase()}}(
+                    {%- for param in function.enumerate_inputs -%}
+                        {{utils.annotated_type(param)}} {{utils.annotated_name(param)}},{{' '}}
+                    {%- endfor -%}
+                    Container* {{function.enumerated_array.name.camelCase()}}) const;
+            {% endfor %}
 
         private:
+            // Looked up on the first call when generated with --lazy-loading and loading lazily.
             {% for function in functions %}
-                UntypedFnptr {{function.name.camelCase()}}_ = nullptr;
+                mutable std::atomic<UntypedFnptr> {{function.name.camelCase()}}_{nullptr};
             {% endfor %}
     };
+    {% set DispatchName = extension.name.CamelCase() + 'DeviceDispatch' %}
+    {% if device_dispatch %}
+
+        // The device commands of the extension loaded for a single device with vkGetDeviceProcAddr,
+        // so that calls go directly to the driver instead of through the loader's trampolines.
+        // They must only be called on the device the table was loaded for, or objects created from it.
+        class {{DispatchName}} {
+            public:
+                {{DispatchName}}() = default;
+                {{DispatchName}}(const LoaderManager& manager, Device device);
+
+                void LoadDeviceFunctions(const LoaderManager& manager, Device device);
+
+                {% for function in device_functions %}
+                    {{function.return_type.name.Typename()}} {{function.name.CamelCase()}}(
+                        {%- call(param) utils.comma_foreach(function.params) -%}
+                            {{utils.annotated_type(param)}} {{utils.annotated_name(param)}}
+                        {%- endcall -%}
+                    ) const;
+                {% endfor %}
+                {% for function in device_functions if function.enumerated_array %}
+                    {% if loop.first %}
+
+                        // Helpers filling a container like the loader's.
+                    {% endif %}
+                    template<typename Container>
+                    {{function.return_type.name.Typename()}} {{function.name.CamelCase()}}(
+                        {%- for param in function.enumerate_inputs -%}
+                            {{utils.annotated_type(param)}} {{utils.annotated_name(param)}},{{' '}}
+                        {%- endfor -%}
+                        Container* {{function.enumerated_array.name.camelCase()}}) const;
+                {% endfor %}
+
+            private:
+                {% for function in device_functions %}
+                    UntypedFnptr {{function.name.camelCase()}}_ = nullptr;
+                {% endfor %}
+        };
+    {% endif %}
+    {% for (OwnerName, owner_functions) in [(ClassName, functions), (DispatchName, device_functions)] %}
+        {% for function in owner_functions if function.enumerated_array %}
+            {% set returns_result = function.return_type.name.Typename() == 'Result' %}
+
+            template<typename Container>
+            {{function.return_type.name.Typename()}} {{OwnerName}}::{{function.name.CamelCase()}}(
+                {%- for param in function.enumerate_inputs -%}
+                    {{utils.annotated_type(param)}} {{utils.annotated_name(param)}},{{' '}}
+                {%- endfor -%}
+                Container* {{function.enumerated_array.name.camelCase()}}) const {
+                uint32_t count = 0;
+                {% if returns_result %}
+                    Result result;
+                    do {
+                        result = {{function.name.CamelCase()}}(
+                            {%- call(param) utils.comma_foreach(function.params) -%}
+                                {%- if param is sameas function.enumerated_count -%}
+                                    &count
+                                {%- elif param is sameas function.enumerated_array -%}
+                                    nullptr
+                                {%- else -%}
+                                    {{param.name.camelCase()}}
+                                {%- endif -%}
+                            {%- endcall -%}
+                        );
+                        if (result != Result::Success) {
+                            return result;
+                        }
+                        {{function.enumerated_array.name.camelCase()}}->resize(count);
+                        result = {{function.name.CamelCase()}}(
+                            {%- call(param) utils.comma_foreach(function.params) -%}
+                                {%- if param is sameas function.enumerated_count -%}
+                                    &count
+                                {%- elif param is sameas function.enumerated_array -%}
+                                    {{param.name.camelCase()}}->data()
+                                {%- else -%}
+                                    {{param.name.camelCase()}}
+                                {%- endif -%}
+                            {%- endcall -%}
+                        );
+                    } while (result == Result::Incomplete);
+                    {{function.enumerated_array.name.camelCase()}}->resize(count);
+                    return result;
+                {% else %}
+                    {% for pass in ['size', 'fill'] %}
+                        {{function.name.CamelCase()}}(
+                            {%- call(param) utils.comma_foreach(function.params) -%}
+                                {%- if param is sameas function.enumerated_count -%}
+                                    &count
+                                {%- elif param is sameas function.enumerated_array -%}
+                                    {{'nullptr' if pass == 'size' else param.name.camelCase() + '->data()'}}
+                                {%- else -%}
+                                    {{param.name.camelCase()}}
+                                {%- endif -%}
+                            {%- endcall -%}
+                        );
+                        //* The fill pass can write fewer elements than the size pass counted.
+                        {{function.enumerated_array.name.camelCase()}}->resize(count);
+                    {% endfor %}
+                {% endif %}
+            }
+        {% endfor %}
+    {% endfor %}
 }
 
 #endif // VKCPP_{{extension.name.SNAKE_CASE()}}_H_
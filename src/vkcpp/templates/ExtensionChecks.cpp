@@ -36,10 +36,14 @@
 
 using namespace vk;
 
+// --unity puts the checks of several extensions in one file, where this must be defined once.
+#ifndef VKCPP_COMPATIBLE_DEFINED
+#define VKCPP_COMPATIBLE_DEFINED
 template<typename A, typename B>
 struct Compatible {
     static constexpr bool value = sizeof(A) == sizeof(B) && alignof(A) == alignof(B);
 };
+#endif // VKCPP_COMPATIBLE_DEFINED
 
 {% for type in base_types %}
     static_assert(std::is_same<{{type.name.Typename()}}, {{type.base_type.name.Typename()}}>::value, "");
@@ -63,7 +67,8 @@ struct Compatible {
 
 {% for typ in struct_types %}
     static_assert(Compatible<{{typ.name.Typename()}}, ::{{typ.name.nativeTypename()}}>::value, "");
-    {% for member in typ.members %}
+    //* offsetof can't be used on bitfields.
+    {% for member in typ.members if member.bitfield_width == None %}
         static_assert(offsetof({{typ.name.Typename()}}, {{member.name.camelCase()}}) == offsetof(::Vk{{typ.name.Typename()}}, {{member.name.camelCase()}}), "");
     {% endfor %}
 
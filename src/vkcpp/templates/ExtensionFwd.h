@@ -0,0 +1,82 @@
+//* PrototypeRenderer Source Code
+//* Copyright (c) 2014-2016, Daemon Developers
+//* All rights reserved.
+//*
+//* Redistribution and use in source and binary forms, with or without
+//* modification, are permitted provided that the following conditions are met:
+//*
+//* * Redistributions of source code must retain the above copyright notice, this
+//*   list of conditions and the following disclaimer.
+//*
+//* * Redistributions in binary form must reproduce the above copyright notice,
+//*   this list of conditions and the following disclaimer in the documentation
+//*   and/or other materials provided with the distribution.
+//*
+//* * Neither the name of Daemon CBSE nor the names of its
+//*   contributors may be used to endorse or promote products derived from
+//*   this software without specific prior written permission.
+//*
+//* THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+//* AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+//* IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+//* DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+//* FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+//* DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+//* SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+//* CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+//* OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+//* OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+// THIS FILE IS AUTO-GENERATED, EDIT AT YOUR OWN RISK
+//* The cheap part of {{extension.filename}}.h for headers that only pass its types around: handles,
+//* enums with their fixed underlying type and forward declared structs.
+
+#ifndef VKCPP_{{extension.name.SNAKE_CASE()}}_FWD_H_
+#define VKCPP_{{extension.name.SNAKE_CASE()}}_FWD_H_
+
+{% for extension in required_extensions %}
+    #include "{{extension.filename}}Fwd.h"
+{% endfor %}
+
+#include <cstddef>
+#include <cstdint>
+
+namespace vk {
+
+    {% if extension.is_main %}
+        class NonDispatchableHandle {
+            public:
+                NonDispatchableHandle() : handle(0) {}
+                NonDispatchableHandle(std::nullptr_t) : handle(0) {}
+                uint64_t GetHandle() const {return handle;}
+            private:
+                uint64_t handle;
+        };
+
+    {% endif %}
+    {% for type in base_types %}
+        using {{type.name.Typename()}} = {{type.base_type.name.Typename()}};
+    {% endfor %}
+
+    {% for enum in enum_types %}
+        enum class {{enum.name.Typename()}}: int32_t;
+    {% endfor %}
+    {% for bitmask in bitmask_types %}
+        enum class {{bitmask.name.Typename()}}: int32_t;
+    {% endfor %}
+
+    {% for typ in handle_types %}
+        {% if typ.dispatchable %}
+            using {{typ.name.Typename()}} = class {{typ.name.Typename()}}Impl*;
+        {% else %}
+            class {{typ.name.Typename()}} : public NonDispatchableHandle {
+                using NonDispatchableHandle::NonDispatchableHandle;
+            };
+        {% endif %}
+
+    {% endfor %}
+    {% for type in struct_types %}
+        {{'union' if type.is_union else 'struct'}} {{type.name.Typename()}};
+    {% endfor %}
+}
+
+#endif // VKCPP_{{extension.name.SNAKE_CASE()}}_FWD_H_
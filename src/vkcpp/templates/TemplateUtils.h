@@ -61,6 +61,15 @@
         {%- else -%}
             {{annotated.name.camelCase()}}[{{annotated.integral_count}}]
         {%- endif %}
+        {%- for dimension in annotated.extra_dimensions -%}
+            {%- if dimension is number -%}
+                [{{dimension}}]
+            {%- else -%}
+                [{{dimension.CamelCase()}}]
+            {%- endif -%}
+        {%- endfor %}
+    {%- elif annotated.bitfield_width != None -%}
+        {{annotated.name.camelCase()}} : {{annotated.bitfield_width}}
     {%- else -%}
         {{annotated.name.camelCase()}}
     {%- endif -%}
@@ -0,0 +1,98 @@
+// PrototypeRenderer BSD Source Code
+// Copyright (c) 2013-2016, Daemon Developers
+// All rights reserved.
+// 
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//     * Redistributions of source code must retain the above copyright
+//       notice, this list of conditions and the following disclaimer.
+//     * Redistributions in binary form must reproduce the above copyright
+//       notice, this list of conditions and the following disclaimer in the
+//       documentation and/or other materials provided with the distribution.
+//     * Neither the name of the Daemon developers nor the
+//       names of its contributors may be used to endorse or promote products
+//       derived from this software without specific prior written permission.
+// 
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+// ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+// WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL DAEMON DEVELOPERS BE LIABLE FOR ANY
+// DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+// (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+// LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+// ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+// SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#include "gtest/gtest.h"
+
+#include "vkcpp/CallProfiler.h"
+
+#include <cstring>
+#include <thread>
+
+namespace {
+
+    const vk::CallProfiler::CommandStats* FindCommand(const std::vector<vk::CallProfiler::CommandStats>& snapshot, const char* name) {
+        for (const auto& stats : snapshot) {
+            if (strcmp(stats.name, name) == 0) {
+                return &stats;
+            }
+        }
+        return nullptr;
+    }
+
+}
+
+TEST(CallProfilerTests, CountsCalls) {
+    uint32_t command = vk::CallProfiler::RegisterCommand("vkProfilerTestCountsCalls");
+    ASSERT_EQ(command, vk::CallProfiler::RegisterCommand("vkProfilerTestCountsCalls"));
+    vk::CallProfiler::Reset();
+
+    vk::CallProfiler::Record(command, 10);
+    vk::CallProfiler::Record(command, 32);
+
+    auto snapshot = vk::CallProfiler::Snapshot();
+    const auto* stats = FindCommand(snapshot, "vkProfilerTestCountsCalls");
+    ASSERT_NE(nullptr, stats);
+    ASSERT_EQ(2, stats->calls);
+    ASSERT_EQ(42, stats->nanoseconds);
+}
+
+TEST(CallProfilerTests, SnapshotAndReset) {
+    uint32_t command = vk::CallProfiler::RegisterCommand("vkProfilerTestSnapshotAndReset");
+    vk::CallProfiler::Reset();
+
+    {
+        vk::CallProfiler::ScopedCall call(command);
+    }
+    auto snapshot = vk::CallProfiler::SnapshotAndReset();
+    ASSERT_EQ(1, FindCommand(snapshot, "vkProfilerTestSnapshotAndReset")->calls);
+
+    snapshot = vk::CallProfiler::Snapshot();
+    ASSERT_EQ(0, FindCommand(snapshot, "vkProfilerTestSnapshotAndReset")->calls);
+    ASSERT_EQ(0, FindCommand(snapshot, "vkProfilerTestSnapshotAndReset")->nanoseconds);
+}
+
+TEST(CallProfilerTests, CountsCallsOfAllThreads) {
+    uint32_t command = vk::CallProfiler::RegisterCommand("vkProfilerTestThreads");
+    vk::CallProfiler::Reset();
+
+    // The counts of the threads are kept after they exit.
+    std::vector<std::thread> threads;
+    for (int i = 0; i < 4; i++) {
+        threads.emplace_back([command]() {
+            for (int j = 0; j < 1000; j++) {
+                vk::CallProfiler::Record(command, 1);
+            }
+        });
+    }
+    for (auto& thread : threads) {
+        thread.join();
+    }
+    vk::CallProfiler::Record(command, 1);
+
+    auto snapshot = vk::CallProfiler::Snapshot();
+    ASSERT_EQ(4001, FindCommand(snapshot, "vkProfilerTestThreads")->calls);
+    ASSERT_EQ(4001, FindCommand(snapshot, "vkProfilerTestThreads")->nanoseconds);
+}
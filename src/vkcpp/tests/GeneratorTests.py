@@ -0,0 +1,861 @@
+#!/usr/bin/python
+
+# PrototypeRenderer Source Code
+# Copyright (c) 2014-2016, Daemon Developers
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Daemon CBSE nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Tests for the VkCPP generator, run them with "python tests/GeneratorTests.py".
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree
+
+VKCPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, VKCPP_DIR)
+sys.path.insert(0, os.path.join(VKCPP_DIR, 'benchmarks'))
+
+import generate
+import synthetic_registry
+
+VK_XML = os.path.join(VKCPP_DIR, 'vk.xml')
+TEMPLATE_DIR = os.path.join(VKCPP_DIR, 'templates')
+EXTENSION_LIST = os.path.join(VKCPP_DIR, 'ExtensionList.txt')
+
+def render_all(types, constants, extensions):
+    env = generate.create_environment(TEMPLATE_DIR)
+    outputs = {}
+    for render in generate.compute_files_to_render(types, constants, extensions, 'out'):
+        outputs[render.output] = generate.render_file(env, render)
+    return outputs
+
+class RegistryReaderTests(unittest.TestCase):
+    def test_streaming_matches_dom(self):
+        dom = render_all(*generate.parse_vulkan_xml(VK_XML, streaming=False))
+        streaming = render_all(*generate.parse_vulkan_xml(VK_XML, streaming=True))
+
+        self.assertEqual(sorted(dom.keys()), sorted(streaming.keys()))
+        for output in dom:
+            self.assertEqual(dom[output], streaming[output], output)
+
+def parse_member(text):
+    member = generate.AnnotatedTypeAndName()
+    member.parse_regular_parameter(xml.etree.ElementTree.fromstring('<member>%s</member>' % text))
+    return member
+
+class DeclaratorTests(unittest.TestCase):
+    def test_annotations(self):
+        cases = [
+            ('<type>uint32_t</type> <name>count</name>', ''),
+            ('const <type>void</type>* <name>pNext</name>', 'const*'),
+            ('<type>void</type>** <name>ppData</name>', '**'),
+            ('const <type>char</type>* const* <name>ppNames</name>', 'const*const*'),
+            ('struct <type>wl_display</type>* <name>display</name>', 'struct*'),
+            ('const <type>float</type> <name>blendConstants</name>[4]', 'const[]'),
+        ]
+        for (text, annotation) in cases:
+            self.assertEqual(parse_member(text).annotation, annotation, text)
+
+    def test_arrays(self):
+        member = parse_member('<type>float</type> <name>matrix</name>[3][4]')
+        self.assertEqual((member.annotation, member.integral_count, member.extra_dimensions), ('[]', 3, [4]))
+
+        member = parse_member('<type>char</type> <name>deviceName</name>[<enum>VK_MAX_PHYSICAL_DEVICE_NAME_SIZE</enum>]')
+        self.assertEqual(member.annotation, '[]')
+        self.assertEqual(member.constant_count.SNAKE_CASE(), 'MAX_PHYSICAL_DEVICE_NAME_SIZE')
+
+    def test_bitfields(self):
+        member = parse_member('<type>uint32_t</type> <name>mask</name>:8<comment>Comments are skipped</comment>')
+        self.assertEqual((member.annotation, member.bitfield_width), ('', 8))
+
+        env = generate.create_environment(TEMPLATE_DIR)
+        template = env.from_string("{% import 'TemplateUtils.h' as utils %}{{utils.annotated_name(member)}}")
+        self.assertEqual(template.render(member=member), 'mask : 8')
+
+    def test_errors(self):
+        for text in ['<type>uint32_t</type> <name>count</name>[', 'volatile <type>uint32_t</type> <name>count</name>',
+                     '<type>uint32_t</type> <name>count</name>;', 'const <type>uint32_t</type>** <name>count</name>']:
+            with self.assertRaises(generate.RegistryParseError):
+                parse_member(text)
+
+    def test_funcpointer_params(self):
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML)
+        reallocation = [typ for typ in types if typ.name.Typename() == 'ReallocationFunctionFnPtr'][0]
+        params = reallocation.params
+        self.assertEqual([(param.annotation, param.name.camelCase()) for param in params],
+            [('*', 'pUserData'), ('*', 'pOriginal'), ('', 'size'), ('', 'alignment'), ('', 'allocationScope')])
+
+class DispatchTests(unittest.TestCase):
+    def test_command_dispatch_levels(self):
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML)
+        dispatch = {}
+        for extension in extensions:
+            for function in extension.required_functions:
+                dispatch[function.name.camelCase()] = function.dispatch
+
+        self.assertEqual(sorted(name for (name, level) in dispatch.items() if level == 'global'),
+            ['createInstance', 'enumerateInstanceExtensionProperties', 'enumerateInstanceLayerProperties'])
+        self.assertEqual(dispatch['enumeratePhysicalDevices'], 'instance')
+        self.assertEqual(dispatch['createDevice'], 'instance')
+        self.assertEqual(dispatch['queueSubmit'], 'device')
+        self.assertEqual(dispatch['cmdDraw'], 'device')
+        self.assertEqual(dispatch['acquireNextImageKHR'], 'device')
+
+class PerfectHashTests(unittest.TestCase):
+    def test_hash_is_stable(self):
+        # FunctionLoader::HashFunctionName has to give the same values.
+        self.assertEqual(0xab3e7c0b, generate.function_name_hash(0, ''))
+        self.assertEqual(0x1a80b1b3, generate.function_name_hash(0, 'a'))
+
+    def test_every_name_has_its_own_slot(self):
+        names = ['vkFunction%d' % i for i in range(300)] + ['vkCreateInstance', 'vkCmdDraw']
+        (displacements, slots) = generate.build_perfect_hash(names)
+
+        self.assertEqual(len(names), len(displacements))
+        self.assertEqual(sorted(names), sorted(slots))
+        for name in names:
+            self.assertEqual(name, slots[generate.perfect_hash_slot(displacements, name)])
+
+    def test_empty(self):
+        self.assertEqual(([], []), generate.build_perfect_hash([]))
+
+    def test_loaded_function_table(self):
+        (types, constants, extensions) = generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, None)
+        table = generate.loaded_function_table(extensions)
+        self.assertEqual([extension.filename for extension in extensions], table['loaded_function_extensions'])
+
+        # Each function leads to the slot of its loader's table with a single lookup.
+        displacements = table['loaded_function_displacements']
+        entries = table['loaded_function_entries']
+        self.assertEqual(sum(len(extension.required_functions) for extension in extensions), len(entries))
+        for (index, extension) in enumerate(extensions):
+            (_, slots) = generate.function_hash_table(extension)
+            for (slot, (name, function)) in enumerate(slots):
+                self.assertEqual((name, index, slot), entries[generate.perfect_hash_slot(displacements, name)])
+
+class SyntheticRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_synthetic_registry_is_generated(self):
+        xml = os.path.join(self.directory, 'synthetic.xml')
+        counts = synthetic_registry.counts_for_scale(0.5)
+        synthetic_registry.write_synthetic_registry(xml, counts)
+
+        (types, constants, extensions) = generate.parse_vulkan_xml(xml)
+        self.assertEqual(len(extensions), counts['extensions'] + 1)
+        self.assertEqual(len([typ for typ in types if isinstance(typ, generate.StructType)]), counts['structs'])
+
+        outputs = render_all(types, constants, extensions)
+        self.assertEqual(len(outputs), 4 * len(extensions))
+
+class FakeType:
+    def __init__(self, name, *required):
+        self.name = generate.Name(generate.split_CamelCase(name))
+        self.required = list(required)
+
+    def required_types(self):
+        return self.required
+
+class TopologicalSortTests(unittest.TestCase):
+    def sorted_names(self, types):
+        return [typ.name.concatcase() for typ in generate.sort_types_topologically(types)]
+
+    def test_alphabetical_when_possible(self):
+        c = FakeType('VkC')
+        a = FakeType('VkA', c)
+        b = FakeType('VkB')
+        d = FakeType('VkD', FakeType('VkNotSorted'))
+        self.assertEqual(['VkB', 'VkC', 'VkD', 'VkA'], self.sorted_names([d, c, b, a]))
+
+    # Types are grouped by dependency depth, like the generator always did, so that the order of the
+    # generated definitions only changes when the dependencies do.
+    def test_grouped_by_depth(self):
+        z = FakeType('VkZ')
+        y = FakeType('VkY', z)
+        a = FakeType('VkA', y)
+        b = FakeType('VkB', z)
+        self.assertEqual(['VkZ', 'VkB', 'VkY', 'VkA'], self.sorted_names([a, b, y, z]))
+
+    def test_self_reference_is_ignored(self):
+        a = FakeType('VkA')
+        a.required.append(a)
+        self.assertEqual(['VkA'], self.sorted_names([a]))
+
+    def test_cycle_is_an_error(self):
+        a = FakeType('VkA')
+        b = FakeType('VkB', a)
+        a.required.append(b)
+        with self.assertRaises(generate.DependencyCycleError):
+            generate.sort_types_topologically([a, b, FakeType('VkC')])
+
+class RenderTests(unittest.TestCase):
+    def test_linking_chosen_extensions_matches_linking_all(self):
+        extension_names = generate.read_extension_list(EXTENSION_LIST)
+
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML)
+        extensions = generate.choose_extensions(extension_names, extensions)
+        everything_linked = render_all(types, constants, extensions)
+
+        chosen_linked = render_all(*generate.parse_vulkan_xml(VK_XML, extension_names))
+        self.assertEqual(everything_linked, chosen_linked)
+
+    def test_parallel_rendering_is_deterministic(self):
+        registry = generate.parse_vulkan_xml(VK_XML)
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+
+        serial = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 1))
+        parallel = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 3))
+        self.assertEqual(serial, parallel)
+
+    # The workers compute their own list of renders, it must be the same as the parent's.
+    def test_parallel_unity_rendering(self):
+        registry = generate.parse_vulkan_xml(VK_XML, generate.read_extension_list(EXTENSION_LIST))
+        to_render = generate.compute_files_to_render(*registry, output_dir='out', unity=3)
+        indices = [index for index in range(len(to_render)) if index % 2 == 0]
+
+        serial = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 1, indices=indices, unity=3))
+        parallel = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 3, indices=indices, unity=3))
+        self.assertEqual(serial, parallel)
+
+    def test_call_profiling_only_changes_the_wrappers(self):
+        registry = generate.parse_vulkan_xml(VK_XML, ['Vulkan'])
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+        profiled_to_render = generate.compute_files_to_render(*registry, output_dir='out', call_profiling=True)
+
+        default = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 1))
+        profiled = list(generate.render_files(TEMPLATE_DIR, 'out', registry, profiled_to_render, 2, call_profiling=True))
+        for (render, content, profiled_content) in zip(to_render, default, profiled):
+            self.assertNotIn('CallProfiler', content)
+            if render.template == 'Extension.cpp':
+                self.assertIn('CallProfiler::RegisterCommand("vkCreateInstance")', profiled_content)
+            else:
+                self.assertEqual(content, profiled_content)
+
+    def test_only_lazy_loading_wrappers_resolve(self):
+        registry = generate.parse_vulkan_xml(VK_XML, ['Vulkan'])
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+        lazy_to_render = generate.compute_files_to_render(*registry, output_dir='out', lazy_loading=True)
+
+        eager = list(generate.render_files(TEMPLATE_DIR, 'out', registry, to_render, 1))
+        lazy = list(generate.render_files(TEMPLATE_DIR, 'out', registry, lazy_to_render, 2, lazy_loading=True))
+        for (render, content, lazy_content) in zip(to_render, eager, lazy):
+            if render.template == 'Extension.cpp':
+                self.assertNotIn('Resolve(', content)
+                self.assertIn('createInstance_.load(std::memory_order_relaxed)', content)
+                self.assertIn('Resolve(createInstance_, "vkCreateInstance", true)', lazy_content)
+
+class ManifestTests(unittest.TestCase):
+    def test_manifest_matches_rendered_files(self):
+        args = argparse.Namespace(xml=[VK_XML], extensions=EXTENSION_LIST, template_dir=TEMPLATE_DIR, output_dir='out', unity=0, usage=None, usage_sources=None)
+        (dependencies, outputs) = generate.compute_manifest(args, None)
+
+        extension_names = generate.read_extension_list(EXTENSION_LIST)
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML, extension_names)
+        to_render = generate.compute_files_to_render(types, constants, extensions, 'out')
+
+        self.assertEqual(sorted(render.output for render in to_render), outputs)
+        for render in to_render:
+            self.assertIn(os.path.join(TEMPLATE_DIR, render.template), dependencies)
+        self.assertIn(os.path.join(TEMPLATE_DIR, 'TemplateUtils.h'), dependencies)
+
+    def test_unity_manifest_matches_rendered_files(self):
+        args = argparse.Namespace(xml=[VK_XML], extensions=EXTENSION_LIST, template_dir=TEMPLATE_DIR, output_dir='out', unity=4, usage=None, usage_sources=None)
+        (dependencies, outputs) = generate.compute_manifest(args, None)
+
+        extension_names = generate.read_extension_list(EXTENSION_LIST)
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML, extension_names)
+        to_render = generate.compute_files_to_render(types, constants, extensions, 'out', unity=4)
+
+        self.assertEqual(sorted(set(render.output for render in to_render)), outputs)
+        sources = [output for output in outputs if output.endswith('.cpp')]
+        self.assertEqual(sorted(['out/VkCppUnity%d.cpp' % i for i in range(4)] + ['out/VkCppUnity%dChecks.cpp' % i for i in range(4)]), sources)
+
+        # The checks of an extension are in the Checks variant of the unity file of its loader.
+        checks = [render.output for render in to_render if render.template == 'ExtensionChecks.cpp']
+        loaders = [render.output for render in to_render if render.template == 'Extension.cpp']
+        self.assertEqual([loader.replace('.cpp', 'Checks.cpp') for loader in loaders], checks)
+
+    def test_check_sources_are_listed_separately(self):
+        outputs = ['out/Vulkan.cpp', 'out/Vulkan.h', 'out/VulkanChecks.cpp', 'out/VkCppUnity0.cpp', 'out/VkCppUnity0Checks.cpp']
+        manifest = generate.format_manifest('cmake', ['vk.xml'], outputs)
+        self.assertIn('set(VKCPP_OUTPUTS "' + ';'.join(outputs) + '")', manifest)
+        self.assertIn('set(VKCPP_CHECK_SOURCES "out/VulkanChecks.cpp;out/VkCppUnity0Checks.cpp")', manifest)
+
+class ProfilerTests(unittest.TestCase):
+    def test_profile_of_registry_parse(self):
+        profiler = generate.Profiler()
+        try:
+            registry = generate.parse_vulkan_xml(VK_XML, generate.read_extension_list(EXTENSION_LIST), profiler=profiler)
+            profiler.count_objects()
+        finally:
+            profiler.finish()
+
+        self.assertEqual([stage['name'] for stage in profiler.stages], ['parse', 'choose_extensions', 'link'])
+        self.assertGreater(profiler.stages[0]['memory_peak'], 0)
+        self.assertGreater(profiler.object_counts['Name'], 0)
+        self.assertGreater(profiler.object_counts['StructMember'], 0)
+        self.assertIn('"objects"', profiler.to_json())
+
+class TemplateCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template_dir = os.path.join(self.directory, 'templates')
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        shutil.copytree(TEMPLATE_DIR, self.template_dir)
+        os.makedirs(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Returns the source and the number of times it was preprocessed.
+    def load(self, template, generator_filename=None):
+        loader = generate.PreprocessingLoader(self.template_dir, self.cache_dir, generator_filename)
+        calls = []
+        preprocess = loader.preprocess
+        def counted_preprocess(source):
+            calls.append(source)
+            return preprocess(source)
+        loader.preprocess = counted_preprocess
+
+        (source, path, uptodate) = loader.get_source(template)
+        return (source, len(calls))
+
+    def cached_entries(self):
+        return [filename for filename in os.listdir(self.cache_dir) if filename.startswith('preprocessed-')]
+
+    def test_warm_run_uses_the_cache(self):
+        (source, count) = self.load('Extension.h')
+        self.assertEqual(1, count)
+        self.assertEqual(1, len(self.cached_entries()))
+
+        self.assertEqual((source, 0), self.load('Extension.h'))
+
+    def test_edited_template_is_preprocessed_again(self):
+        (source, count) = self.load('Extension.h')
+        with open(os.path.join(self.template_dir, 'Extension.h'), 'a') as f:
+            f.write('// Edited\n')
+
+        (edited_source, count) = self.load('Extension.h')
+        self.assertEqual(1, count)
+        self.assertEqual(source + '// Edited\n', edited_source)
+        # The entry of the previous version is removed.
+        self.assertEqual(1, len(self.cached_entries()))
+
+    def test_generator_change_invalidates_the_cache(self):
+        generator_filename = os.path.join(self.directory, 'generate.py')
+        shutil.copy(os.path.join(VKCPP_DIR, 'generate.py'), generator_filename)
+        self.assertEqual(1, self.load('Extension.h', generator_filename)[1])
+        self.assertEqual(0, self.load('Extension.h', generator_filename)[1])
+
+        with open(generator_filename, 'a') as f:
+            f.write('# Changed preprocessing\n')
+        self.assertEqual(1, self.load('Extension.h', generator_filename)[1])
+
+    def test_entry_removed_by_another_worker(self):
+        self.load('Extension.h')
+        with open(os.path.join(self.template_dir, 'Extension.h'), 'a') as f:
+            f.write('// Edited\n')
+
+        # Another worker removes the previous entry between the listing and the removal.
+        listdir = os.listdir
+        def listdir_then_remove(path):
+            filenames = listdir(path)
+            for filename in filenames:
+                os.remove(os.path.join(path, filename))
+            return filenames
+        os.listdir = listdir_then_remove
+        try:
+            self.assertEqual(1, self.load('Extension.h')[1])
+        finally:
+            os.listdir = listdir
+
+    def test_template_timings(self):
+        registry = generate.parse_vulkan_xml(VK_XML, ['Vulkan'])
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+
+        for jobs in [1, 2]:
+            timings = generate.TemplateTimings()
+            list(generate.render_files(self.template_dir, 'out', registry, to_render, jobs, self.cache_dir, timings))
+
+            self.assertEqual(dict((render.template, 1) for render in to_render), timings.render_counts)
+            # TemplateUtils.h is loaded when the templates importing it are rendered.
+            self.assertIn('TemplateUtils.h', timings.load_times)
+            self.assertIn('MainExtension.h', timings.report())
+
+class RegistryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def copy(self, path, extra_content=''):
+        with open(path) as f:
+            content = f.read()
+        copy = os.path.join(self.directory, os.path.basename(path))
+        with open(copy, 'w') as f:
+            f.write(content + extra_content)
+        return copy
+
+    def cache_entries(self):
+        return sorted(filename for filename in os.listdir(self.cache_dir) if filename.endswith('.pickle'))
+
+    def test_cache_hit(self):
+        registry = generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, self.cache_dir)
+        key = generate.registry_cache_key(VK_XML, EXTENSION_LIST)
+        cached = generate.RegistryCache(self.cache_dir).load(key)
+        self.assertNotEqual(None, cached)
+        self.assertEqual(render_all(*registry), render_all(*cached))
+
+    def test_key_covers_the_inputs(self):
+        key = generate.registry_cache_key(VK_XML, EXTENSION_LIST)
+        self.assertEqual(key, generate.registry_cache_key(VK_XML, EXTENSION_LIST))
+
+        modified_keys = [
+            generate.registry_cache_key(self.copy(VK_XML, '<!-- Edited -->\n'), EXTENSION_LIST),
+            generate.registry_cache_key(VK_XML, self.copy(EXTENSION_LIST, 'KHRDisplay\n')),
+            generate.registry_cache_key(VK_XML, EXTENSION_LIST, generator_filename=self.copy(os.path.join(VKCPP_DIR, 'generate.py'), '\n')),
+            generate.registry_cache_key(VK_XML, EXTENSION_LIST, usage=['Device']),
+            generate.registry_cache_key(VK_XML, None),
+        ]
+        self.assertNotIn(key, modified_keys)
+        self.assertEqual(len(modified_keys), len(set(modified_keys)))
+
+    def test_corrupt_entry_is_a_miss(self):
+        generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, self.cache_dir)
+        cache = generate.RegistryCache(self.cache_dir)
+        key = generate.registry_cache_key(VK_XML, EXTENSION_LIST)
+        with open(cache.path_for(key), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertEqual(None, cache.load(key))
+
+        # The registry is parsed again and the entry replaced.
+        registry = generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, self.cache_dir)
+        self.assertNotEqual(None, cache.load(key))
+        self.assertEqual(render_all(*registry), render_all(*cache.load(key)))
+
+    def test_keys_used_alternately_are_kept(self):
+        generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, self.cache_dir)
+        generate.load_vulkan_registry(VK_XML, None, self.cache_dir)
+        self.assertEqual(2, len(self.cache_entries()))
+
+        for i in range(generate.RegistryCache.max_entries + 1):
+            generate.RegistryCache(self.cache_dir).store('key%d' % i, None)
+        self.assertEqual(generate.RegistryCache.max_entries, len(self.cache_entries()))
+
+    # The script and the imported module pickle different classes, a cache written by one must not
+    # be loaded by the other.
+    def test_script_and_module_caches_are_separate(self):
+        output_dir = os.path.join(self.directory, 'out')
+        command = [sys.executable, os.path.join(VKCPP_DIR, 'generate.py'), VK_XML, '-t', TEMPLATE_DIR, '-e', EXTENSION_LIST,
+                   '-o', output_dir, '-c', self.cache_dir, '--no-cache']
+        subprocess.check_output(command)
+        with open(os.path.join(output_dir, 'Vulkan.h')) as f:
+            expected = f.read()
+
+        command.remove('--no-cache')
+        subprocess.check_output(command)
+        registry = generate.load_vulkan_registry(VK_XML, EXTENSION_LIST, self.cache_dir)
+        self.assertTrue(all(isinstance(extension, generate.Extension) for extension in registry[2]))
+        self.assertEqual(2, len(self.cache_entries()))
+
+        os.remove(os.path.join(output_dir, 'Vulkan.h'))
+        subprocess.check_output(command)
+        with open(os.path.join(output_dir, 'Vulkan.h')) as f:
+            self.assertEqual(expected, f.read())
+
+class DeterminismTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Runs the generator in a new interpreter with the given hash seed, returns the content of all
+    # the files it wrote and its manifest.
+    def generate_with_hash_seed(self, seed, jobs):
+        output_dir = os.path.join(self.directory, 'seed%d' % seed)
+        env = dict(os.environ)
+        env['PYTHONHASHSEED'] = str(seed)
+        command = [sys.executable, os.path.join(VKCPP_DIR, 'generate.py'), VK_XML, '-t', TEMPLATE_DIR, '-o', output_dir, '--no-cache']
+
+        subprocess.check_output(command + ['-j', str(jobs)], env=env)
+        manifest = subprocess.check_output(command + ['--print-manifest', 'cmake'], env=env)
+
+        files = {}
+        for (directory, _, filenames) in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, output_dir)] = f.read()
+        return (files, manifest.replace(output_dir.encode(), b'OUTPUT_DIR'))
+
+    def test_output_does_not_depend_on_hash_seed(self):
+        (files, manifest) = self.generate_with_hash_seed(1, 1)
+        (other_files, other_manifest) = self.generate_with_hash_seed(2, 2)
+
+        self.assertEqual(sorted(files.keys()), sorted(other_files.keys()))
+        for filename in files.keys():
+            self.assertEqual(files[filename], other_files[filename], filename + ' differs between the runs')
+        self.assertEqual(manifest, other_manifest)
+
+class OutputTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_if_changed(self):
+        path = os.path.join(self.directory, 'sub', 'File.h')
+
+        self.assertTrue(generate.write_if_changed(path, 'foo\n'))
+        os.utime(path, (0, 0))
+
+        # Same content, the file isn't touched.
+        self.assertFalse(generate.write_if_changed(path, 'foo\n'))
+        self.assertEqual(0, os.path.getmtime(path))
+
+        self.assertTrue(generate.write_if_changed(path, 'bar\n'))
+        with open(path) as f:
+            self.assertEqual('bar\n', f.read())
+
+        # No temporary files are left behind.
+        self.assertEqual(['File.h'], os.listdir(os.path.dirname(path)))
+
+class TreeShakingTests(unittest.TestCase):
+    def setUp(self):
+        self.extension_names = generate.read_extension_list(EXTENSION_LIST)
+
+    def test_only_the_used_closure_is_kept(self):
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML, self.extension_names, usage=['CreateInstance', 'vkGetPhysicalDeviceSurfaceSupportKHR'])
+        by_filename = dict((extension.filename, extension) for extension in extensions)
+
+        vulkan = by_filename['Vulkan']
+        self.assertEqual(['CreateInstance'], [function.name.CamelCase() for function in vulkan.required_functions])
+        vulkan_types = set(typ.name.Typename() for typ in vulkan.required_types)
+        # The parameters of the used commands and the types they need, and the Device of the dispatch tables.
+        for name in ['InstanceCreateInfo', 'ApplicationInfo', 'AllocationCallbacks', 'PhysicalDevice', 'Device', 'StructureType']:
+            self.assertIn(name, vulkan_types)
+        self.assertNotIn('ColorComponentFlags', vulkan_types)
+
+        surface = by_filename['KHRSurface']
+        self.assertEqual(['GetPhysicalDeviceSurfaceSupportKHR'], [function.name.CamelCase() for function in surface.required_functions])
+
+        # Shaken off extensions keep their header dependencies and device dispatch tables.
+        swapchain = by_filename['KHRSwapchain']
+        self.assertEqual([], swapchain.required_functions)
+        self.assertEqual(['KHRSurface', 'Vulkan'], [extension.filename for extension in swapchain.required_extensions])
+        self.assertTrue(generate.extension_template_args(types, constants, swapchain)['device_dispatch'])
+
+    def test_using_everything_renders_the_same(self):
+        (types, constants, extensions) = generate.parse_vulkan_xml(VK_XML, self.extension_names)
+        everything = render_all(types, constants, extensions)
+
+        usage = set()
+        for typ in types:
+            usage.add(typ.name.Typename())
+        for extension in extensions:
+            for function in extension.required_functions:
+                usage.add(function.name.CamelCase())
+        self.assertEqual(everything, render_all(*generate.parse_vulkan_xml(VK_XML, self.extension_names, usage=sorted(usage))))
+
+    def test_read_usage(self):
+        directory = tempfile.mkdtemp()
+        try:
+            usage_list = os.path.join(directory, 'usage.txt')
+            with open(usage_list, 'w') as f:
+                f.write('# Types\nvk::InstanceCreateInfo\n\nvkCreateInstance  # C name\n')
+            self.assertEqual(set(['InstanceCreateInfo', 'vkCreateInstance']), generate.read_usage_list(usage_list))
+
+            os.mkdir(os.path.join(directory, 'src'))
+            with open(os.path.join(directory, 'src', 'Renderer.cpp'), 'w') as f:
+                f.write('namespace vk {\n    Result r = vk.CreateDevice(device, &info, nullptr, &out);\n}\n')
+            with open(os.path.join(directory, 'src', 'notes.txt'), 'w') as f:
+                f.write('DestroyDevice\n')
+            usage = generate.scan_usage_sources([os.path.join(directory, 'src')])
+            self.assertTrue(set(['Result', 'CreateDevice', 'vk']).issubset(usage))
+            self.assertNotIn('DestroyDevice', usage)
+        finally:
+            shutil.rmtree(directory)
+
+class FingerprintTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fingerprints(self, xml_filename):
+        registry = generate.parse_vulkan_xml(xml_filename, generate.read_extension_list(EXTENSION_LIST))
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+        return generate.RenderFingerprints(TEMPLATE_DIR).output_fingerprints(to_render)
+
+    def test_registry_change_only_affects_its_extension(self):
+        fingerprints = self.fingerprints(VK_XML)
+        self.assertEqual(fingerprints, self.fingerprints(VK_XML))
+
+        # Rename a parameter of a KHR_swapchain command.
+        with open(VK_XML) as f:
+            xml = f.read()
+        command = xml.index('<name>vkAcquireNextImageKHR</name>')
+        timeout = xml.index('<name>timeout</name>', command)
+        modified_xml = os.path.join(self.directory, 'vk.xml')
+        with open(modified_xml, 'w') as f:
+            f.write(xml[:timeout] + '<name>timeoutNs</name>' + xml[timeout + len('<name>timeout</name>'):])
+
+        modified_fingerprints = self.fingerprints(modified_xml)
+        changed = [output for output in fingerprints.keys() if fingerprints[output] != modified_fingerprints[output]]
+        self.assertEqual(['out/KHRSwapchain.cpp', 'out/KHRSwapchain.h', 'out/KHRSwapchainChecks.cpp', 'out/KHRSwapchainFwd.h'], sorted(changed))
+
+    def test_generator_change_affects_all_outputs(self):
+        registry = generate.parse_vulkan_xml(VK_XML, ['Vulkan'])
+        to_render = generate.compute_files_to_render(*registry, output_dir='out')
+        fingerprints = generate.RenderFingerprints(TEMPLATE_DIR).output_fingerprints(to_render)
+
+        with open(os.path.join(VKCPP_DIR, 'generate.py')) as f:
+            source = f.read()
+        modified_generator = os.path.join(self.directory, 'generate.py')
+        with open(modified_generator, 'w') as f:
+            f.write(source.replace("return 'FnPtr'", "return 'FunctionPointer'"))
+
+        modified_fingerprints = generate.RenderFingerprints(TEMPLATE_DIR, modified_generator).output_fingerprints(to_render)
+        for output in fingerprints:
+            self.assertNotEqual(fingerprints[output], modified_fingerprints[output], output)
+
+    def test_renders_to_update(self):
+        registry = generate.parse_vulkan_xml(VK_XML, ['Vulkan'])
+        to_render = generate.compute_files_to_render(*registry, output_dir=self.directory)
+        fingerprints = generate.RenderFingerprints(TEMPLATE_DIR).output_fingerprints(to_render)
+        self.assertEqual([0, 1, 2, 3], generate.renders_to_update(to_render, self.directory, fingerprints, {}))
+
+        for render in to_render:
+            with open(render.output, 'w') as f:
+                f.write('')
+        manifest = os.path.join(self.directory, 'fingerprints.json')
+        generate.write_fingerprint_manifest(manifest, self.directory, fingerprints)
+        previous = generate.read_fingerprint_manifest(manifest)
+        self.assertEqual([], generate.renders_to_update(to_render, self.directory, fingerprints, previous))
+
+        # Missing outputs and outputs written since the manifest are rendered again even if their
+        # inputs didn't change.
+        os.remove(to_render[2].output)
+        with open(to_render[3].output, 'w') as f:
+            f.write('// Edited\n')
+        previous[os.path.relpath(to_render[0].output, self.directory)]['fingerprint'] = 'stale'
+        self.assertEqual([0, 2, 3], generate.renders_to_update(to_render, self.directory, fingerprints, previous))
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_config(self, config):
+        path = os.path.join(self.directory, 'batch.json')
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        return path
+
+    def read_outputs(self, output_dir):
+        outputs = {}
+        for filename in os.listdir(output_dir):
+            if filename != '.cache':
+                with open(os.path.join(output_dir, filename)) as f:
+                    outputs[filename] = f.read()
+        return outputs
+
+    def test_batch_matches_separate_runs(self):
+        with open(os.path.join(self.directory, 'Headless.txt'), 'w') as f:
+            f.write('Vulkan\n')
+        config = self.write_config({'targets': [
+            {'extensions': 'Headless.txt', 'output_dir': 'headless'},
+            {'extensions': EXTENSION_LIST, 'output_dir': 'client'},
+            {'extensions': EXTENSION_LIST, 'output_dir': 'unity', 'unity': 2},
+        ]})
+        targets = generate.read_batch_config(config, TEMPLATE_DIR)
+        self.assertEqual(os.path.join(self.directory, 'headless'), targets[0].output_dir)
+        self.assertEqual(EXTENSION_LIST, targets[1].extensions)
+
+        (results, render_count) = generate.generate_batch(VK_XML, targets)
+        self.assertEqual([(4, 0), (24, 0), (16, 0)], results)
+        # The Vulkan files are rendered once for all the targets except Vulkan.cpp that has the
+        # table of the functions of all the extensions, and the unity target reuses all the
+        # renders of the client target.
+        self.assertEqual(25, render_count)
+
+        for target in targets:
+            registry = generate.load_vulkan_registry(VK_XML, target.extensions, None)
+            separate_dir = target.output_dir + '-separate'
+            to_render = generate.compute_files_to_render(*registry, output_dir=separate_dir, unity=target.unity)
+            contents = generate.render_files(TEMPLATE_DIR, separate_dir, registry, to_render, 1)
+            generate.write_rendered_files(separate_dir, to_render, contents, generate.Profiler(enabled=False))
+            self.assertEqual(self.read_outputs(separate_dir), self.read_outputs(target.output_dir))
+
+    def test_batch_updates_the_fingerprints(self):
+        with open(os.path.join(self.directory, 'Headless.txt'), 'w') as f:
+            f.write('Vulkan\n')
+        targets = generate.read_batch_config(self.write_config({'targets': [
+            {'extensions': 'Headless.txt', 'output_dir': 'headless'},
+            {'extensions': 'Headless.txt', 'output_dir': 'profiled', 'call_profiling': True},
+        ]}), TEMPLATE_DIR)
+        cache_dir = os.path.join(self.directory, 'cache')
+        generate.generate_batch(VK_XML, targets, cache_dir)
+
+        # A normal generation of a target after the batch has nothing to render.
+        registry = generate.load_vulkan_registry(VK_XML, targets[1].extensions, cache_dir)
+        for target in targets:
+            to_render = generate.compute_files_to_render(*registry, output_dir=target.output_dir, call_profiling=target.call_profiling)
+            fingerprints = generate.RenderFingerprints(TEMPLATE_DIR).output_fingerprints(to_render)
+            previous = generate.read_fingerprint_manifest(generate.fingerprint_manifest_path(cache_dir, target.output_dir))
+            self.assertEqual([], generate.renders_to_update(to_render, target.output_dir, fingerprints, previous))
+
+    def test_invalid_configs(self):
+        for config in [[], {'targets': [{}]}, {'targets': [{'output_dir': 'out', 'extension': 'typo'}]}]:
+            with self.assertRaises(generate.BatchConfigError):
+                generate.read_batch_config(self.write_config(config), TEMPLATE_DIR)
+
+        with open(os.path.join(self.directory, 'Unknown.txt'), 'w') as f:
+            f.write('NotAnExtension\n')
+        targets = generate.read_batch_config(self.write_config({'targets': [{'extensions': 'Unknown.txt', 'output_dir': 'out'}]}), TEMPLATE_DIR)
+        with self.assertRaises(generate.BatchConfigError):
+            generate.generate_batch(VK_XML, targets)
+
+class WatchTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template_dir = os.path.join(self.directory, 'templates')
+        shutil.copytree(TEMPLATE_DIR, self.template_dir)
+        self.extension_list = os.path.join(self.directory, 'ExtensionList.txt')
+        with open(self.extension_list, 'w') as f:
+            f.write('Vulkan\n')
+
+        self.args = argparse.Namespace(xml=[VK_XML], extensions=self.extension_list, template_dir=self.template_dir,
+                                       output_dir=os.path.join(self.directory, 'out'), unity=0, call_profiling=False, lazy_loading=False,
+                                       usage=None, usage_sources=None)
+        registry = generate.load_vulkan_registry(VK_XML, self.extension_list, None)
+        to_render = generate.compute_files_to_render(*registry, output_dir=self.args.output_dir)
+        self.watcher = generate.Watcher(self.args, None, registry, to_render)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Changes the file and makes sure that its modification time changes.
+    def edit(self, path, extra_content):
+        mtime = os.path.getmtime(path)
+        with open(path, 'a') as f:
+            f.write(extra_content)
+        os.utime(path, (mtime + 10, mtime + 10))
+
+    def rendered_templates(self):
+        return sorted(set(render.template for render in self.watcher.check()))
+
+    def test_only_renders_what_changed(self):
+        self.assertEqual([], self.rendered_templates())
+
+        self.edit(os.path.join(self.template_dir, 'ExtensionChecks.cpp'), '// Edited\n')
+        self.assertEqual(['ExtensionChecks.cpp'], self.rendered_templates())
+        with open(os.path.join(self.args.output_dir, 'VulkanChecks.cpp')) as f:
+            self.assertIn('// Edited', f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.args.output_dir, 'Vulkan.cpp')))
+
+        # Imported templates affect the templates importing them.
+        self.edit(os.path.join(self.template_dir, 'TemplateUtils.h'), '\n')
+        self.assertEqual(['Extension.cpp', 'ExtensionChecks.cpp', 'MainExtension.h'], self.rendered_templates())
+        self.assertEqual([], self.rendered_templates())
+
+    def test_updates_the_fingerprints(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        watcher = generate.Watcher(self.args, cache_dir, self.watcher.registry, self.watcher.to_render)
+        checks_template = os.path.join(self.template_dir, 'ExtensionChecks.cpp')
+        with open(checks_template) as f:
+            original = f.read()
+
+        def renders_to_update():
+            fingerprints = generate.RenderFingerprints(self.template_dir).output_fingerprints(watcher.to_render)
+            previous = generate.read_fingerprint_manifest(generate.fingerprint_manifest_path(cache_dir, self.args.output_dir))
+            return [watcher.to_render[index].template for index in generate.renders_to_update(watcher.to_render, self.args.output_dir, fingerprints, previous)]
+
+        contents = (generate.render_file(watcher.env, render) for render in watcher.to_render)
+        generate.write_rendered_files(self.args.output_dir, watcher.to_render, contents, generate.Profiler(enabled=False))
+        self.edit(checks_template, '// Edited\n')
+        watcher.check()
+        self.assertEqual([], renders_to_update())
+
+        # Reverting the template after the watch stopped renders the edited output again.
+        with open(checks_template, 'w') as f:
+            f.write(original)
+        self.assertEqual(['ExtensionChecks.cpp'], renders_to_update())
+
+    def test_extension_list_change_relinks(self):
+        self.edit(self.extension_list, 'KHRSurface\n')
+        renders = self.watcher.check()
+        self.assertEqual(8, len(renders))
+        self.assertTrue(os.path.exists(os.path.join(self.args.output_dir, 'KHRSurface.h')))
+
+    def test_usage_change_reloads_the_registry(self):
+        usage_dir = os.path.join(self.directory, 'src')
+        os.mkdir(usage_dir)
+        with open(os.path.join(usage_dir, 'Renderer.cpp'), 'w') as f:
+            f.write('vk::Result r = vulkan.CreateInstance(&info, nullptr, &instance);\n')
+        self.args.usage_sources = [usage_dir]
+
+        registry = generate.load_vulkan_registry(VK_XML, self.extension_list, None, usage=generate.read_usage(self.args))
+        to_render = generate.compute_files_to_render(*registry, output_dir=self.args.output_dir)
+        watcher = generate.Watcher(self.args, None, registry, to_render)
+        self.assertEqual([], watcher.check())
+
+        def loader_source():
+            with open(os.path.join(self.args.output_dir, 'Vulkan.cpp')) as f:
+                return f.read()
+
+        self.edit(os.path.join(usage_dir, 'Renderer.cpp'), 'vulkan.DestroyInstance(instance, nullptr);\n')
+        self.assertEqual(4, len(watcher.check()))
+        self.assertIn('VulkanLoader::DestroyInstance', loader_source())
+        self.assertNotIn('VulkanLoader::CreateDevice', loader_source())
+
+        # New sources are watched too.
+        with open(os.path.join(usage_dir, 'Device.cpp'), 'w') as f:
+            f.write('vulkan.CreateDevice(physicalDevice, &info, nullptr, &device);\n')
+        self.assertEqual(4, len(watcher.check()))
+        self.assertIn('VulkanLoader::CreateDevice', loader_source())
+        self.assertEqual([], watcher.check())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,9 +28,13 @@
 
 #include "MockGetProc.h"
 #include "vkcpp/LoaderManager.h"
+#include "vkcpp/SmallVector.h"
 #include "vkcpp/Vulkan.h"
 #include "vkcpp/EXTDebugReport.h"
 
+#include <algorithm>
+#include <vector>
+
 class LoaderTests: public ::testing::Test {
     public:
         LoaderTests()
@@ -124,3 +128,184 @@ TEST_F(LoaderTests, CallingFunctions) {
     debugReport.DestroyDebugReportCallbackEXT(DDRInstance, DDRCallback, nullptr);
     ASSERT_TRUE(DDRCalled);
 }
+
+TEST_F(LoaderTests, DeviceDispatch) {
+    getProc.AddDefault("vkBeginCommandBuffer", reinterpret_cast<vk::UntypedFnptr>(MyBeginCommandBuffer));
+
+    manager.LoadGlobals();
+    manager.SetInstance(getProc.GetInstance());
+    size_t numGlobals = getProc.queriedGlobalProcs.size();
+    size_t numInstanceFunctions = getProc.queriedInstanceProcs.size();
+
+    vk::VulkanDeviceDispatch device(manager, getProc.GetDevice());
+
+    // Loading the device functions should only go through vkGetDeviceProcAddr
+    ASSERT_EQ(numGlobals, getProc.queriedGlobalProcs.size());
+    ASSERT_EQ(numInstanceFunctions, getProc.queriedInstanceProcs.size());
+
+    // Functions taking a VkDevice, VkQueue or VkCommandBuffer are device functions
+    ASSERT_EQ(1, getProc.queriedDeviceProcs.count("vkCreateBuffer"));
+    ASSERT_EQ(1, getProc.queriedDeviceProcs.count("vkQueueSubmit"));
+    ASSERT_EQ(1, getProc.queriedDeviceProcs.count("vkCmdPushConstants"));
+
+    // Global functions and functions taking a VkInstance or VkPhysicalDevice aren't
+    ASSERT_EQ(0, getProc.queriedDeviceProcs.count("vkCreateInstance"));
+    ASSERT_EQ(0, getProc.queriedDeviceProcs.count("vkEnumeratePhysicalDevices"));
+    ASSERT_EQ(0, getProc.queriedDeviceProcs.count("vkCreateDevice"));
+
+    // Check that the arguments are forwarded correctly through the dispatch table
+    BCBCalled = false;
+    BCBBuffer = reinterpret_cast<vk::CommandBufferImpl*>(this);
+    vk::Result result = device.BeginCommandBuffer(BCBBuffer, &BCBInfo);
+    ASSERT_TRUE(BCBCalled);
+    ASSERT_EQ(vk::Result::Incomplete, result);
+}
+
+TEST(LazyLoaderTests, LoadOnFirstCall) {
+    MockGetProc getProc;
+    vk::LoaderManager manager(getProc.GetVkGetProcAddress(), vk::LoadingMode::Lazy);
+    vk::VulkanLoader vulkan(&manager);
+
+    getProc.AddDefault("vkBeginCommandBuffer", reinterpret_cast<vk::UntypedFnptr>(MyBeginCommandBuffer));
+
+    manager.LoadGlobals();
+    manager.SetInstance(getProc.GetInstance());
+
+    // vkcpp_lazy_unittests is built with loaders generated with --lazy-loading.
+#ifdef VKCPP_TESTS_LAZY_LOADING
+    ASSERT_TRUE(vulkan.LoadsLazily());
+#endif
+
+    // Loaders generated without --lazy-loading are loaded eagerly in both modes.
+    if (!vulkan.LoadsLazily()) {
+        ASSERT_EQ(1, getProc.queriedInstanceProcs.count("vkBeginCommandBuffer"));
+        ASSERT_NE(1, getProc.queriedInstanceProcs.size());
+        return;
+    }
+
+    // Only the LoaderManager's vkGetDeviceProcAddr should have been looked up
+    ASSERT_TRUE(getProc.queriedGlobalProcs.empty());
+    ASSERT_EQ(1, getProc.queriedInstanceProcs.size());
+
+    // The first call looks the function up, the mock checks that the next ones don't
+    BCBBuffer = reinterpret_cast<vk::CommandBufferImpl*>(&getProc);
+    for (int i = 0; i < 2; i++) {
+        BCBCalled = false;
+        vk::Result result = vulkan.BeginCommandBuffer(BCBBuffer, &BCBInfo);
+        ASSERT_TRUE(BCBCalled);
+        ASSERT_EQ(vk::Result::Incomplete, result);
+    }
+    ASSERT_EQ(1, getProc.queriedInstanceProcs.count("vkBeginCommandBuffer"));
+    ASSERT_EQ(2, getProc.queriedInstanceProcs.size());
+}
+
+TEST_F(LoaderTests, GetFunctionByName) {
+    getProc.AddDefault("vkBeginCommandBuffer", reinterpret_cast<vk::UntypedFnptr>(MyBeginCommandBuffer));
+
+    manager.LoadGlobals();
+    manager.SetInstance(getProc.GetInstance());
+    size_t numInstanceFunctions = getProc.queriedInstanceProcs.size();
+
+    // The lookup returns the pointers that were already loaded without calling in the driver
+    ASSERT_EQ(reinterpret_cast<vk::UntypedFnptr>(MyBeginCommandBuffer), vulkan.GetFunction("vkBeginCommandBuffer"));
+    ASSERT_EQ(reinterpret_cast<vk::UntypedFnptr>(MyBeginCommandBuffer), manager.GetLoadedFunction("vkBeginCommandBuffer"));
+    ASSERT_EQ(numInstanceFunctions, getProc.queriedInstanceProcs.size());
+
+    // Every function of a loader can be found by its name
+    ASSERT_NE(nullptr, vulkan.GetFunction("vkCreateInstance"));
+    ASSERT_NE(nullptr, vulkan.GetFunction("vkCmdPushConstants"));
+    ASSERT_NE(nullptr, manager.GetLoadedFunction("vkCreateDebugReportCallbackEXT"));
+
+    // Unknown names and the functions of other loaders aren't found
+    ASSERT_EQ(nullptr, vulkan.GetFunction("vkNotAFunction"));
+    ASSERT_EQ(nullptr, vulkan.GetFunction(""));
+    ASSERT_EQ(nullptr, vulkan.GetFunction("vkCreateDebugReportCallbackEXT"));
+    ASSERT_EQ(nullptr, manager.GetLoadedFunction("vkNotAFunction"));
+    ASSERT_EQ(nullptr, manager.GetLoadedFunction(""));
+
+    // The manager only finds the functions of the extensions with a registered loader
+    ASSERT_EQ(nullptr, manager.GetLoadedFunction("vkAcquireNextImageKHR"));
+}
+
+// Variables used to communicate between MyEnumeratePhysicalDevices and the test
+uint32_t EPDAvailable = 0;
+uint32_t EPDAddedAfterQuery = 0;
+int EPDCalls = 0;
+
+vk::Result MyEnumeratePhysicalDevices(vk::Instance instance, uint32_t* count, vk::PhysicalDevice* devices) {
+    EPDCalls++;
+    if (devices == nullptr) {
+        *count = EPDAvailable;
+        // Simulate devices appearing between the two calls.
+        EPDAvailable += EPDAddedAfterQuery;
+        EPDAddedAfterQuery = 0;
+        return vk::Result::Success;
+    }
+
+    uint32_t written = std::min(*count, EPDAvailable);
+    for (uint32_t i = 0; i < written; i++) {
+        devices[i] = reinterpret_cast<vk::PhysicalDevice>(uintptr_t(i + 1));
+    }
+    *count = written;
+    return written < EPDAvailable ? vk::Result::Incomplete : vk::Result::Success;
+}
+
+TEST_F(LoaderTests, EnumerateIntoContainer) {
+    getProc.AddDefault("vkEnumeratePhysicalDevices", reinterpret_cast<vk::UntypedFnptr>(MyEnumeratePhysicalDevices));
+
+    manager.LoadGlobals();
+    manager.SetInstance(getProc.GetInstance());
+
+    // The array fits in the inline storage so it is filled without allocating, with two calls.
+    EPDAvailable = 3;
+    EPDCalls = 0;
+    vk::SmallVector<vk::PhysicalDevice, 4> devices;
+    ASSERT_EQ(vk::Result::Success, vulkan.EnumeratePhysicalDevices(getProc.GetInstance(), &devices));
+    ASSERT_EQ(2, EPDCalls);
+    ASSERT_EQ(3, devices.size());
+    ASSERT_EQ(4, devices.capacity());
+    for (uintptr_t i = 0; i < 3; i++) {
+        ASSERT_EQ(reinterpret_cast<vk::PhysicalDevice>(i + 1), devices[i]);
+    }
+
+    // When the array grows between the calls, the helper queries it again.
+    EPDAvailable = 3;
+    EPDAddedAfterQuery = 2;
+    EPDCalls = 0;
+    std::vector<vk::PhysicalDevice> allDevices;
+    ASSERT_EQ(vk::Result::Success, vulkan.EnumeratePhysicalDevices(getProc.GetInstance(), &allDevices));
+    ASSERT_EQ(4, EPDCalls);
+    ASSERT_EQ(5, allDevices.size());
+}
+
+// Variables used to communicate between MyGetPhysicalDeviceQueueFamilyProperties and the test
+uint32_t QFPCounted = 0;
+uint32_t QFPWritten = 0;
+
+void MyGetPhysicalDeviceQueueFamilyProperties(vk::PhysicalDevice physicalDevice, uint32_t* count, vk::QueueFamilyProperties* properties) {
+    if (properties == nullptr) {
+        *count = QFPCounted;
+        return;
+    }
+
+    uint32_t written = std::min(*count, QFPWritten);
+    for (uint32_t i = 0; i < written; i++) {
+        properties[i].queueCount = i + 1;
+    }
+    *count = written;
+}
+
+TEST_F(LoaderTests, EnumerateIntoContainerWithoutResult) {
+    getProc.AddDefault("vkGetPhysicalDeviceQueueFamilyProperties", reinterpret_cast<vk::UntypedFnptr>(MyGetPhysicalDeviceQueueFamilyProperties));
+
+    manager.LoadGlobals();
+    manager.SetInstance(getProc.GetInstance());
+
+    // The container is shrunk to the number of elements the second call wrote.
+    QFPCounted = 3;
+    QFPWritten = 2;
+    std::vector<vk::QueueFamilyProperties> properties;
+    vulkan.GetPhysicalDeviceQueueFamilyProperties(nullptr, &properties);
+    ASSERT_EQ(2, properties.size());
+    ASSERT_EQ(2, properties[1].queueCount);
+}
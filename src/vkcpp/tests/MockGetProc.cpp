@@ -43,15 +43,22 @@ vk::UntypedFnptr GetProcProxy(vk::Instance instance, const char* name) {
     return currentGetProc->GetProc(instance, name);
 }
 
+vk::UntypedFnptr GetDeviceProcProxy(vk::Device device, const char* name) {
+    EXPECT_NE(nullptr, currentGetProc);
+    return currentGetProc->GetDeviceProc(device, name);
+}
+
 MockGetProc::MockGetProc() {
     EXPECT_EQ(nullptr, currentGetProc);
     currentGetProc = this;
+    instance = reinterpret_cast<vk::InstanceImpl*>(this);
+    device = reinterpret_cast<vk::DeviceImpl*>(this);
     AddDefault("vkGetInstanceProcAddr", GetVkGetProcAddress());
+    AddDefault("vkGetDeviceProcAddr", GetVkGetDeviceProcAddress());
 }
 
 MockGetProc::~MockGetProc() {
     EXPECT_NE(nullptr, currentGetProc);
-    instance = reinterpret_cast<vk::InstanceImpl*>(this);
     currentGetProc = nullptr;
 }
 
@@ -59,17 +66,28 @@ vk::UntypedFnptr MockGetProc::GetVkGetProcAddress() const {
     return reinterpret_cast<vk::UntypedFnptr>(GetProcProxy);
 }
 
+vk::UntypedFnptr MockGetProc::GetVkGetDeviceProcAddress() const {
+    return reinterpret_cast<vk::UntypedFnptr>(GetDeviceProcProxy);
+}
+
 vk::Instance MockGetProc::GetInstance() const {
     return instance;
 }
 
+vk::Device MockGetProc::GetDevice() const {
+    return device;
+}
+
 void MockGetProc::AddDefault(const char* name, vk::UntypedFnptr proc) {
     defaultProcs.insert({name, proc});
 }
 
 vk::UntypedFnptr MockGetProc::GetProc(vk::Instance instance, const char* name) {
-    EXPECT_EQ(0, queriedGlobalProcs.count(name));
-    EXPECT_EQ(0, queriedInstanceProcs.count(name));
+    // The LoaderManager queries vkGetDeviceProcAddr for itself in addition to the VulkanLoader.
+    if (std::string(name) != "vkGetDeviceProcAddr") {
+        EXPECT_EQ(0, queriedGlobalProcs.count(name));
+        EXPECT_EQ(0, queriedInstanceProcs.count(name));
+    }
 
     if (instance == nullptr) {
         queriedGlobalProcs.insert(name);
@@ -84,3 +102,15 @@ vk::UntypedFnptr MockGetProc::GetProc(vk::Instance instance, const char* name) {
     }
     return DefaultFunction;
 }
+
+vk::UntypedFnptr MockGetProc::GetDeviceProc(vk::Device device, const char* name) {
+    EXPECT_EQ(device, this->device);
+    EXPECT_EQ(0, queriedDeviceProcs.count(name));
+    queriedDeviceProcs.insert(name);
+
+    auto it = defaultProcs.find(name);
+    if (it != defaultProcs.end()) {
+        return it->second;
+    }
+    return DefaultFunction;
+}
@@ -45,19 +45,24 @@ struct MockGetProc {
 
     // Get the mock vkGetProcAddress to give to the a LoaderManager
     vk::UntypedFnptr GetVkGetProcAddress() const;
+    vk::UntypedFnptr GetVkGetDeviceProcAddress() const;
     vk::Instance GetInstance() const;
+    vk::Device GetDevice() const;
 
     // Set the value returned for a specific proc.
     void AddDefault(const char* name, vk::UntypedFnptr proc);
 
     // Function that will be used as the getProcAddress, tests needn't use it.
     vk::UntypedFnptr GetProc(vk::Instance instance, const char* name);
+    vk::UntypedFnptr GetDeviceProc(vk::Device device, const char* name);
 
     std::unordered_set<std::string> queriedGlobalProcs;
     std::unordered_set<std::string> queriedInstanceProcs;
+    std::unordered_set<std::string> queriedDeviceProcs;
 
 protected:
     vk::Instance instance;
+    vk::Device device;
     std::unordered_map<std::string, vk::UntypedFnptr> defaultProcs;
 };
 
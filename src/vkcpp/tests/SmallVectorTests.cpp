@@ -0,0 +1,75 @@
+// PrototypeRenderer BSD Source Code
+// Copyright (c) 2013-2016, Daemon Developers
+// All rights reserved.
+// 
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//     * Redistributions of source code must retain the above copyright
+//       notice, this list of conditions and the following disclaimer.
+//     * Redistributions in binary form must reproduce the above copyright
+//       notice, this list of conditions and the following disclaimer in the
+//       documentation and/or other materials provided with the distribution.
+//     * Neither the name of the Daemon developers nor the
+//       names of its contributors may be used to endorse or promote products
+//       derived from this software without specific prior written permission.
+// 
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+// ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+// WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL DAEMON DEVELOPERS BE LIABLE FOR ANY
+// DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+// (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+// LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+// ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+// (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+// SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#include "gtest/gtest.h"
+
+
+#include "gtest/gtest.h"
+
+#include "vkcpp/SmallVector.h"
+
+TEST(SmallVectorTests, InlineStorage) {
+    vk::SmallVector<int, 4> vector;
+    ASSERT_TRUE(vector.empty());
+    ASSERT_EQ(4, vector.capacity());
+
+    vector.resize(4);
+    ASSERT_EQ(4, vector.size());
+    ASSERT_EQ(4, vector.capacity());
+    for (int element : vector) {
+        ASSERT_EQ(0, element);
+    }
+}
+
+TEST(SmallVectorTests, GrowKeepsElements) {
+    vk::SmallVector<int, 2> vector;
+    vector.resize(2);
+    vector[0] = 1;
+    vector[1] = 2;
+
+    vector.resize(5);
+    ASSERT_EQ(5, vector.size());
+    ASSERT_LE(5, vector.capacity());
+    ASSERT_EQ(1, vector[0]);
+    ASSERT_EQ(2, vector[1]);
+    ASSERT_EQ(0, vector[4]);
+}
+
+TEST(SmallVectorTests, ShrinkKeepsStorage) {
+    vk::SmallVector<int, 2> vector;
+    vector.resize(8);
+    const int* storage = vector.data();
+    size_t capacity = vector.capacity();
+
+    // Filling it again with a similar number of elements doesn't allocate, and the elements
+    // that come back are reset.
+    vector[6] = 42;
+    vector.resize(3);
+    vector.resize(7);
+    ASSERT_EQ(storage, vector.data());
+    ASSERT_EQ(capacity, vector.capacity());
+    ASSERT_EQ(0, vector[6]);
+}